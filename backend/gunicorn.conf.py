@@ -0,0 +1,29 @@
+"""
+Gunicorn settings.
+
+The app (and with it every model) is loaded once in the master and shared
+copy-on-write with the forked workers; post_fork rebuilds the threads and
+locks that do not survive fork(); worker_exit saves the location history.
+"""
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+if preload_app:
+    os.environ.setdefault('PRELOAD_MODELS', 'True')
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from prediction.warmup import reinit_after_fork
+        reinit_after_fork()
+
+
+def worker_exit(server, worker):
+    # Keep the readings gathered since the last periodic save
+    from prediction import views
+    if views._HISTORY is not None:
+        try:
+            views._HISTORY.save()
+        except OSError as e:
+            print(f"⚠ Could not save location history: {e}")
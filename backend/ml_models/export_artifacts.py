@@ -0,0 +1,19 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from prediction.artifacts import MMAP_SUBDIR, export_artifacts
+
+
+def export():
+    model_dir = os.path.join(BACKEND_DIR, 'ml_models')
+    manifest = export_artifacts(model_dir)
+    for key, entry in manifest['models'].items():
+        print(f"✓ {key} exported ({entry['kind']}, {len(entry['arrays'])} arrays)")
+    print(f"Memory-mapped artifacts written to {os.path.join(model_dir, MMAP_SUBDIR)}")
+
+
+if __name__ == '__main__':
+    export()
@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class PredictionConfig(AppConfig):
     name = 'prediction'
+
+    def ready(self):
+        # Under gunicorn --preload this runs once in the master before fork
+        if settings.PRELOAD_MODELS:
+            from .warmup import preload_models
+            preload_models()
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .forest import FlatForest
+from .lstm_engine import NumpyLSTM
+
+# Pickled sklearn models and the key each one is served under
+PICKLE_FILES = {
+    'model_temp.pkl': 'model_temp',
+    'model_rain.pkl': 'model_rain',
+    'rf_model_temp.pkl': 'rf_temp',
+    'rf_model_rain.pkl': 'rf_rain',
+    'lr_model_temp.pkl': 'lr_temp',
+    'lr_model_rain.pkl': 'lr_rain',
+    'model_classifier.pkl': 'model_classifier'
+}
+
+# Every file an export is derived from; a change to any of them makes it stale
+SOURCE_FILES = tuple(PICKLE_FILES) + ('scaler.pkl', 'lstm_model.h5', 'lstm_model.npz')
+
+MMAP_SUBDIR = 'mmap'
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+class LinearModel:
+    """Prediction-only stand-in for a fitted LinearRegression."""
+
+    def __init__(self, coef, intercept):
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+class MinMaxTransform:
+    """Prediction-only stand-in for a fitted MinMaxScaler."""
+
+    def __init__(self, min_, scale_):
+        self.min_ = min_
+        self.scale_ = scale_
+
+    def transform(self, X):
+        # Same dtype handling as sklearn: float32 stays float32
+        X = np.array(X, dtype=np.float32 if np.asarray(X).dtype == np.float32 else np.float64)
+        X *= self.scale_
+        X += self.min_
+        return X
+
+
+def _source_stats(model_dir):
+    stats = {}
+    for name in SOURCE_FILES:
+        path = os.path.join(model_dir, name)
+        if os.path.exists(path):
+            st = os.stat(path)
+            stats[name] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    return stats
+
+
+def _save_array(out_dir, filename, array):
+    # Write beside the target and rename over it, so processes that still
+    # map the previous file keep reading the old inode
+    tmp_path = os.path.join(out_dir, filename + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, os.path.join(out_dir, filename))
+    return filename
+
+
+def _serialize(key, model):
+    """(kind, arrays, meta) for one servable model, or None to skip it."""
+    if isinstance(model, FlatForest):
+        meta = {
+            'max_depth': int(model.max_depth),
+            'n_features': int(model.n_features_in_),
+            'classes': None if model.classes_ is None else [str(c) for c in model.classes_],
+        }
+        return 'forest', model.traversal_arrays(), meta
+    if isinstance(model, NumpyLSTM):
+        arrays = {'dense_kernel': model.dense_kernel, 'dense_bias': model.dense_bias}
+        layers = []
+        for i, layer in enumerate(model.layers):
+            for name in ('kernel', 'recurrent_kernel', 'bias'):
+                arrays[f'lstm{i}_{name}'] = layer[name]
+            layers.append({k: v for k, v in layer.items() if not isinstance(v, np.ndarray)})
+        return 'lstm', arrays, {'layers': layers, 'scaler_folded': model.scaler_folded}
+    if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+        arrays = {
+            'coef': np.asarray(model.coef_, dtype=np.float64),
+            'intercept': np.atleast_1d(np.asarray(model.intercept_, dtype=np.float64)),
+        }
+        return 'linear', arrays, {}
+    if hasattr(model, 'min_') and hasattr(model, 'scale_'):
+        arrays = {
+            'min': np.asarray(model.min_, dtype=np.float64),
+            'scale': np.asarray(model.scale_, dtype=np.float64),
+        }
+        return 'minmax', arrays, {}
+    return None
+
+
+def export_artifacts(model_dir, out_dir=None):
+    """
+    Write every servable model in ``model_dir`` as aligned .npy arrays plus a
+    JSON manifest under ``model_dir/mmap``.
+
+    Forests are stored in their traversal layout and the LSTM with the
+    scaler already folded in, so loading them memory-mapped needs no
+    per-process copies.
+    """
+    from .registry import load_lstm, load_model_set
+
+    out_dir = out_dir or os.path.join(model_dir, MMAP_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    sources = _source_stats(model_dir)
+    for name, info in sources.items():
+        with open(os.path.join(model_dir, name), 'rb') as f:
+            info['sha1'] = hashlib.sha1(f.read()).hexdigest()
+
+    models = load_model_set(model_dir, forest_backend='flat', model_format='pickle')
+    servable = {k: v for k, v in models.items() if k != 'ensemble'}
+    servable['lstm_engine'] = load_lstm(model_dir, models, backend='numpy')
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'sources': sources,
+        'models': {},
+    }
+    for key, model in servable.items():
+        serialized = _serialize(key, model) if model is not None else None
+        if serialized is None:
+            continue
+        kind, arrays, meta = serialized
+        manifest['models'][key] = {
+            'kind': kind,
+            'meta': meta,
+            'arrays': {name: _save_array(out_dir, f'{key}.{name}.npy', arr) for name, arr in arrays.items()},
+        }
+
+    tmp_path = os.path.join(out_dir, MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+def _rebuild(kind, arrays, meta):
+    if kind == 'forest':
+        classes = None if meta['classes'] is None else np.asarray(meta['classes'], dtype=object)
+        return FlatForest.from_traversal_arrays(arrays, meta['max_depth'], meta['n_features'], classes)
+    if kind == 'lstm':
+        layers = []
+        for i, layer_meta in enumerate(meta['layers']):
+            layer = dict(layer_meta)
+            for name in ('kernel', 'recurrent_kernel', 'bias'):
+                layer[name] = arrays[f'lstm{i}_{name}']
+            layers.append(layer)
+        return NumpyLSTM(layers, arrays['dense_kernel'], arrays['dense_bias'], meta['scaler_folded'])
+    if kind == 'linear':
+        coef = arrays['coef']
+        intercept = arrays['intercept'][0] if coef.ndim == 1 else arrays['intercept']
+        return LinearModel(coef, intercept)
+    if kind == 'minmax':
+        return MinMaxTransform(arrays['min'], arrays['scale'])
+    raise ValueError(f"Unknown artifact kind '{kind}'")
+
+
+def load_artifacts(model_dir, out_dir=None):
+    """
+    Memory-map a previous export. Returns None when there is no export or
+    when any source file changed since it was written.
+    """
+    out_dir = out_dir or os.path.join(model_dir, MMAP_SUBDIR)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_VERSION:
+        return None
+    current = _source_stats(model_dir)
+    recorded = {
+        name: {'size': info['size'], 'mtime_ns': info['mtime_ns']}
+        for name, info in manifest['sources'].items()
+    }
+    if current != recorded:
+        print("⚠ Memory-mapped artifacts are stale, falling back to pickles")
+        return None
+
+    models = {key: None for key in PICKLE_FILES.values()}
+    models['scaler'] = None
+    for key, entry in manifest['models'].items():
+        arrays = {
+            name: np.load(os.path.join(out_dir, filename), mmap_mode='r')
+            for name, filename in entry['arrays'].items()
+        }
+        models[key] = _rebuild(entry['kind'], arrays, entry['meta'])
+    return models
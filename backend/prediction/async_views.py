@@ -0,0 +1,159 @@
+"""
+Async versions of the upstream-bound endpoints, routed instead of the DRF
+views when ASYNC_VIEWS is on (the default under weather_system.asgi).
+
+Under ASGI a sync view holds a thread for as long as it waits on open-meteo
+or a geocoder; these await the shared AsyncUpstreamClient instead, so one
+worker keeps hundreds of upstream calls in flight. Responses are the same
+as the sync views', which they reuse for everything but the I/O.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
+
+from . import views
+from .citysearch import merge_results
+from .views import CitySearchView, CurrentWeatherBatchView, CurrentWeatherView, ReverseGeocodeView, request_location
+
+
+def respond(data, state=None, status=200):
+    response = JsonResponse(data, status=status, json_dumps_params={'ensure_ascii': False})
+    if state is not None:
+        response['X-Cache'] = state
+    return response
+
+
+def offload(view):
+    """
+    Async wrapper running the sync ``view`` on the bounded inference
+    executor, so model inference neither blocks the event loop nor queues
+    behind the single thread ASGI gives sync views.
+    """
+    async def offloaded(request, *args, **kwargs):
+        def run():
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+            return response
+        return await asyncio.get_running_loop().run_in_executor(views.get_inference_executor(), run)
+
+    offloaded.csrf_exempt = getattr(view, 'csrf_exempt', False)
+    return offloaded
+
+
+class AsyncCurrentWeatherView(View):
+    async def get(self, request):
+        lat, lon, city = CurrentWeatherView.params(request.GET)
+        try:
+            fields, encoding = CurrentWeatherView.shape_params(request.GET)
+        except ValueError as e:
+            return respond({'error': str(e)}, status=400)
+        try:
+            key, (cell_lat, cell_lon) = views._CURRENT_CACHE.cell(lat, lon)
+            res, cache_state = await views._CURRENT_CACHE.aget_or_fetch(key, lambda: self.fetch(cell_lat, cell_lon))
+            CurrentWeatherView.record(request_location({'lat': lat, 'lon': lon}), res.get('current', {}), cache_state)
+            validators = CurrentWeatherView.validators(key, res, city, fields, encoding)
+            response = get_conditional_response(request, *validators) if validators else None
+            if response is None:
+                response = respond(CurrentWeatherView.shape(CurrentWeatherView.payload(res, city), fields, encoding))
+            return CurrentWeatherView.stamp(response, cache_state, validators)
+        except Exception as e:
+            return respond(CurrentWeatherView.fallback(city, e))
+
+    @staticmethod
+    async def fetch(lat, lon):
+        with views._HEALTH.track('OpenMeteo'):
+            res = await views.get_async_upstream().get(CurrentWeatherView.FORECAST_URL.format(lat=lat, lon=lon), timeout=5)
+            res.raise_for_status()
+            return res.json(), len(res.content)
+
+
+class AsyncCurrentWeatherBatchView(View):
+    async def get(self, request):
+        try:
+            data = CurrentWeatherBatchView.from_query(request.GET)
+        except ValueError as e:
+            return respond({'error': str(e)}, status=400)
+        return await self.handle(data)
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b'null')
+        except ValueError:
+            return respond({'error': 'invalid JSON'}, status=400)
+        return await self.handle(data)
+
+    async def handle(self, data):
+        try:
+            locations, errors = CurrentWeatherBatchView.parse(data)
+        except ValueError as e:
+            return respond({'error': str(e)}, status=400)
+        keys, centres = CurrentWeatherBatchView.cells(locations)
+        found, error = await views._CURRENT_CACHE.aget_many_or_fetch(
+            list(centres), lambda miss: self.fetch_many(miss, centres))
+        CurrentWeatherBatchView.record_all(locations, keys, found)
+        return respond(CurrentWeatherBatchView.payload(locations, keys, found, error, errors))
+
+    @staticmethod
+    async def fetch_many(miss, centres):
+        with views._HEALTH.track('OpenMeteo'):
+            res = await views.get_async_upstream().get(CurrentWeatherBatchView.batch_url(miss, centres),
+                                                       timeout=settings.CURRENT_BATCH_TIMEOUT)
+            res.raise_for_status()
+            return CurrentWeatherBatchView.split(miss, res.json(), len(res.content))
+
+
+class AsyncCitySearchView(View):
+    async def get(self, request):
+        q = (request.GET.get('name') or '').strip()
+        if not q:
+            return respond({'results': []})
+        count = settings.CITY_SEARCH_COUNT
+
+        local = CitySearchView.search_local(q, count)
+        if len(local) >= count:
+            return respond({'results': local}, 'LOCAL')
+
+        upstream = views._SEARCH_CACHE.get(q)
+        state = 'HIT'
+        if upstream is None:
+            state = 'MISS'
+            try:
+                with views._HEALTH.track('OpenMeteoGeocoding'):
+                    res = await views.get_async_upstream().get(
+                        CitySearchView.SEARCH_URL, params={'name': q, 'count': count},
+                        timeout=settings.CITY_SEARCH_TIMEOUT
+                    )
+                    res.raise_for_status()
+                    upstream = CitySearchView.store(q, res.json(), count)
+            except Exception as e:
+                print(f"❌ City search error: {e}")
+                upstream, state = [], 'ERROR'
+        return respond({'results': merge_results(upstream, local, count)}, state)
+
+
+class AsyncReverseGeocodeView(View):
+    async def get(self, request):
+        lat = request.GET.get('latitude')
+        lon = request.GET.get('longitude')
+
+        # The cache reads and writes the database, which only works from sync code
+        cached = await sync_to_async(ReverseGeocodeView.cached)(lat, lon)
+        if cached is not None:
+            return respond({'results': [cached]}, 'HIT')
+
+        local = ReverseGeocodeView.nearby(lat, lon)
+        refine = request.GET.get('refine', 'false').lower() == 'true'
+        if local is not None and local['distance_km'] <= settings.GEOCODE_LOCAL_MAX_KM and not refine:
+            return respond({'results': [ReverseGeocodeView.local_result(local, 'locality')]})
+
+        result = await views._GEOCODER.aresolve(views.get_async_upstream(), lat, lon)
+        if result is not None:
+            await sync_to_async(views._GEOCACHE.put)(lat, lon, result)
+            return respond({'results': [result]}, 'MISS')
+        return respond({'results': [ReverseGeocodeView.unresolved(local, lat, lon)]})
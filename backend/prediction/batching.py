@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item inference calls into batched calls.
+
+    Callers ``submit()`` one input array and block until its result is ready.
+    A worker thread gathers whatever arrives within ``max_wait_ms`` of the
+    first pending item (or until ``max_batch_size`` items are queued), stacks
+    them along a new leading axis, runs ``batch_fn`` once and scatters the
+    output rows back to the waiting callers. Items submitted with a
+    ``group`` are only batched with items of the same group and run as
+    ``batch_fn(batch, group)``.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=2.0, name='micro-batcher'):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {'batches': 0, 'items': 0, 'errors': 0, 'last_batch_size': 0, 'largest_batch': 0}
+
+    def _ensure_worker(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def reset_after_fork(self):
+        """Drop the parent's queue and worker; a new worker starts on next submit."""
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, item, timeout=None, group=None):
+        """Queue one input and wait for its row of the batched output."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((np.asarray(item), future, group))
+        return future.result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            groups = {}
+            for item, future, group in self._collect():
+                if future.set_running_or_notify_cancel():
+                    groups.setdefault(id(group), (group, []))[1].append((item, future))
+            for group, pending in groups.values():
+                self._run_batch(group, pending)
+
+    def _run_batch(self, group, pending):
+        items = [x for x, _ in pending]
+        futures = [f for _, f in pending]
+        try:
+            batch = np.stack(items)
+            outputs = self.batch_fn(batch) if group is None else self.batch_fn(batch, group)
+            for future, out in zip(futures, outputs):
+                future.set_result(out)
+        except Exception as e:
+            self._stats['errors'] += 1
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        self._stats['batches'] += 1
+        self._stats['items'] += len(items)
+        self._stats['last_batch_size'] = len(items)
+        self._stats['largest_batch'] = max(self._stats['largest_batch'], len(items))
+
+    def stats(self):
+        """Queue depth and batch-size counters for diagnostics."""
+        s = dict(self._stats)
+        s['queue_depth'] = self._queue.qsize()
+        s['avg_batch_size'] = round(s['items'] / s['batches'], 2) if s['batches'] else 0.0
+        s['max_batch_size'] = self.max_batch_size
+        s['max_wait_ms'] = self.max_wait * 1000.0
+        s['worker_alive'] = self._thread is not None and self._thread.is_alive()
+        return s
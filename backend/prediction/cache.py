@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .features import FEATURE_NAMES
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache for model endpoint responses.
+
+    Inputs are snapped to a per-feature grid (``quantization`` maps feature
+    name to step size) and the snapped vector is both the cache key and the
+    model input, so a hit returns exactly what a miss would have computed.
+    Keys also carry the version of the models that computed the value, and
+    every versioned entry is dropped as soon as a lookup arrives with a new
+    version. Lookups without a version (endpoints whose models are not in the
+    registry) neither trigger nor suffer that invalidation.
+    """
+
+    def __init__(self, max_entries=4096, ttl=300.0, quantization=None):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        quantization = quantization or {}
+        self.steps = np.array([float(quantization.get(name, 0) or 0) for name in FEATURE_NAMES])
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+
+    def quantize(self, features):
+        """Return (hashable key, snapped float32 features)."""
+        x = np.asarray(features, dtype=np.float64)
+        quantized = self.steps > 0
+        snapped = x.copy()
+        snapped[quantized] = np.round(x[quantized] / self.steps[quantized]) * self.steps[quantized]
+        key = tuple(
+            int(round(v / s)) if s > 0 else float(v) for v, s in zip(snapped, self.steps)
+        )
+        return key, snapped.astype(np.float32)
+
+    def _observe_version(self, version):
+        if version is None or version == self._version:
+            return
+        with self._lock:
+            if self._version is not None and version != self._version:
+                for key in [k for k in self._entries if k[1] is not None]:
+                    del self._entries[key]
+                self._counters['invalidations'] += 1
+            self._version = version
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            expires, value = entry
+            if expires < now:
+                del self._entries[key]
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def get_or_compute(self, endpoint, features, compute, version=None):
+        """
+        Return ``(value, hit)``. ``compute`` receives the snapped features and
+        may return None to signal a result that must not be cached.
+        """
+        key, snapped = self.quantize(features)
+        if not self.enabled:
+            return compute(snapped), False
+        self._observe_version(version)
+        full_key = (endpoint, version, key)
+        value = self.get(full_key)
+        if value is not None:
+            return value, True
+        value = compute(snapped)
+        if value is not None:
+            self.set(full_key, value)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._counters)
+            s['entries'] = len(self._entries)
+        lookups = s['hits'] + s['misses']
+        s['hit_rate'] = round(s['hits'] / lookups, 4) if lookups else 0.0
+        s['max_entries'] = self.max_entries
+        s['ttl'] = self.ttl
+        s['model_version'] = self._version
+        return s
@@ -0,0 +1,167 @@
+import bisect
+import csv
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+# ISO code -> English name, next to places.csv (GeoNames, CC BY 4.0)
+COUNTRIES_CSV = 'countries.csv'
+
+
+def normalize(text):
+    """Search form of a name: accents stripped, case folded, spaces collapsed."""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+def load_countries(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline='', encoding='utf-8') as f:
+        return {r['code']: r['name'] for r in csv.DictReader(f)}
+
+
+class CityPrefixIndex:
+    """
+    Prefix search over the gazetteer's place names, most populous first.
+
+    Normalized names are kept sorted, so every name starting with a prefix
+    is one contiguous range found with two binary searches; the range is
+    then ranked by population. Results use the field names of open-meteo's
+    geocoding API so the frontend can mix both.
+    """
+
+    def __init__(self, places, countries=None):
+        self.places = places
+        self.countries = countries or {}
+        keys = [normalize(places.name(i)) for i in range(len(places))]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = [keys[i] for i in order]
+        self.order = np.array(order, dtype=np.int64)
+        self.population = places.population[self.order]
+        self._stats = {'lookups': 0}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def search(self, prefix, count=10):
+        """Up to ``count`` places whose name starts with ``prefix``."""
+        self._stats['lookups'] += 1
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + '\U0010ffff', lo)
+        if hi == lo:
+            return []
+        population = self.population[lo:hi]
+        if hi - lo > count:
+            top = np.argpartition(-population, count - 1)[:count]
+        else:
+            top = np.arange(hi - lo)
+        top = top[np.argsort(-population[top], kind='stable')]
+        return [self.result(int(self.order[lo + k])) for k in top]
+
+    def result(self, i):
+        place = self.places.place(i)
+        return {
+            'id': f"local-{i}",
+            'name': place['name'],
+            'latitude': place['latitude'],
+            'longitude': place['longitude'],
+            'country_code': place['country_code'],
+            'country': self.countries.get(place['country_code'], place['country_code']),
+            'admin1': place['admin1'],
+            'population': place['population'],
+            'source': 'local',
+        }
+
+    def stats(self):
+        return {'lookups': self._stats['lookups'], 'names': len(self)}
+
+
+class PrefixCache:
+    """
+    Upstream search results by normalized query, LRU and TTL bounded.
+
+    An answer with fewer results than were asked for is complete: it holds
+    every match for its query. A longer query is then answered by filtering
+    that answer, so a cached "coi" serves "coim" without another call.
+    """
+
+    def __init__(self, max_entries=2048, ttl=86400.0):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl)
+        self._entries = OrderedDict()  # query -> (expires, complete, results)
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'prefix_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _entry(self, query, now):
+        entry = self._entries.get(query)
+        if entry is None:
+            return None
+        if entry[0] < now:
+            del self._entries[query]
+            return None
+        self._entries.move_to_end(query)
+        return entry
+
+    def get(self, query):
+        """Results for ``query`` (exact or filtered from a complete prefix), else None."""
+        query = normalize(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entry(query, now)
+            if entry is not None:
+                self._counters['hits'] += 1
+                return list(entry[2])
+            for end in range(len(query) - 1, 0, -1):
+                entry = self._entry(query[:end], now)
+                if entry is not None and entry[1]:
+                    self._counters['prefix_hits'] += 1
+                    return [r for r in entry[2] if normalize(r.get('name', '')).startswith(query)]
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, query, results, complete):
+        with self._lock:
+            self._entries[normalize(query)] = (time.monotonic() + self.ttl, complete, list(results))
+            self._entries.move_to_end(normalize(query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._counters)
+            s['entries'] = len(self._entries)
+        lookups = s['hits'] + s['prefix_hits'] + s['misses']
+        s['hit_rate'] = round((s['hits'] + s['prefix_hits']) / lookups, 4) if lookups else 0.0
+        s['max_entries'] = self.max_entries
+        s['ttl'] = self.ttl
+        return s
+
+
+def merge_results(primary, extra, count):
+    """``primary`` then ``extra``, dropping places already listed (same name, ~1 km apart)."""
+    out, seen = [], set()
+    for r in list(primary) + list(extra):
+        try:
+            key = (normalize(r['name']), round(float(r['latitude']), 2), round(float(r['longitude']), 2))
+        except (KeyError, TypeError, ValueError):
+            key = id(r)
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(r)
+        if len(out) >= count:
+            break
+    return out
@@ -0,0 +1,90 @@
+import base64
+from datetime import datetime, timezone
+
+import numpy as np
+
+_INT16 = np.iinfo(np.int16)
+
+
+def parse_fields(value, allowed):
+    """
+    Parse a ``fields=`` list such as ``temperature,code,hourly.rain`` into
+    a tuple of names, or None when it is empty. A name is a payload key
+    from ``allowed`` or ``key.series`` for one series of a key's dict.
+    """
+    fields = tuple(dict.fromkeys(f.strip() for f in (value or '').split(',') if f.strip()))
+    if not fields:
+        return None
+    for field in fields:
+        if field.partition('.')[0] not in allowed:
+            raise ValueError(f"unknown field '{field}', expected one of {', '.join(allowed)}")
+    return fields
+
+
+def select_fields(payload, fields):
+    """
+    The part of ``payload`` named by ``fields``. Picking series out of a
+    dict keeps its 'time' series too; series the payload lacks are left out.
+    """
+    out = {}
+    for field in fields:
+        name, _, series = field.partition('.')
+        if not series:
+            out[name] = payload.get(name)
+            continue
+        group = payload.get(name) or {}
+        if isinstance(out.get(name), dict) and out[name] is group:
+            continue
+        picked = out.setdefault(name, {})
+        for key in ('time', series):
+            if key in group:
+                picked[key] = group[key]
+    return out
+
+
+def _timestamp(value):
+    # open-meteo sends naive local times; read them as UTC so the server's
+    # own time zone and DST rules never shift the spacing
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _pack_times(values):
+    """``{'start', 'step', 'count'}`` for evenly spaced ISO timestamps, else None."""
+    try:
+        stamps = np.array([_timestamp(v) for v in values], dtype=np.float64)
+    except ValueError:
+        return None
+    steps = np.diff(stamps)
+    if len(steps) == 0 or not np.all(steps == steps[0]):
+        return None
+    return {'start': values[0], 'step': int(steps[0]), 'count': len(values)}
+
+
+def pack_series(values):
+    """
+    One series in compact form. Numbers become base64 little-endian arrays
+    (``int16`` when every value is a small integer, otherwise ``float32``
+    with NaN for nulls), evenly spaced timestamps become start/step/count,
+    and anything else is returned unchanged.
+    """
+    if not isinstance(values, list) or not values:
+        return values
+    if all(isinstance(v, str) for v in values):
+        return _pack_times(values) or values
+    if not all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+        return values
+    if all(isinstance(v, int) and _INT16.min <= v <= _INT16.max for v in values):
+        array = np.array(values, dtype='<i2')
+    else:
+        array = np.array([np.nan if v is None else v for v in values], dtype='<f4')
+    return {'dtype': array.dtype.name, 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def pack_columns(columns):
+    """``pack_series`` applied to every series of an open-meteo ``hourly``/``daily`` dict."""
+    if not isinstance(columns, dict):
+        return columns
+    return {name: pack_series(values) for name, values in columns.items()}
@@ -0,0 +1,119 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# (display name, temperature model key, rainfall model key) in response order
+ENSEMBLE_MEMBERS = (
+    ('Random Forest', 'rf_temp', 'rf_rain'),
+    ('Linear Regression', 'lr_temp', 'lr_rain'),
+)
+
+
+class LinearMember:
+    """Temperature and rainfall linear models fused into one (features, 2) matmul."""
+    releases_gil = False
+
+    def __init__(self, temp_model, rain_model):
+        self.coef = np.column_stack([
+            np.ravel(temp_model.coef_), np.ravel(rain_model.coef_)
+        ]).astype(np.float64)
+        self.intercept = np.array([
+            np.ravel(temp_model.intercept_)[0], np.ravel(rain_model.intercept_)[0]
+        ], dtype=np.float64)
+
+    def predict(self, X):
+        return X @ self.coef + self.intercept
+
+
+class PairMember:
+    """Any temperature/rainfall model pair exposing ``predict``."""
+
+    def __init__(self, temp_model, rain_model, releases_gil=False):
+        self.temp_model = temp_model
+        self.rain_model = rain_model
+        self.releases_gil = releases_gil
+
+    def predict(self, X):
+        return np.column_stack([self.temp_model.predict(X), self.rain_model.predict(X)])
+
+
+def _make_member(temp_model, rain_model):
+    if all(hasattr(m, 'coef_') and hasattr(m, 'intercept_') for m in (temp_model, rain_model)):
+        return LinearMember(temp_model, rain_model)
+    # Forest traversal is NumPy gathers or sklearn's nogil Cython, both of
+    # which let other threads run
+    releases_gil = all(hasattr(m, 'estimators_') or hasattr(m, 'roots') for m in (temp_model, rain_model))
+    return PairMember(temp_model, rain_model, releases_gil=releases_gil)
+
+
+class EnsemblePredictor:
+    """
+    Evaluate every ensemble member for a prevalidated float feature batch.
+
+    Built once when the models load. ``predict`` returns per-member
+    ``(rows, 2)`` arrays of [temperature, rainfall] and their mean. Batches of
+    at least ``parallel_min_rows`` rows run GIL-releasing members concurrently
+    on a small thread pool; below that, thread hand-off costs more than it saves.
+    """
+
+    parallel_min_rows = 256
+
+    def __init__(self, members, max_workers=2):
+        self.members = members
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_models(cls, models, max_workers=2):
+        members = []
+        for name, temp_key, rain_key in ENSEMBLE_MEMBERS:
+            temp_model, rain_model = models.get(temp_key), models.get(rain_key)
+            if temp_model is not None and rain_model is not None:
+                members.append((name, _make_member(temp_model, rain_model)))
+        return cls(members, max_workers=max_workers) if members else None
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='ensemble'
+                    )
+        return self._executor
+
+    def shutdown(self):
+        """Drop the thread pool; a fresh one is created on the next parallel call."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def reset_after_fork(self):
+        """Forget the parent's pool; its threads do not exist in the child."""
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None]
+
+        parallel = [m for _, m in self.members if m.releases_gil]
+        outputs = {}
+        if len(X) >= self.parallel_min_rows and len(parallel) > 1 and self.max_workers > 1:
+            executor = self._get_executor()
+            futures = {id(m): executor.submit(m.predict, X) for m in parallel}
+            for name, member in self.members:
+                if id(member) not in futures:
+                    outputs[name] = member.predict(X)
+            for name, member in self.members:
+                if id(member) in futures:
+                    outputs[name] = futures[id(member)].result()
+        else:
+            for name, member in self.members:
+                outputs[name] = member.predict(X)
+
+        members = {name: np.asarray(outputs[name], dtype=np.float64) for name, _ in self.members}
+        mean = np.mean(np.stack(list(members.values())), axis=0)
+        return {'members': members, 'mean': mean}
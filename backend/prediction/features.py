@@ -0,0 +1,137 @@
+import math
+
+import numpy as np
+
+# Column order every model in ml_models/ was trained on
+FEATURE_NAMES = ('temperature', 'humidity', 'rainfall', 'wind_speed')
+
+# Features are served as float32; anything larger becomes inf
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def _to_float(value):
+    """Convert one JSON value to a float that is finite as float32, or raise ValueError."""
+    if value is None or isinstance(value, bool):
+        raise ValueError(f"invalid value {value!r}")
+    out = float(value)
+    if not math.isfinite(out) or abs(out) > FLOAT32_MAX:
+        raise ValueError(f"non-finite value {value!r}")
+    return out
+
+
+def _parse_rows(rows, X, valid, errors):
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            valid[i] = False
+            errors.append({'index': i, 'error': 'row must be an object'})
+            continue
+        try:
+            for j, name in enumerate(FEATURE_NAMES):
+                if name not in row:
+                    raise ValueError(f"missing '{name}'")
+                try:
+                    X[i, j] = _to_float(row[name])
+                except (TypeError, ValueError):
+                    raise ValueError(f"invalid '{name}': {row[name]!r}")
+        except ValueError as e:
+            valid[i] = False
+            errors.append({'index': i, 'error': str(e)})
+
+
+def _parse_columns(columns, n, X, valid, errors):
+    for j, name in enumerate(FEATURE_NAMES):
+        values = columns[name]
+        try:
+            # Fast path: a clean numeric column converts in one call
+            col = np.asarray(values, dtype=np.float64)
+            if col.shape != (n,):
+                raise ValueError
+            bad = ~np.isfinite(col)
+        except (TypeError, ValueError):
+            col = np.zeros(n)
+            bad = np.zeros(n, dtype=bool)
+            for i, v in enumerate(values):
+                try:
+                    col[i] = _to_float(v)
+                except (TypeError, ValueError):
+                    bad[i] = True
+        with np.errstate(over='ignore'):
+            X[:, j] = col  # overflow is reported after the cast
+        for i in np.flatnonzero(bad & valid):
+            errors.append({'index': int(i), 'error': f"invalid '{name}': {values[i]!r}"})
+        valid &= ~bad
+
+
+def parse_feature_batch(payload, max_rows=None):
+    """
+    Validate a batch payload into one float32 feature matrix.
+
+    Accepts a list of row objects, ``{"rows": [...]}``, or columnar
+    ``{"temperature": [...], "humidity": [...], ...}`` (optionally nested under
+    ``"columns"``). Returns ``(X, valid, errors)`` where ``X`` is ``(n, 4)``
+    float32, ``valid`` is a boolean row mask and ``errors`` lists
+    ``{'index', 'error'}`` for every rejected row. Raises ValueError only when
+    the payload as a whole is malformed.
+    """
+    if isinstance(payload, dict) and 'rows' in payload:
+        payload = payload['rows']
+    elif isinstance(payload, dict) and 'columns' in payload:
+        payload = payload['columns']
+
+    if isinstance(payload, (list, tuple)):
+        n = len(payload)
+        columnar = False
+    elif isinstance(payload, dict):
+        missing = [name for name in FEATURE_NAMES if name not in payload]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        columns = {name: payload[name] for name in FEATURE_NAMES}
+        if not all(isinstance(c, (list, tuple)) for c in columns.values()):
+            raise ValueError("Columns must be arrays")
+        lengths = {len(c) for c in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("Columns must have equal length")
+        n = lengths.pop()
+        columnar = True
+    else:
+        raise ValueError("Expected a list of rows or an object of columns")
+
+    if n == 0:
+        raise ValueError("Batch is empty")
+    if max_rows is not None and n > max_rows:
+        raise ValueError(f"Batch too large: {n} rows (max {max_rows})")
+
+    X = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float32)
+    valid = np.ones(n, dtype=bool)
+    errors = []
+    if columnar:
+        _parse_columns(columns, n, X, valid, errors)
+        errors.sort(key=lambda e: e['index'])
+    else:
+        _parse_rows(payload, X, valid, errors)
+    # Checked after the float32 cast, where values past its range turn into inf
+    overflow = valid & ~np.isfinite(X).all(axis=1)
+    if overflow.any():
+        for i in np.flatnonzero(overflow):
+            errors.append({'index': int(i), 'error': 'value out of range'})
+        errors.sort(key=lambda e: e['index'])
+        valid &= ~overflow
+    return X, valid, errors
+
+
+def parse_feature_row(data, defaults=None):
+    """
+    Read one ``{temperature, humidity, rainfall, wind_speed}`` object into a
+    float32 vector. Missing fields take ``defaults[name]`` when given,
+    otherwise they raise ValueError like any invalid value.
+    """
+    row = np.empty(len(FEATURE_NAMES), dtype=np.float32)
+    for j, name in enumerate(FEATURE_NAMES):
+        value = data.get(name)
+        if value is None and defaults is not None:
+            value = defaults[name]
+        try:
+            row[j] = _to_float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid '{name}': {value!r}")
+    return row
@@ -0,0 +1,37 @@
+import numpy as np
+
+from .features import FEATURE_NAMES
+
+# Window length lstm_model.h5 was trained on (SEQ_LENGTH in train_lstm.py)
+SEQ_LENGTH = 3
+
+TEMPERATURE = FEATURE_NAMES.index('temperature')
+RAINFALL = FEATURE_NAMES.index('rainfall')
+
+
+def rollout(lstm, windows, horizon, rain_model=None):
+    """
+    Roll the sequence model ``horizon`` steps forward for a batch of locations.
+
+    ``windows`` is ``(locations, steps, features)`` raw readings, oldest first.
+    Every step is a single ``lstm.predict`` over all locations. The predicted
+    temperature, plus ``rain_model``'s rainfall for the latest reading when
+    given, becomes the newest row of each window; humidity and wind speed
+    carry forward. Returns ``(locations, horizon, features)`` float32 holding
+    the row predicted at each step.
+    """
+    # Private copy, shifted in place as predictions are appended
+    window = np.array(windows, dtype=np.float32)
+    if window.ndim == 2:
+        window = window[None]
+    out = np.empty((len(window), horizon, window.shape[2]), dtype=np.float32)
+    for step in range(horizon):
+        latest = window[:, -1]
+        nxt = latest.copy()
+        nxt[:, TEMPERATURE] = np.ravel(lstm.predict(window))
+        if rain_model is not None:
+            nxt[:, RAINFALL] = np.maximum(np.ravel(rain_model.predict(latest)), 0.0)
+        window[:, :-1] = window[:, 1:]
+        window[:, -1] = nxt
+        out[:, step] = nxt
+    return out
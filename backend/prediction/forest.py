@@ -0,0 +1,195 @@
+import threading
+
+import numpy as np
+
+_LEAF = -1  # sklearn's TREE_LEAF marker in children_left/children_right
+
+
+class FlatForest:
+    """
+    A fitted sklearn forest flattened into contiguous node arrays.
+
+    All trees share one set of ``feature``/``threshold``/``left``/``right``/
+    ``value`` arrays, with ``roots`` holding each tree's first node. Leaves
+    point at themselves, so ``predict`` advances every (row, tree) pair one
+    level per step for ``max_depth`` steps without any branching per tree.
+    """
+
+    # Rows per traversal chunk; keeps the (rows, trees) node matrix cache-sized
+    chunk_size = 1024
+
+    # Batches of at least sklearn_min_rows rows go to the source sklearn
+    # forest when one is attached (see use_sklearn_from): its compiled
+    # per-tree traversal overtakes the NumPy gathers on large batches
+    sklearn_min_rows = None
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, n_features,
+                 classes=None, children=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features_in_ = n_features
+        # Traversal indexes in native intp so np.take never converts them;
+        # children[2 * node + (x <= threshold)] picks right (0) or left (1).
+        # asarray keeps memory-mapped intp arrays shared instead of copying.
+        self._feature = np.asarray(feature, dtype=np.intp)
+        if children is None:
+            children = np.stack([right, left], axis=1).ravel()
+        self._children = np.asarray(children, dtype=np.intp)
+        self._roots = np.asarray(roots, dtype=np.intp)
+        self._sklearn = None
+        self._sklearn_loader = None
+        self._sklearn_lock = threading.Lock()
+
+    def use_sklearn_from(self, min_rows, model=None, loader=None):
+        """
+        Evaluate batches of at least ``min_rows`` rows with the sklearn
+        ``model`` this forest was compiled from, or with the one ``loader()``
+        returns on the first such batch. ``min_rows`` of 0 or None turns
+        the hand-off off.
+        """
+        self.sklearn_min_rows = min_rows or None
+        self._sklearn = model
+        self._sklearn_loader = loader
+        return self
+
+    def _large_batch_model(self, X):
+        if self.sklearn_min_rows is None or X.ndim != 2 or len(X) < self.sklearn_min_rows:
+            return None
+        if self._sklearn is None and self._sklearn_loader is not None:
+            with self._sklearn_lock:
+                if self._sklearn is None and self._sklearn_loader is not None:
+                    try:
+                        self._sklearn = self._sklearn_loader()
+                    except Exception as e:
+                        print(f"⚠ Could not load sklearn forest for large batches, staying flat: {e}")
+                    self._sklearn_loader = None
+        return self._sklearn
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def traversal_arrays(self):
+        """The arrays ``predict`` reads, in the dtypes it reads them."""
+        return {
+            'feature': self._feature, 'threshold': self.threshold,
+            'children': self._children, 'value': self.value, 'roots': self._roots,
+        }
+
+    @classmethod
+    def from_traversal_arrays(cls, arrays, max_depth, n_features, classes=None):
+        """Rebuild from ``traversal_arrays()`` output without copying it."""
+        children = arrays['children']
+        return cls(
+            feature=arrays['feature'], threshold=arrays['threshold'],
+            left=children[1::2], right=children[0::2],
+            value=arrays['value'], roots=arrays['roots'],
+            max_depth=max_depth, n_features=n_features,
+            classes=classes, children=children,
+        )
+
+    def _leaves(self, X):
+        """Leaf index reached by every tree for each row of a 2-D float32 batch."""
+        n_rows, n_cols = X.shape
+        flat_x = X.ravel()
+        row_base = (np.arange(n_rows) * n_cols)[:, None]
+        node = np.broadcast_to(self._roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            x = np.take(flat_x, np.take(self._feature, node) + row_base)
+            go_left = x <= np.take(self.threshold, node)
+            node = np.take(self._children, 2 * node + go_left)
+        return node
+
+    def _leaf_values(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None]
+        out = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), self.chunk_size):
+            chunk = X[start:start + self.chunk_size]
+            out[start:start + len(chunk)] = self.value[self._leaves(chunk)].mean(axis=1)
+        return out
+
+    def predict_proba(self, X):
+        if self.classes_ is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        model = self._large_batch_model(np.asarray(X))
+        if model is not None:
+            return model.predict_proba(np.asarray(X, dtype=np.float32))
+        return self._leaf_values(X)
+
+    def predict(self, X):
+        model = self._large_batch_model(np.asarray(X))
+        if model is not None:
+            return model.predict(np.asarray(X, dtype=np.float32))
+        mean = self._leaf_values(X)
+        if self.classes_ is not None:
+            return self.classes_[np.argmax(mean, axis=1)]
+        return mean[:, 0]
+
+
+def is_tree_forest(model):
+    """True for fitted sklearn forests of decision trees."""
+    estimators = getattr(model, 'estimators_', None)
+    return bool(estimators) and all(hasattr(e, 'tree_') for e in estimators)
+
+
+def compile_forest(model):
+    """
+    Flatten a fitted single-output RandomForestRegressor or
+    RandomForestClassifier into a FlatForest.
+
+    Thresholds are stored as float32 rounded towards -inf. sklearn compares
+    float32 inputs against float64 thresholds, and this rounding keeps
+    ``x <= threshold`` exact for every float32 ``x``.
+    """
+    classes = getattr(model, 'classes_', None)
+    if getattr(model, 'n_outputs_', 1) != 1:
+        raise ValueError("Only single-output forests are supported")
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for est in model.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        idx = np.arange(n)
+        is_leaf = tree.children_left == _LEAF
+
+        thr64 = tree.threshold
+        thr32 = thr64.astype(np.float32)
+        rounded_up = thr32.astype(np.float64) > thr64
+        thr32[rounded_up] = np.nextafter(thr32[rounded_up], np.float32(-np.inf))
+        thr32[is_leaf] = np.inf
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        if classes is not None:
+            # Trees store class counts or fractions depending on the sklearn version
+            totals = value.sum(axis=1, keepdims=True)
+            value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(thr32)
+        lefts.append(np.where(is_leaf, idx, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, idx, tree.children_right) + offset)
+        values.append(value)
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    return FlatForest(
+        feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int32),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float32),
+        left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.int32),
+        right=np.ascontiguousarray(np.concatenate(rights), dtype=np.int32),
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float32),
+        roots=np.asarray(roots, dtype=np.int32),
+        max_depth=max_depth,
+        n_features=model.n_features_in_,
+        classes=None if classes is None else np.asarray(classes),
+    )
@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.db import DatabaseError, OperationalError, ProgrammingError
+
+from .models import GeocodeCacheEntry
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash(latitude, longitude, precision=7):
+    """Standard base32 geohash; 7 characters is a cell of about 150 m."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    latitude, longitude = float(latitude), float(longitude)
+    out = []
+    bits, ch, even = 0, 0, True
+    while len(out) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                ch = ch << 1 | 1
+                lon_lo = mid
+            else:
+                ch <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                ch = ch << 1 | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            out.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return ''.join(out)
+
+
+class GeocodeCache:
+    """
+    Reverse-geocoding results kept per geohash cell across restarts.
+
+    The durable tier is the GeocodeCacheEntry table (one primary-key lookup
+    per miss); an LRU of ``hot_size`` cells sits in front of it. Entries
+    older than ``ttl`` seconds are refetched. If the table is missing (no
+    migrate yet) the cache runs on the hot tier alone.
+    """
+
+    def __init__(self, precision=7, hot_size=4096, ttl=30 * 86400.0):
+        self.precision = int(precision)
+        self.hot_size = int(hot_size)
+        self.ttl = float(ttl)
+        self._hot = OrderedDict()  # geohash -> (expires, result)
+        self._lock = threading.Lock()
+        self._db_ok = True
+        self._counters = {'hot_hits': 0, 'db_hits': 0, 'misses': 0, 'stores': 0, 'db_errors': 0}
+
+    def key(self, latitude, longitude):
+        return geohash(latitude, longitude, self.precision)
+
+    def _remember(self, key, result, expires):
+        with self._lock:
+            self._hot[key] = (expires, result)
+            self._hot.move_to_end(key)
+            while len(self._hot) > self.hot_size:
+                self._hot.popitem(last=False)
+
+    def _db_failed(self, e):
+        """
+        Count a database error. Only a missing table turns the durable tier
+        off; anything else (say SQLite's "database is locked" while another
+        worker writes) just skips this read or write.
+        """
+        self._counters['db_errors'] += 1
+        message = str(e).lower()
+        if isinstance(e, (OperationalError, ProgrammingError)) and (
+                'no such table' in message or 'does not exist' in message):
+            if self._db_ok:
+                print(f"⚠ Geocode cache table unavailable, keeping results in memory only: {e}")
+            self._db_ok = False
+        else:
+            print(f"⚠ Geocode cache database error, skipped: {e}")
+
+    def get(self, latitude, longitude):
+        key = self.key(latitude, longitude)
+        now = time.time()
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._hot.move_to_end(key)
+                    self._counters['hot_hits'] += 1
+                    return entry[1]
+                del self._hot[key]
+        if self._db_ok:
+            try:
+                row = GeocodeCacheEntry.objects.filter(geohash=key).values_list('result', 'updated_at').first()
+            except DatabaseError as e:
+                self._db_failed(e)
+                row = None
+            if row is not None:
+                expires = row[1].timestamp() + self.ttl
+                if expires >= now:
+                    self._remember(key, row[0], expires)
+                    self._counters['db_hits'] += 1
+                    return row[0]
+        self._counters['misses'] += 1
+        return None
+
+    def put(self, latitude, longitude, result):
+        key = self.key(latitude, longitude)
+        self._remember(key, result, time.time() + self.ttl)
+        self._counters['stores'] += 1
+        if self._db_ok:
+            try:
+                GeocodeCacheEntry.objects.update_or_create(geohash=key, defaults={'result': result})
+            except DatabaseError as e:
+                self._db_failed(e)
+        return key
+
+    def stored(self):
+        """Number of cells in the durable tier, or None without one."""
+        if not self._db_ok:
+            return None
+        try:
+            return GeocodeCacheEntry.objects.count()
+        except DatabaseError as e:
+            self._db_failed(e)
+            return None
+
+    def clear_hot(self):
+        with self._lock:
+            self._hot.clear()
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._counters)
+            s['hot_entries'] = len(self._hot)
+        lookups = s['hot_hits'] + s['db_hits'] + s['misses']
+        s['hit_rate'] = round((s['hot_hits'] + s['db_hits']) / lookups, 4) if lookups else 0.0
+        s['precision'] = self.precision
+        s['hot_size'] = self.hot_size
+        s['ttl'] = self.ttl
+        s['persistent'] = self._db_ok
+        return s
@@ -0,0 +1,424 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+
+# ``fetch(client, lat, lon, timeout)`` returns one result dict, or None when
+# the provider has nothing precise enough for the coordinates; ``afetch`` is
+# the coroutine doing the same over an AsyncUpstreamClient
+Provider = namedtuple('Provider', 'name fetch timeout afetch', defaults=(None,))
+
+
+def http_provider(name, request, parse, timeout):
+    """A Provider that GETs ``request(lat, lon)``, a (url, headers) pair, and returns ``parse(json)``."""
+    def fetch(client, lat, lon, timeout):
+        url, headers = request(lat, lon)
+        res = client.get(url, headers=headers, timeout=timeout)
+        res.raise_for_status()
+        return parse(res.json())
+
+    async def afetch(client, lat, lon, timeout):
+        url, headers = request(lat, lon)
+        res = await client.get(url, headers=headers, timeout=timeout)
+        res.raise_for_status()
+        return parse(res.json())
+
+    return Provider(name, fetch, timeout, afetch)
+
+
+def nominatim_request(lat, lon):
+    """OpenStreetMap Nominatim with maximum zoom for neighbourhood-level precision."""
+    return (f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}&zoom=18&addressdetails=1&extratags=1",
+            {'User-Agent': 'WeatherApp/1.0 (High-Precision Location)'})
+
+
+def parse_nominatim(data):
+    if not data or 'address' not in data:
+        return None
+    address = data['address']
+    location_parts = []
+
+    print(f"📍 OSM Address components: {address}")
+
+    # Priority order for Indian locations: village/neighbourhood > suburb > city
+    primary_location = (address.get('village') or
+                        address.get('neighbourhood') or
+                        address.get('hamlet') or
+                        address.get('suburb') or
+                        address.get('city_district'))
+    if primary_location:
+        location_parts.append(primary_location)
+
+    # Add city if different from primary location
+    city = address.get('city') or address.get('town') or address.get('municipality')
+    if city and city != primary_location:
+        location_parts.append(city)
+
+    if address.get('state'):
+        location_parts.append(address.get('state'))
+
+    detailed_name = ', '.join(location_parts) if location_parts else data.get('display_name')
+    if not (detailed_name and primary_location):
+        return None
+    return {
+        'name': detailed_name,
+        'admin1': address.get('state'),
+        'country_code': address.get('country_code', '').upper(),
+        'precision': 'high',
+        'source': 'OpenStreetMap',
+        'detailed_info': {
+            'primary_location': primary_location,
+            'neighbourhood': address.get('neighbourhood'),
+            'village': address.get('village'),
+            'suburb': address.get('suburb'),
+            'city': city,
+            'state': address.get('state'),
+            'postcode': address.get('postcode'),
+            'road': address.get('road')
+        }
+    }
+
+
+def bigdatacloud_request(lat, lon):
+    """BigDataCloud with enhanced locality detection."""
+    return f"https://api.bigdatacloud.net/data/reverse-geocode-client?latitude={lat}&longitude={lon}&localityLanguage=en", None
+
+
+def parse_bigdatacloud(data):
+    print(f"📍 BigDataCloud response: {data}")
+
+    location_parts = []
+    primary_location = None
+
+    # Check for most specific location first
+    if data.get('locality'):
+        primary_location = data.get('locality')
+        location_parts.append(primary_location)
+
+    # Check administrative areas for neighborhoods
+    for area in data.get('localityInfo', {}).get('administrative', []):
+        area_name = area.get('name')
+        if area_name and area_name not in location_parts:
+            if not primary_location:
+                primary_location = area_name
+            location_parts.append(area_name)
+            break  # Take the most specific one
+
+    if data.get('city') and data.get('city') not in location_parts:
+        location_parts.append(data.get('city'))
+
+    if data.get('principalSubdivision') and data.get('principalSubdivision') not in location_parts:
+        location_parts.append(data.get('principalSubdivision'))
+
+    detailed_name = ', '.join(location_parts) if location_parts else None
+    if not (detailed_name and primary_location):
+        return None
+    return {
+        'name': detailed_name,
+        'admin1': data.get('principalSubdivision'),
+        'country_code': data.get('countryCode'),
+        'precision': 'high',
+        'source': 'BigDataCloud',
+        'detailed_info': {
+            'primary_location': primary_location,
+            'locality': data.get('locality'),
+            'city': data.get('city'),
+            'region': data.get('principalSubdivision'),
+            'country': data.get('countryName'),
+            'postcode': data.get('postcode')
+        }
+    }
+
+
+def locationiq_request(lat, lon, key=None):
+    """LocationIQ, good for local areas in India; needs an API key."""
+    return f"https://us1.locationiq.com/v1/reverse.php?key={key}&lat={lat}&lon={lon}&format=json&addressdetails=1&zoom=18", None
+
+
+def parse_locationiq(data):
+    if not data or 'address' not in data:
+        return None
+    address = data['address']
+    primary_location = (address.get('village') or
+                        address.get('neighbourhood') or
+                        address.get('suburb') or
+                        address.get('hamlet'))
+    if not primary_location:
+        return None
+    location_parts = [primary_location]
+    city = address.get('city') or address.get('town')
+    if city and city != primary_location:
+        location_parts.append(city)
+    if address.get('state'):
+        location_parts.append(address.get('state'))
+    return {
+        'name': ', '.join(location_parts),
+        'admin1': address.get('state'),
+        'country_code': address.get('country_code', '').upper(),
+        'precision': 'high',
+        'source': 'LocationIQ'
+    }
+
+
+def photon_request(lat, lon):
+    """Photon (OpenStreetMap-based) geocoding."""
+    return f"https://photon.komoot.io/reverse?lat={lat}&lon={lon}&lang=en", None
+
+
+def parse_photon(data):
+    if not data.get('features'):
+        return None
+    props = data['features'][0].get('properties', {})
+
+    location_parts = []
+    primary_location = props.get('name')
+    if primary_location:
+        location_parts.append(primary_location)
+    if props.get('city') and props.get('city') != primary_location:
+        location_parts.append(props.get('city'))
+    if props.get('state'):
+        location_parts.append(props.get('state'))
+    if not location_parts:
+        return None
+    return {
+        'name': ', '.join(location_parts),
+        'admin1': props.get('state'),
+        'country_code': props.get('country', '').upper(),
+        'precision': 'medium',
+        'source': 'Photon'
+    }
+
+
+# In order of preference
+PROVIDERS = (
+    http_provider('OpenStreetMap', nominatim_request, parse_nominatim, 12),
+    http_provider('BigDataCloud', bigdatacloud_request, parse_bigdatacloud, 12),
+    http_provider('Photon', photon_request, parse_photon, 8),
+)
+
+
+def default_providers(locationiq_key=None):
+    """PROVIDERS, with LocationIQ third when there is a key for it."""
+    if not locationiq_key:
+        return PROVIDERS
+    locationiq = http_provider('LocationIQ', partial(locationiq_request, key=locationiq_key), parse_locationiq, 10)
+    return PROVIDERS[:2] + (locationiq,) + PROVIDERS[2:]
+
+
+_PENDING = object()
+_FAILED = object()
+
+
+class GeocodeResolver:
+    """
+    Races reverse-geocoding providers under one deadline.
+
+    Provider ``i`` starts ``i * hedge_delay`` seconds after the first, or as
+    soon as every provider started before it has failed, so with a small
+    delay a fast preferred provider spares the others entirely, and with 0
+    they all start at once. The result is always the most preferred
+    provider that succeeded: a later provider's answer is held until every
+    provider ahead of it has failed. At ``deadline`` seconds the best answer
+    already in hand (or None) is returned and the rest are abandoned;
+    providers not yet started are cancelled and the calls in flight have
+    their timeouts capped at the deadline, so nothing outlives it for long.
+
+    With an UpstreamHealth tracker, every call is recorded under the
+    provider's name, the preference order becomes the tracker's latency
+    order, and a provider whose circuit breaker is open counts as failed
+    without being called.
+    """
+
+    def __init__(self, providers=PROVIDERS, deadline=8.0, hedge_delay=0.25, max_workers=16, health=None):
+        self.providers = tuple(providers)
+        self.deadline = float(deadline)
+        self.hedge_delay = float(hedge_delay)
+        self.max_workers = max_workers
+        self.health = health
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {'lookups': 0, 'resolved': 0, 'deadline_exceeded': 0, 'cancelled': 0, 'skipped': 0,
+                       'total_ms': 0.0}
+        self._wins = {p.name: 0 for p in self.providers}
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='geocode')
+        return self._executor
+
+    def _record(self, provider, ok, start):
+        # An empty answer is the provider working, just without a match
+        if self.health is not None:
+            self.health.record(provider.name, ok, (time.perf_counter() - start) * 1000.0)
+
+    def _call(self, provider, client, lat, lon, timeout):
+        start = time.perf_counter()
+        try:
+            result = provider.fetch(client, lat, lon, timeout)
+        except Exception as e:
+            print(f"❌ {provider.name} error: {e}")
+            self._record(provider, False, start)
+            return None
+        self._record(provider, True, start)
+        if result is not None:
+            print(f"🎯 {provider.name} Success: {result['name']}")
+        return result
+
+    async def _acall(self, provider, client, lat, lon, timeout):
+        start = time.perf_counter()
+        try:
+            result = await provider.afetch(client, lat, lon, timeout)
+        except Exception as e:
+            print(f"❌ {provider.name} error: {e}")
+            self._record(provider, False, start)
+            return None
+        self._record(provider, True, start)
+        if result is not None:
+            print(f"🎯 {provider.name} Success: {result['name']}")
+        return result
+
+    def resolve(self, client, lat, lon):
+        """The most preferred provider's result, or None if none succeeded in time."""
+        race = _Race(self)
+        executor = self._get_executor()
+
+        def launch(provider, timeout):
+            return executor.submit(self._call, provider, client, lat, lon, timeout)
+
+        while not race.decided():
+            race.hedge(launch)
+            pending = race.pending()
+            done, _ = wait(pending, timeout=race.wait_time(), return_when=FIRST_COMPLETED)
+            race.collect(done, lambda f: f.result())
+        return self._finish(race)
+
+    async def aresolve(self, client, lat, lon):
+        """``resolve`` for an AsyncUpstreamClient: the providers are tasks on the running event loop."""
+        race = _Race(self)
+
+        def launch(provider, timeout):
+            return asyncio.ensure_future(self._acall(provider, client, lat, lon, timeout))
+
+        while not race.decided():
+            race.hedge(launch)
+            pending = race.pending()
+            if pending:
+                done, _ = await asyncio.wait(pending, timeout=race.wait_time(), return_when=asyncio.FIRST_COMPLETED)
+            else:
+                done = ()
+                await asyncio.sleep(race.wait_time())
+            race.collect(done, lambda t: t.result())
+        return self._finish(race)
+
+    def _finish(self, race):
+        winner = race.winner
+        if winner is None:
+            # Deadline: settle for the best answer in hand
+            winner = next((i for i, o in enumerate(race.outcomes) if o not in (_PENDING, _FAILED)), None)
+        cancelled = 0
+        for i, f in enumerate(race.calls):
+            if race.outcomes[i] is _PENDING:
+                f.cancel()
+                cancelled += 1
+        elapsed_ms = (time.monotonic() - race.start) * 1000.0
+        with self._lock:
+            self._stats['lookups'] += 1
+            self._stats['total_ms'] += elapsed_ms
+            self._stats['cancelled'] += cancelled
+            self._stats['skipped'] += race.skipped
+            if time.monotonic() >= race.end and any(o is _PENDING for o in race.outcomes):
+                self._stats['deadline_exceeded'] += 1
+            if winner is not None:
+                self._stats['resolved'] += 1
+                self._wins[race.providers[winner].name] += 1
+        return race.outcomes[winner] if winner is not None else None
+
+    def order(self):
+        """Providers in the order the next lookup will try them."""
+        if self.health is None:
+            return self.providers
+        by_name = {p.name: p for p in self.providers}
+        return tuple(by_name[name] for name in self.health.order([p.name for p in self.providers]))
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['wins'] = dict(self._wins)
+        s['avg_ms'] = round(s.pop('total_ms') / s['lookups'], 2) if s['lookups'] else 0.0
+        s['deadline'] = self.deadline
+        s['hedge_delay'] = self.hedge_delay
+        s['providers'] = [p.name for p in self.order()]
+        return s
+
+
+class _Race:
+    """The state of one GeocodeResolver lookup, shared by its sync and async loops."""
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+        self.start = time.monotonic()
+        self.end = self.start + resolver.deadline
+        self.providers = resolver.order()
+        self.outcomes = [_PENDING] * len(self.providers)
+        self.calls = []  # future or task per started provider, None if skipped
+        self.skipped = 0
+        self.winner = None
+        self.succeeded = False
+
+    def _launch(self, launch):
+        i = len(self.calls)
+        provider = self.providers[i]
+        health = self.resolver.health
+        if health is not None and not health.allow(provider.name):
+            self.outcomes[i] = _FAILED
+            self.calls.append(None)
+            self.skipped += 1
+            return
+        timeout = max(min(provider.timeout, self.end - time.monotonic()), 0.01)
+        self.calls.append(launch(provider, timeout))
+
+    def decided(self):
+        """True once some provider succeeded and every one ahead of it failed, all failed, or time is up."""
+        if not self.calls:
+            return False
+        for i, outcome in enumerate(self.outcomes):
+            if outcome is _PENDING:
+                break
+            if outcome is not _FAILED:
+                self.winner = i
+                return True
+        self.succeeded = any(o not in (_PENDING, _FAILED) for o in self.outcomes)
+        return all(o is _FAILED for o in self.outcomes) or time.monotonic() >= self.end
+
+    def hedge(self, launch):
+        """Start the next providers whose delay is up, or all whose predecessors failed."""
+        if not self.calls:
+            self._launch(launch)
+        now = time.monotonic()
+        while not self.succeeded and len(self.calls) < len(self.providers) and (
+                now >= self.start + len(self.calls) * self.resolver.hedge_delay
+                or all(o is _FAILED for o in self.outcomes[:len(self.calls)])):
+            self._launch(launch)
+
+    def pending(self):
+        return [f for i, f in enumerate(self.calls) if self.outcomes[i] is _PENDING]
+
+    def wait_time(self):
+        """Seconds until the deadline or the next hedge, whichever is first."""
+        wake = self.end
+        if not self.succeeded and len(self.calls) < len(self.providers):
+            wake = min(wake, self.start + len(self.calls) * self.resolver.hedge_delay)
+        return max(wake - time.monotonic(), 0)
+
+    def collect(self, done, result):
+        for i, f in enumerate(self.calls):
+            if f is not None and f in done:
+                self.outcomes[i] = result(f) or _FAILED
@@ -0,0 +1,240 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class GridCache:
+    """
+    Upstream payloads cached per lat/lon grid cell, with stale-while-revalidate.
+
+    Coordinates are snapped to cells of ``resolution`` degrees, and callers
+    fetch for the cell centre so every request in a cell shares one entry.
+    An entry is fresh for ``ttl`` seconds. For ``stale_ttl`` seconds after
+    that it is still served at once while a single background refresh
+    replaces it; past that it is fetched synchronously. Entries are evicted
+    least recently used first to keep their total size under ``max_bytes``.
+    """
+
+    def __init__(self, resolution=0.1, ttl=600.0, stale_ttl=3600.0, max_bytes=32 << 20, refresh_workers=2):
+        self.resolution = float(resolution)
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self.max_bytes = int(max_bytes)
+        self.refresh_workers = refresh_workers
+        self._entries = OrderedDict()  # key -> (fetched_at, nbytes, value, fetched wall-clock time)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = None
+        self._tasks = set()  # async refreshes, referenced until they finish
+        self._counters = {'hits': 0, 'stale': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0, 'evictions': 0}
+
+    def cell(self, lat, lon):
+        """(key, (lat, lon) of the cell centre)."""
+        i, j = round(float(lat) / self.resolution), round(float(lon) / self.resolution)
+        return (i, j), (round(i * self.resolution, 4), round(j * self.resolution, 4))
+
+    def _store(self, key, value, nbytes):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.monotonic(), nbytes, value, time.time())
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, size, _, _) = self._entries.popitem(last=False)
+                self._bytes -= size
+                self._counters['evictions'] += 1
+
+    def _refresh(self, key, fetch):
+        try:
+            value, nbytes = fetch()
+            self._store(key, value, nbytes)
+            self._counters['refreshes'] += 1
+        except Exception as e:
+            # Keep serving the stale entry; the next stale read retries
+            self._counters['refresh_errors'] += 1
+            print(f"⚠ Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers, thread_name_prefix='grid-cache')
+        return self._executor
+
+    def _lookup(self, key):
+        """(value, 'HIT' or 'STALE', whether to start a refresh), or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return entry[2], 'HIT', False
+                if age <= self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._counters['stale'] += 1
+                    start_refresh = key not in self._refreshing
+                    if start_refresh:
+                        self._refreshing.add(key)
+                    return entry[2], 'STALE', start_refresh
+            self._counters['misses'] += 1
+        return None
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return ``(value, state)`` with state 'HIT', 'STALE' or 'MISS'.
+        ``fetch()`` returns ``(value, nbytes)``; on a miss its exceptions
+        propagate and nothing is cached.
+        """
+        found = self._lookup(key)
+        if found is not None:
+            value, state, start_refresh = found
+            if start_refresh:
+                self._get_executor().submit(self._refresh, key, fetch)
+            return value, state
+        value, nbytes = fetch()
+        self._store(key, value, nbytes)
+        return value, 'MISS'
+
+    async def aget_or_fetch(self, key, afetch):
+        """``get_or_fetch`` with a coroutine function; stale entries are refreshed in a task."""
+        found = self._lookup(key)
+        if found is not None:
+            value, state, start_refresh = found
+            if start_refresh:
+                task = asyncio.ensure_future(self._arefresh(key, afetch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return value, state
+        value, nbytes = await afetch()
+        self._store(key, value, nbytes)
+        return value, 'MISS'
+
+    async def _arefresh(self, key, afetch):
+        try:
+            value, nbytes = await afetch()
+            self._store(key, value, nbytes)
+            self._counters['refreshes'] += 1
+        except Exception as e:
+            self._counters['refresh_errors'] += 1
+            print(f"⚠ Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_many_or_fetch(self, keys, fetch_many):
+        """
+        ``({key: (value, state)}, error)`` for many keys at once. Every miss
+        is fetched by one ``fetch_many(miss_keys)`` call returning ``{key:
+        (value, nbytes)}``, and the stale keys are refreshed together by one
+        background call. If the fetch fails, the missed keys are left out
+        and its exception is returned as ``error``.
+        """
+        found, misses, stale = self._lookup_many(keys)
+        if stale:
+            self._get_executor().submit(self._refresh_many, stale, fetch_many)
+        error = None
+        if misses:
+            try:
+                fetched = fetch_many(misses)
+            except Exception as e:
+                fetched, error = {}, e
+            found.update(self._store_many(fetched))
+        return found, error
+
+    async def aget_many_or_fetch(self, keys, afetch_many):
+        """``get_many_or_fetch`` with a coroutine function; the stale refresh runs in a task."""
+        found, misses, stale = self._lookup_many(keys)
+        if stale:
+            task = asyncio.ensure_future(self._arefresh_many(stale, afetch_many))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        error = None
+        if misses:
+            try:
+                fetched = await afetch_many(misses)
+            except Exception as e:
+                fetched, error = {}, e
+            found.update(self._store_many(fetched))
+        return found, error
+
+    def _lookup_many(self, keys):
+        found, misses, stale = {}, [], []
+        for key in dict.fromkeys(keys):
+            hit = self._lookup(key)
+            if hit is None:
+                misses.append(key)
+                continue
+            value, state, start_refresh = hit
+            found[key] = (value, state)
+            if start_refresh:
+                stale.append(key)
+        return found, misses, stale
+
+    def _store_many(self, fetched):
+        for key, (value, nbytes) in fetched.items():
+            self._store(key, value, nbytes)
+        return {key: (value, 'MISS') for key, (value, _) in fetched.items()}
+
+    def _refresh_many(self, keys, fetch_many):
+        try:
+            self._store_many(fetch_many(keys))
+            self._counters['refreshes'] += len(keys)
+        except Exception as e:
+            self._counters['refresh_errors'] += len(keys)
+            print(f"⚠ Background refresh of {len(keys)} cells failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    async def _arefresh_many(self, keys, afetch_many):
+        try:
+            self._store_many(await afetch_many(keys))
+            self._counters['refreshes'] += len(keys)
+        except Exception as e:
+            self._counters['refresh_errors'] += len(keys)
+            print(f"⚠ Background refresh of {len(keys)} cells failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def last_modified(self, key, value):
+        """
+        Wall-clock time ``value`` was fetched for ``key``, or None once the
+        entry is gone or a refresh has replaced it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[3] if entry is not None and entry[2] is value else None
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._executor = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._counters)
+            s['entries'] = len(self._entries)
+            s['bytes'] = self._bytes
+        lookups = s['hits'] + s['stale'] + s['misses']
+        s['hit_rate'] = round((s['hits'] + s['stale']) / lookups, 4) if lookups else 0.0
+        s['max_bytes'] = self.max_bytes
+        s['resolution'] = self.resolution
+        s['ttl'] = self.ttl
+        s['stale_ttl'] = self.stale_ttl
+        return s
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+
+class _Upstream:
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.trips = 0
+        self.state = 'closed'
+        self.retry_at = 0.0
+
+
+class UpstreamHealth:
+    """
+    Success rate, latency percentiles and a circuit breaker per upstream.
+
+    ``failure_threshold`` failures in a row open an upstream's breaker:
+    ``allow()`` then refuses it for ``cooldown`` seconds, after which one
+    trial call is let through (half open). The trial's success closes the
+    breaker, its failure opens it for another cooldown; a trial that never
+    reports back is retried after a cooldown too. Latency percentiles cover
+    the last ``window`` calls, failures included, and ``order()`` sorts
+    upstreams by their median once each has ``min_samples`` of them.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0, window=100, min_samples=5):
+        self.failure_threshold = int(failure_threshold)
+        self.cooldown = float(cooldown)
+        self.window = int(window)
+        self.min_samples = int(min_samples)
+        self._lock = threading.Lock()
+        self._upstreams = {}
+
+    def _get(self, name):
+        upstream = self._upstreams.get(name)
+        if upstream is None:
+            upstream = self._upstreams[name] = _Upstream(self.window)
+        return upstream
+
+    def allow(self, name):
+        """Whether ``name`` may be called now; a True for a half-open breaker is its trial call."""
+        now = time.monotonic()
+        with self._lock:
+            upstream = self._get(name)
+            if upstream.state == 'closed':
+                return True
+            if now >= upstream.retry_at:
+                upstream.state = 'half_open'
+                upstream.retry_at = now + self.cooldown
+                return True
+            upstream.rejected += 1
+            return False
+
+    def record(self, name, ok, elapsed_ms):
+        with self._lock:
+            upstream = self._get(name)
+            upstream.calls += 1
+            upstream.latencies.append(elapsed_ms)
+            if ok:
+                upstream.consecutive_failures = 0
+                if upstream.state != 'closed':
+                    print(f"✓ {name} recovered, closing its circuit breaker")
+                upstream.state = 'closed'
+                return
+            upstream.failures += 1
+            upstream.consecutive_failures += 1
+            if upstream.state == 'half_open' or (
+                    upstream.state == 'closed' and upstream.consecutive_failures >= self.failure_threshold):
+                if upstream.state == 'closed':
+                    upstream.trips += 1
+                    print(f"⚠ {name} failed {upstream.consecutive_failures} times in a row, "
+                          f"skipping it for {self.cooldown:.0f}s")
+                upstream.state = 'open'
+                upstream.retry_at = time.monotonic() + self.cooldown
+
+    @contextmanager
+    def track(self, name):
+        """Time the block as one call to ``name``; raises CircuitOpen without running it if refused."""
+        if not self.allow(name):
+            raise CircuitOpen(f"{name} circuit breaker is open")
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.record(name, ok, (time.perf_counter() - start) * 1000.0)
+
+    def _median(self, upstream):
+        if len(upstream.latencies) < self.min_samples:
+            return 0.0
+        return float(np.median(upstream.latencies))
+
+    def order(self, names):
+        """``names`` fastest first with open breakers last; ties (and upstreams still sampling) keep their order."""
+        with self._lock:
+            keys = {}
+            for i, name in enumerate(names):
+                upstream = self._get(name)
+                keys[name] = (upstream.state == 'open', self._median(upstream), i)
+        return sorted(names, key=keys.__getitem__)
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+
+    def stats(self):
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for name, upstream in self._upstreams.items():
+                latencies = np.array(upstream.latencies, dtype=np.float64)
+                p50, p95 = np.percentile(latencies, [50, 95]) if len(latencies) else (0.0, 0.0)
+                out[name] = {
+                    'state': upstream.state,
+                    'calls': upstream.calls,
+                    'failures': upstream.failures,
+                    'success_rate': round(1 - upstream.failures / upstream.calls, 4) if upstream.calls else None,
+                    'consecutive_failures': upstream.consecutive_failures,
+                    'rejected': upstream.rejected,
+                    'trips': upstream.trips,
+                    'p50_ms': round(float(p50), 2),
+                    'p95_ms': round(float(p95), 2),
+                    'retry_in': round(max(upstream.retry_at - now, 0.0), 1) if upstream.state != 'closed' else None,
+                }
+        return {
+            'failure_threshold': self.failure_threshold,
+            'cooldown': self.cooldown,
+            'window': self.window,
+            'upstreams': out,
+        }
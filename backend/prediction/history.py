@@ -0,0 +1,246 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from concurrent processes are not serialized
+    fcntl = None
+
+import numpy as np
+
+from .features import FEATURE_NAMES
+
+
+def location_key(latitude, longitude, decimals=2):
+    """Grid-cell key for a coordinate; 2 decimals is roughly 1 km."""
+    return f"{round(float(latitude), decimals):.{decimals}f},{round(float(longitude), decimals):.{decimals}f}"
+
+
+@contextmanager
+def _file_lock(path):
+    """Exclusive lock across processes, held while reading and replacing a shared file."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RingBuffer:
+    """
+    Fixed-size history of feature rows for one location.
+
+    Every row is written twice, at ``i`` and ``i + size`` of a ``2 * size``
+    array, so the latest ``n`` rows are always one contiguous slice and
+    ``window()`` returns a view instead of reassembling the ring.
+    """
+
+    def __init__(self, size, n_features=len(FEATURE_NAMES)):
+        self.size = size
+        self.data = np.zeros((2 * size, n_features), dtype=np.float32)
+        self.next = 0
+        self.count = 0
+        self.last_step = -1
+
+    def append(self, row, step):
+        """
+        Add a reading; a second reading within the same step replaces the
+        first. After a gap of missed steps the older readings are dropped,
+        since a window must hold consecutive steps.
+        """
+        if self.count and step - self.last_step > 1:
+            self.next = 0
+            self.count = 0
+        if self.count and step == self.last_step:
+            i = (self.next - 1) % self.size
+        else:
+            i = self.next
+            self.next = (self.next + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+        self.data[i] = row
+        self.data[i + self.size] = row
+        self.last_step = step
+
+    def window(self, n):
+        """The latest ``n`` rows, oldest first, as a view (``n <= count``)."""
+        end = self.next + self.size
+        return self.data[end - n:end]
+
+
+class LocationHistory:
+    """
+    Rolling per-location readings that feed real windows to the LSTM.
+
+    Readings are bucketed into ``step_seconds`` steps, one day by default
+    like the training rows (one per date in weather_data.csv); at most
+    ``max_locations`` locations are kept, least recently updated first out.
+    ``save``/``load`` persist everything to one .npz file shared by all
+    workers, and ``start_autosave`` writes it every ``save_interval`` seconds
+    while there are unsaved readings.
+    """
+
+    def __init__(self, size=3, step_seconds=86400, max_locations=1024, path=None, save_interval=60, clock=time.time):
+        self.size = size
+        self.step_seconds = step_seconds
+        self.clock = clock
+        self.max_locations = max_locations
+        self.path = path
+        self.save_interval = save_interval
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saver = None
+        self._stats = {'readings': 0, 'evictions': 0, 'saves': 0, 'last_saved': None}
+
+    def record(self, key, row, timestamp=None):
+        step = int((self.clock() if timestamp is None else timestamp) // self.step_seconds)
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None:
+                buf = self._buffers[key] = RingBuffer(self.size)
+                while len(self._buffers) > self.max_locations:
+                    self._buffers.popitem(last=False)
+                    self._stats['evictions'] += 1
+            else:
+                self._buffers.move_to_end(key)
+            buf.append(row, step)
+            self._stats['readings'] += 1
+            self._dirty = True
+        self.start_autosave()
+
+    def window(self, key, n):
+        """
+        ``(window, readings)``: a copy of the latest ``n`` rows for ``key``,
+        taken under the lock, and how many of them are real. A partial
+        history is front-filled with its oldest reading. Returns
+        ``(None, 0)`` for an unknown location.
+        """
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None or buf.count == 0:
+                return None, 0
+            if buf.count >= n:
+                # A copy: the ring keeps being written after the lock is released
+                return buf.window(n).copy(), n
+            rows = buf.window(buf.count)
+            return np.concatenate([np.repeat(rows[:1], n - buf.count, axis=0), rows]), buf.count
+
+    def _read(self, path):
+        """
+        ``{key: (rows, next, count, last_step)}`` from a saved file, oldest
+        first, or None if it was written with another window size or step.
+        """
+        with np.load(path, allow_pickle=False) as f:
+            meta = json.loads(str(f['meta']))
+            if meta != {'size': self.size, 'step_seconds': self.step_seconds}:
+                print(f"⚠ Ignoring location history saved with {meta}")
+                return None
+            keys = json.loads(str(f['keys']))
+            data, state = f['data'], f['state']
+        return {key: (rows, *map(int, st)) for key, rows, st in zip(keys, data, state)}
+
+    def save(self, path=None):
+        """
+        Write the history to ``path``, merged with what other workers saved
+        there: per location the most recently updated buffer wins.
+        """
+        path = path or self.path
+        if path is None:
+            return False
+        with self._lock:
+            readings = self._stats['readings']
+            ours = {k: (b.data.copy(), b.next, b.count, b.last_step) for k, b in self._buffers.items()}
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        with _file_lock(path + '.lock'):
+            merged = {}
+            if os.path.exists(path):
+                try:
+                    merged = self._read(path) or {}
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠ Replacing unreadable location history: {e}")
+            for key, entry in ours.items():
+                if key not in merged or entry[3] >= merged[key][3]:
+                    merged[key] = entry
+            keys = sorted(merged, key=lambda k: merged[k][3])[-self.max_locations:]
+            data = (np.stack([merged[k][0] for k in keys]) if keys
+                    else np.zeros((0, 2 * self.size, len(FEATURE_NAMES)), np.float32))
+            state = np.array([merged[k][1:] for k in keys], dtype=np.int64).reshape(-1, 3)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, keys=np.array(json.dumps(keys)), data=data, state=state,
+                             meta=np.array(json.dumps({'size': self.size, 'step_seconds': self.step_seconds})))
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        with self._lock:
+            # Readings recorded while writing still need the next save
+            self._dirty = self._stats['readings'] != readings
+            self._stats['saves'] += 1
+            self._stats['last_saved'] = time.time()
+        return True
+
+    def load(self, path=None):
+        """Restore a saved history; a file written with another window size or step is ignored."""
+        path = path or self.path
+        if path is None or not os.path.exists(path):
+            return 0
+        try:
+            saved = self._read(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠ Could not load location history: {e}")
+            return 0
+        if saved is None:
+            return 0
+        with self._lock:
+            for key, (rows, nxt, count, last_step) in list(saved.items())[-self.max_locations:]:
+                buf = RingBuffer(self.size)
+                buf.data[:] = rows
+                buf.next, buf.count, buf.last_step = nxt, count, last_step
+                self._buffers[key] = buf
+        print(f"✓ Location history loaded ({len(saved)} locations)")
+        return len(saved)
+
+    def _autosave(self):
+        while True:
+            time.sleep(self.save_interval)
+            if self._dirty:
+                try:
+                    self.save()
+                except OSError as e:
+                    print(f"⚠ Could not save location history: {e}")
+
+    def start_autosave(self):
+        if self.path is None or self.save_interval <= 0:
+            return
+        if self._saver is not None and self._saver.is_alive():
+            return
+        with self._lock:
+            if self._saver is None or not self._saver.is_alive():
+                self._saver = threading.Thread(target=self._autosave, name='location-history', daemon=True)
+                self._saver.start()
+
+    def reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._saver = None
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['locations'] = len(self._buffers)
+            s['unsaved'] = self._dirty
+        s['window'] = self.size
+        s['step_seconds'] = self.step_seconds
+        return s
@@ -0,0 +1,48 @@
+import importlib
+import sys
+
+# Dependencies that only some code paths need; importing the API must not pull
+# them in (checked by the bench_imports command). requests is deferred too but
+# not listed: rest_framework.compat imports it whenever it is installed.
+LAZY_MODULES = ('pandas', 'tensorflow', 'keras', 'sklearn', 'joblib', 'h5py', 'httpx')
+
+
+class LazyModule:
+    """
+    Module stand-in that does the real import on first attribute access.
+
+        requests = lazy_import('requests')
+        requests.get(url)  # 'requests' is imported here
+
+    Attribute writes go to the real module, so ``mock.patch`` on either the
+    module or this proxy behaves the same.
+    """
+
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_module', None)
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            object.__setattr__(self, '_module', module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'imported' if self._module is not None else 'not imported yet'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Return the module if it is already imported, else a LazyModule for it."""
+    return sys.modules.get(name) or LazyModule(name)
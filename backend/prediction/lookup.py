@@ -0,0 +1,121 @@
+import json
+
+import numpy as np
+
+from .features import FEATURE_NAMES
+
+# Written to ml_models/ by the build_condition_grid command
+CONDITION_GRID_FILE = 'condition_grid.npz'
+
+
+class DecisionGrid:
+    """
+    A classifier's labels precomputed over a regular grid of the four features.
+
+    Axis ``j`` has points ``lows[j] + k * steps[j]`` for ``k < shape[j]``, and
+    ``labels`` holds the index into ``classes`` predicted at every grid point
+    as uint8. ``predict`` snaps each row to its nearest grid point and reads
+    the label with one flat index; rows outside the grid go to the full
+    model.
+    """
+
+    def __init__(self, lows, steps, labels, classes, source_sha1=None, report=None):
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.steps = np.asarray(steps, dtype=np.float64)
+        self.labels = labels
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.source_sha1 = source_sha1
+        self.report = report or {}
+        self.shape = np.array(labels.shape, dtype=np.intp)
+        self._flat = labels.reshape(-1)
+        self._strides = np.array([int(np.prod(labels.shape[j + 1:])) for j in range(labels.ndim)], dtype=np.intp)
+        self._stats = {'lookups': 0, 'fallbacks': 0}
+
+    @classmethod
+    def build(cls, model, spec, chunk_rows=1 << 18, source_sha1=None):
+        """
+        Evaluate ``model`` at every point of ``spec`` ({feature: (low, high,
+        step)}, both ends inclusive).
+        """
+        classes = list(model.classes_)
+        if len(classes) > 256:
+            raise ValueError("A uint8 grid holds at most 256 classes")
+        lows, steps, axes = [], [], []
+        for name in FEATURE_NAMES:
+            low, high, step = (float(v) for v in spec[name])
+            n = int(np.floor((high - low) / step + 1e-9)) + 1
+            lows.append(low)
+            steps.append(step)
+            axes.append(low + step * np.arange(n))
+        shape = tuple(len(a) for a in axes)
+        labels = np.empty(int(np.prod(shape)), dtype=np.uint8)
+        for start in range(0, len(labels), chunk_rows):
+            flat = np.arange(start, min(start + chunk_rows, len(labels)))
+            coords = np.unravel_index(flat, shape)
+            X = np.column_stack([axes[j][coords[j]] for j in range(len(axes))]).astype(np.float32)
+            # predict() is classes_[argmax(predict_proba)] for sklearn forests
+            labels[flat] = np.argmax(model.predict_proba(X), axis=1)
+        return cls(lows, steps, labels.reshape(shape), classes, source_sha1=source_sha1)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f, labels=self.labels, lows=self.lows, steps=self.steps,
+                meta=np.array(json.dumps({
+                    'classes': [str(c) for c in self.classes_],
+                    'source_sha1': self.source_sha1,
+                    'report': self.report,
+                }))
+            )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            meta = json.loads(str(f['meta']))
+            return cls(f['lows'], f['steps'], f['labels'], meta['classes'],
+                       source_sha1=meta.get('source_sha1'), report=meta.get('report'))
+
+    @property
+    def nbytes(self):
+        return self.labels.nbytes
+
+    def lookup(self, X):
+        """``(label indexes, inside)``; indexes of rows outside the grid are 0."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None]
+        idx = np.rint((X - self.lows) / self.steps).astype(np.intp)
+        inside = np.all((idx >= 0) & (idx < self.shape), axis=1)
+        flat = np.where(inside, idx @ self._strides, 0)
+        return self._flat[flat], inside
+
+    def predict(self, X, fallback=None):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None]
+        codes, inside = self.lookup(X)
+        out = self.classes_[codes]
+        self._stats['lookups'] += len(X)
+        if not inside.all():
+            if fallback is None:
+                raise ValueError("Input outside the decision grid and no fallback model")
+            outside = ~inside
+            out[outside] = fallback.predict(X[outside])
+            self._stats['fallbacks'] += int(outside.sum())
+        return out
+
+    def agreement(self, model, X):
+        """Fraction of rows of ``X`` inside the grid where the grid matches ``model``."""
+        X = np.asarray(X, dtype=np.float32)
+        codes, inside = self.lookup(X)
+        if not inside.any():
+            return None
+        exact = np.asarray(model.predict(X[inside]), dtype=object)
+        return float(np.mean(self.classes_[codes[inside]] == exact))
+
+    def stats(self):
+        s = dict(self._stats)
+        s['shape'] = [int(n) for n in self.shape]
+        s['bytes'] = int(self.nbytes)
+        s['report'] = self.report
+        return s
@@ -0,0 +1,144 @@
+import json
+
+import numpy as np
+
+_ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+    'hard_sigmoid': lambda x: np.clip(0.2 * x + 0.5, 0.0, 1.0),
+}
+
+
+def _activation(name):
+    try:
+        return _ACTIVATIONS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported activation '{name}'")
+
+
+class NumpyLSTM:
+    """
+    NumPy-only inference for the stacked LSTM + Dense head in lstm_model.h5.
+
+    Each LSTM layer is a dict with Keras-layout ``kernel`` (in, 4u),
+    ``recurrent_kernel`` (u, 4u) and ``bias`` (4u) in i, f, c, o gate order.
+    ``predict`` takes a ``(batch, steps, features)`` array and runs every
+    sequence in the batch through one set of matrix products per time step.
+    """
+
+    def __init__(self, layers, dense_kernel, dense_bias, scaler_folded=False):
+        self.layers = layers
+        self.dense_kernel = dense_kernel
+        self.dense_bias = dense_bias
+        self.scaler_folded = scaler_folded
+
+    @classmethod
+    def from_h5(cls, path):
+        """Read weights and activations from a Keras 2 HDF5 model file."""
+        import h5py
+
+        with h5py.File(path, 'r') as f:
+            config = json.loads(f.attrs['model_config'])
+            weights = f['model_weights']
+            layers, dense = [], None
+            for layer in config['config']['layers']:
+                kind, cfg = layer['class_name'], layer['config']
+                if kind not in ('LSTM', 'Dense'):
+                    continue
+                group = weights[cfg['name']]
+                names = [n.decode() if isinstance(n, bytes) else n for n in group.attrs['weight_names']]
+                arrays = [np.asarray(group[n], dtype=np.float32) for n in names]
+                if kind == 'LSTM':
+                    if cfg.get('go_backwards') or cfg.get('stateful'):
+                        raise ValueError(f"Unsupported LSTM options in layer '{cfg['name']}'")
+                    layers.append({
+                        'kernel': arrays[0],
+                        'recurrent_kernel': arrays[1],
+                        'bias': arrays[2] if len(arrays) > 2 else np.zeros(arrays[0].shape[1], np.float32),
+                        'activation': cfg.get('activation', 'tanh'),
+                        'recurrent_activation': cfg.get('recurrent_activation', 'sigmoid'),
+                        'return_sequences': bool(cfg.get('return_sequences')),
+                    })
+                else:
+                    if cfg.get('activation', 'linear') != 'linear':
+                        raise ValueError("Only a linear Dense head is supported")
+                    dense = arrays
+        if not layers or dense is None:
+            raise ValueError(f"{path} does not contain an LSTM stack with a Dense head")
+        return cls(layers, dense[0], dense[1])
+
+    @classmethod
+    def from_npz(cls, path):
+        """Load weights previously written by ``save_npz``."""
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            layers = []
+            for i, layer_meta in enumerate(meta['layers']):
+                layer = dict(layer_meta)
+                for key in ('kernel', 'recurrent_kernel', 'bias'):
+                    layer[key] = data[f'lstm{i}_{key}']
+                layers.append(layer)
+            return cls(layers, data['dense_kernel'], data['dense_bias'], meta.get('scaler_folded', False))
+
+    def save_npz(self, path):
+        arrays = {'dense_kernel': self.dense_kernel, 'dense_bias': self.dense_bias}
+        meta = {'scaler_folded': self.scaler_folded, 'layers': []}
+        for i, layer in enumerate(self.layers):
+            for key in ('kernel', 'recurrent_kernel', 'bias'):
+                arrays[f'lstm{i}_{key}'] = layer[key]
+            meta['layers'].append({k: v for k, v in layer.items() if not isinstance(v, np.ndarray)})
+        np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+    def fold_scaler(self, scaler, target_index=0):
+        """
+        Return a copy that accepts raw features and returns the target in
+        original units.
+
+        MinMaxScaler computes ``x * scale_ + min_``, so the input transform is
+        absorbed into the first kernel and bias, and the inverse transform of
+        column ``target_index`` into the Dense head.
+        """
+        if self.scaler_folded:
+            raise ValueError("Scaler is already folded into this model")
+        scale = np.asarray(scaler.scale_, dtype=np.float64)
+        offset = np.asarray(scaler.min_, dtype=np.float64)
+
+        first = dict(self.layers[0])
+        kernel = first['kernel'].astype(np.float64)
+        first['kernel'] = (scale[:, None] * kernel).astype(np.float32)
+        first['bias'] = (first['bias'] + offset @ kernel).astype(np.float32)
+
+        t_scale, t_offset = scale[target_index], offset[target_index]
+        dense_kernel = (self.dense_kernel / t_scale).astype(np.float32)
+        dense_bias = ((self.dense_bias - t_offset) / t_scale).astype(np.float32)
+        return NumpyLSTM([first] + self.layers[1:], dense_kernel, dense_bias, scaler_folded=True)
+
+    def predict(self, X):
+        """Forward pass for a ``(batch, steps, features)`` array."""
+        seq = np.asarray(X, dtype=np.float32)
+        if seq.ndim == 2:
+            seq = seq[None]
+        batch, steps, _ = seq.shape
+        for layer in self.layers:
+            act = _activation(layer['activation'])
+            rec_act = _activation(layer['recurrent_activation'])
+            units = layer['recurrent_kernel'].shape[0]
+            # Input projections for every time step in one matmul
+            xz = seq @ layer['kernel'] + layer['bias']
+            h = np.zeros((batch, units), dtype=np.float32)
+            c = np.zeros((batch, units), dtype=np.float32)
+            outputs = []
+            for t in range(steps):
+                z = xz[:, t] + h @ layer['recurrent_kernel']
+                i = rec_act(z[:, :units])
+                f = rec_act(z[:, units:2 * units])
+                g = act(z[:, 2 * units:3 * units])
+                o = rec_act(z[:, 3 * units:])
+                c = f * c + i * g
+                h = o * act(c)
+                if layer['return_sequences']:
+                    outputs.append(h)
+            seq = np.stack(outputs, axis=1) if layer['return_sequences'] else h
+        return seq @ self.dense_kernel + self.dense_bias
@@ -0,0 +1,79 @@
+import os
+import pickle
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from prediction.forest import compile_forest
+
+FOREST_FILES = ('rf_model_temp.pkl', 'rf_model_rain.pkl', 'model_classifier.pkl')
+
+# Batch sizes probed for the flat/sklearn crossover
+CROSSOVER_ROWS = (1, 16, 64, 128, 256, 512, 1024, 4096)
+
+
+def _best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def crossover(model, flat, batch, repeat):
+    """Smallest probed batch size from which sklearn is faster than the flat forest, or None."""
+    for rows in CROSSOVER_ROWS:
+        if rows > len(batch):
+            break
+        X = batch[:rows]
+        n = max(3, repeat // max(1, rows // 16))
+        if _best_of(lambda: model.predict(X), n) < _best_of(lambda: flat.predict(X), n):
+            return rows
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Compare flattened forest evaluation against sklearn for single-row and large-batch latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
+        rng = np.random.default_rng(0)
+        batch = rng.uniform([0, 30, 0, 0], [40, 100, 20, 40], size=(options['rows'], 4)).astype(np.float32)
+        single = batch[:1]
+        repeat = options['repeat']
+
+        self.stdout.write(f"{'model':<22}{'sklearn 1 row':>15}{'flat 1 row':>13}"
+                          f"{'sklearn ' + str(len(batch)):>16}{'flat ' + str(len(batch)):>13}  agree  sklearn faster from")
+        for filename in FOREST_FILES:
+            path = os.path.join(model_dir, filename)
+            if not os.path.exists(path):
+                self.stdout.write(f"⚠ {filename} missing")
+                continue
+            with open(path, 'rb') as f:
+                model = pickle.load(f)
+            # Always flat here, whatever FOREST_SKLEARN_MIN_ROWS says
+            flat = compile_forest(model)
+
+            agree = np.mean(np.asarray(model.predict(batch)) == flat.predict(batch)) \
+                if flat.classes_ is not None else \
+                float(np.allclose(model.predict(batch), flat.predict(batch), rtol=1e-5, atol=1e-5))
+            timings = [
+                _best_of(lambda: model.predict(single), repeat),
+                _best_of(lambda: flat.predict(single), repeat),
+                _best_of(lambda: model.predict(batch), max(3, repeat // 50)),
+                _best_of(lambda: flat.predict(batch), max(3, repeat // 50)),
+            ]
+            self.stdout.write(
+                f"{filename:<22}{timings[0] * 1e6:>13.0f}us{timings[1] * 1e6:>11.0f}us"
+                f"{timings[2] * 1e3:>14.2f}ms{timings[3] * 1e3:>11.2f}ms  {agree:.4f}"
+                f"  {crossover(model, flat, batch, repeat) or 'never'}"
+            )
+        self.stdout.write(f"FOREST_SKLEARN_MIN_ROWS is {settings.FOREST_SKLEARN_MIN_ROWS}; "
+                          f"set it to the crossover above (0 keeps every batch flat)")
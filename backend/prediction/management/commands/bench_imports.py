@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from prediction.lazy import LAZY_MODULES
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from ``python -X importtime`` output."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # column header
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(parts[0]), int(parts[1]), depth))
+    return entries
+
+
+def subtree(entries, module):
+    """The entries imported on behalf of ``module`` (children print before parents)."""
+    for i, (name, _, _, depth) in enumerate(entries):
+        if name == module:
+            start = i
+            while start > 0 and entries[start - 1][3] > depth:
+                start -= 1
+            return entries[start:i + 1]
+    return []
+
+
+def measure(module):
+    code = f"import django; django.setup(); import {module}"
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'weather_system.settings'))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise CommandError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+class Command(BaseCommand):
+    help = 'Measure the cold import time of the API module with -X importtime and check it against a budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='prediction.views')
+        parser.add_argument('--budget-ms', type=float, default=settings.IMPORT_TIME_BUDGET_MS)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--top', type=int, default=12)
+
+    def handle(self, *args, **options):
+        module = options['module']
+        # Best of several fresh interpreters; the first one also warms the page cache
+        runs = [measure(module) for _ in range(max(1, options['repeat']))]
+        entries = min(runs, key=lambda e: sum(x[1] for x in subtree(e, module)))
+        tree = subtree(entries, module)
+        if not tree:
+            raise CommandError(f"{module} not found in the import trace (already imported by django.setup()?)")
+        total_ms = tree[-1][2] / 1000.0
+
+        by_package = defaultdict(int)
+        for name, self_us, _, _ in tree:
+            by_package[name.split('.')[0]] += self_us
+        self.stdout.write(f"{'package':<28}{'self ms':>10}")
+        for package, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:options['top']]:
+            self.stdout.write(f"{package:<28}{us / 1000.0:>10.1f}")
+
+        eager = sorted({
+            name.split('.')[0] for name, _, _, _ in entries if name.split('.')[0] in LAZY_MODULES
+        })
+        budget = options['budget_ms']
+        self.stdout.write(f"\n{module}: {total_ms:.1f} ms (budget {budget:.0f} ms)")
+        if eager:
+            raise CommandError(f"❌ Lazy modules imported eagerly: {', '.join(eager)}")
+        if total_ms > budget:
+            raise CommandError(f"❌ Import of {module} took {total_ms:.1f} ms, over the {budget:.0f} ms budget")
+        self.stdout.write(self.style.SUCCESS("✓ Within budget"))
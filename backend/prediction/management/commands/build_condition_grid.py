@@ -0,0 +1,78 @@
+import csv
+import os
+import pickle
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from prediction.features import FEATURE_NAMES
+from prediction.forest import compile_forest, is_tree_forest
+from prediction.lookup import CONDITION_GRID_FILE, DecisionGrid
+from prediction.registry import _file_sha1
+
+
+def _read_training_rows():
+    """Feature rows of weather_data.csv (the classifier's training set), wherever the checkout keeps it."""
+    for base in (settings.BASE_DIR, settings.BASE_DIR.parent):
+        path = os.path.join(base, 'data', 'weather_data.csv')
+        if os.path.exists(path):
+            with open(path, newline='') as f:
+                rows = [[float(r[name]) for name in FEATURE_NAMES] for r in csv.DictReader(f)]
+            return np.array(rows, dtype=np.float32).reshape(-1, len(FEATURE_NAMES))
+    return None
+
+
+class Command(BaseCommand):
+    help = 'Precompute the condition classifier over settings.CONDITION_GRID and report agreement with the exact model'
+
+    def add_arguments(self, parser):
+        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
+        parser.add_argument('--source', default=os.path.join(model_dir, 'model_classifier.pkl'))
+        parser.add_argument('--output', default=os.path.join(model_dir, CONDITION_GRID_FILE))
+        parser.add_argument('--samples', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['source']):
+            raise CommandError(f"{options['source']} not found")
+        with open(options['source'], 'rb') as f:
+            model = pickle.load(f)
+        # Same labels as the sklearn forest, several times faster to evaluate
+        exact = compile_forest(model) if is_tree_forest(model) else model
+
+        start = time.perf_counter()
+        grid = DecisionGrid.build(exact, settings.CONDITION_GRID, source_sha1=_file_sha1(options['source']))
+        build_s = time.perf_counter() - start
+
+        # Held-out points: uniform over the grid's range, so almost none fall
+        # on a grid point. The training rows are reported separately: the
+        # classifier was fit on them, so they are no independent check
+        rng = np.random.default_rng(0)
+        highs = grid.lows + grid.steps * (grid.shape - 1)
+        samples = rng.uniform(grid.lows, highs, size=(options['samples'], len(FEATURE_NAMES)))
+        report = {'uniform_samples': options['samples'], 'uniform_agreement': grid.agreement(exact, samples)}
+        training = _read_training_rows()
+        if training is not None:
+            report['training_rows'] = len(training)
+            report['training_agreement'] = grid.agreement(exact, training)
+        grid.report = report
+        grid.save(options['output'])
+
+        row = samples[:1].astype(np.float32)
+        timings = []
+        for fn in (lambda: grid.predict(row, fallback=exact), lambda: exact.predict(row)):
+            best = float('inf')
+            for _ in range(200):
+                t = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - t)
+            timings.append(best)
+
+        self.stdout.write(f"Grid {'x'.join(str(n) for n in grid.shape)} = {grid.nbytes / 1e6:.1f} MB, built in {build_s:.1f}s")
+        self.stdout.write(f"Agreement on {options['samples']} uniform samples: {report['uniform_agreement']:.4f}")
+        if training is not None and report['training_agreement'] is not None:
+            self.stdout.write(f"Agreement on {len(training)} training rows (weather_data.csv, "
+                              f"not held out): {report['training_agreement']:.4f}")
+        self.stdout.write(f"Single row: grid {timings[0] * 1e6:.0f}us vs model {timings[1] * 1e6:.0f}us")
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {options['output']}"))
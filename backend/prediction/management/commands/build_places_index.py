@@ -0,0 +1,40 @@
+import os
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from prediction.places import PlaceIndex
+
+
+class Command(BaseCommand):
+    help = 'Build the binary nearest-place index used for offline reverse geocoding from settings.PLACES_CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--csv', default=settings.PLACES_CSV)
+        parser.add_argument('--output', default=settings.PLACES_INDEX)
+        parser.add_argument('--cell-deg', type=float, default=0.5)
+        parser.add_argument('--queries', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['csv']):
+            raise CommandError(f"{options['csv']} not found")
+        start = time.perf_counter()
+        index = PlaceIndex.from_csv(options['csv'], cell_deg=options['cell_deg'])
+        build_s = time.perf_counter() - start
+        os.makedirs(os.path.dirname(options['output']) or '.', exist_ok=True)
+        index.save(options['output'])
+
+        # Time lookups around the indexed places themselves, i.e. where people are
+        rng = np.random.default_rng(0)
+        picks = rng.integers(0, len(index), options['queries'])
+        points = np.column_stack([index.lat[picks], index.lon[picks]]) + rng.normal(0, 0.05, (len(picks), 2))
+        start = time.perf_counter()
+        for lat, lon in points:
+            index.nearest(lat, lon)
+        per_query = (time.perf_counter() - start) / max(len(points), 1)
+
+        self.stdout.write(f"{len(index)} places in {len(index.cell_keys)} cells of {index.cell_deg}°, built in {build_s:.2f}s")
+        self.stdout.write(f"Index {os.path.getsize(options['output']) / 1e6:.1f} MB, nearest place in {per_query * 1e6:.0f}us")
+        self.stdout.write(self.style.SUCCESS(f"✓ Wrote {options['output']}"))
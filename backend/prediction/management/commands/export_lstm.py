@@ -0,0 +1,23 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from prediction.lstm_engine import NumpyLSTM
+
+
+class Command(BaseCommand):
+    help = 'Extract lstm_model.h5 weights into a TensorFlow-free .npz for the NumPy LSTM engine'
+
+    def add_arguments(self, parser):
+        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
+        parser.add_argument('--source', default=os.path.join(model_dir, 'lstm_model.h5'))
+        parser.add_argument('--output', default=os.path.join(model_dir, 'lstm_model.npz'))
+
+    def handle(self, *args, **options):
+        engine = NumpyLSTM.from_h5(options['source'])
+        engine.save_npz(options['output'])
+        units = [layer['recurrent_kernel'].shape[0] for layer in engine.layers]
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Exported {len(engine.layers)} LSTM layers {units} to {options['output']}"
+        ))
@@ -0,0 +1,71 @@
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from prediction import views
+
+
+def read_points(path):
+    """(lat, lon) pairs from a CSV with latitude/longitude (or lat/lon) columns, or bare "lat,lon" lines."""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return []
+    header = [c.strip().lower() for c in rows[0]]
+    lat_col = next((header.index(c) for c in ('latitude', 'lat') if c in header), None)
+    lon_col = next((header.index(c) for c in ('longitude', 'lon', 'lng') if c in header), None)
+    if lat_col is None or lon_col is None:
+        lat_col, lon_col = 0, 1
+    else:
+        rows = rows[1:]
+    points = []
+    for row in rows:
+        try:
+            points.append((float(row[lat_col]), float(row[lon_col])))
+        except (IndexError, ValueError):
+            continue
+    return points
+
+
+class Command(BaseCommand):
+    help = 'Resolve a list of coordinates through the geocoding providers and store them in the reverse-geocode cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV of coordinates (latitude/longitude columns or "lat,lon" lines)')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--skip-cached', action='store_true', help='Leave cells that already have an entry alone')
+
+    def handle(self, *args, **options):
+        try:
+            points = read_points(options['path'])
+        except OSError as e:
+            raise CommandError(str(e))
+        cache = views._GEOCACHE
+
+        # One request per geohash cell
+        cells = {}
+        for lat, lon in points:
+            cells.setdefault(cache.key(lat, lon), (lat, lon))
+        if options['skip_cached']:
+            cells = {k: p for k, p in cells.items() if cache.get(*p) is None}
+        self.stdout.write(f"{len(points)} points, {len(cells)} cells to resolve")
+
+        # Workers only talk to the providers; results are written from this thread
+        start = time.perf_counter()
+        stored = failed = 0
+        client = views.get_upstream()
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as pool:
+            futures = {pool.submit(views._GEOCODER.resolve, client, lat, lon): (lat, lon)
+                       for lat, lon in cells.values()}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    failed += 1
+                    continue
+                cache.put(*futures[future], result)
+                stored += 1
+
+        self.stdout.write(f"Resolved in {time.perf_counter() - start:.1f}s, {failed} without an answer")
+        self.stdout.write(self.style.SUCCESS(f"✓ Stored {stored} cells"))
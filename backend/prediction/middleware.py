@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class LargeResponseGZipMiddleware(GZipMiddleware):
+    """
+    Django's GZipMiddleware, but only for responses of at least
+    GZIP_MIN_BYTES: small JSON answers aren't worth the CPU or the header.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
@@ -1,3 +1,11 @@
 from django.db import models
 
-# Create your models here.
+
+class GeocodeCacheEntry(models.Model):
+    """A reverse-geocoding provider result for one geohash cell."""
+    geohash = models.CharField(max_length=12, primary_key=True)
+    result = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.geohash}: {self.result.get('name')}"
@@ -0,0 +1,236 @@
+import csv
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+
+# Bundled gazetteer (GeoNames, CC BY 4.0): every city over 15000 people
+# worldwide plus every Indian town over 1000
+PLACES_CSV = 'places.csv'
+# Written next to it by the build_places_index command
+PLACES_INDEX = 'places_index.npz'
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cells(lat, lon, cell_deg):
+    """(row, column, cell key) of every point on a ``cell_deg``-degree grid."""
+    rows, cols = int(round(180 / cell_deg)), int(round(360 / cell_deg))
+    row = np.clip(np.floor((np.asarray(lat, dtype=np.float64) + 90) / cell_deg), 0, rows - 1).astype(np.int64)
+    col = np.floor((np.asarray(lon, dtype=np.float64) + 180) / cell_deg).astype(np.int64) % cols
+    return row, col, row * cols + col
+
+
+class PlaceIndex:
+    """
+    Nearest-place lookup over a gazetteer, bucketed on a lat/lon grid.
+
+    Places are sorted by the ``cell_deg``-degree grid cell they fall in, and
+    ``cell_keys``/``cell_starts`` give each occupied cell's slice, so a
+    query binary-searches the cells in growing square rings around the
+    point and stops once no unvisited cell can be closer than the best
+    place found (far from everything, it scans all places once). Names are one UTF-8 blob with offsets; admin areas and
+    countries are small lookup tables, which keeps the saved index compact.
+    """
+
+    # Rings searched before falling back to a full scan
+    max_rings = 8
+
+    def __init__(self, lat, lon, population, names, name_offsets, admin1_ids, admin1, country_ids, countries,
+                 cell_deg=0.5, source_sha1=None):
+        self.lat = lat
+        self.lon = lon
+        self.population = population
+        self.names = names
+        self.name_offsets = name_offsets
+        self.admin1_ids = admin1_ids
+        self.admin1 = list(admin1)
+        self.country_ids = country_ids
+        self.countries = list(countries)
+        self.cell_deg = float(cell_deg)
+        self.source_sha1 = source_sha1
+        self._cols = int(round(360 / self.cell_deg))
+        self._rows = int(round(180 / self.cell_deg))
+        self._lat_rad = np.radians(np.asarray(lat, dtype=np.float64))
+        self._lon_rad = np.radians(np.asarray(lon, dtype=np.float64))
+        self._cos_lat = np.cos(self._lat_rad)
+        keys = _cells(lat, lon, self.cell_deg)[2]
+        self.cell_keys, self.cell_starts = np.unique(keys, return_index=True)
+        self.cell_starts = np.append(self.cell_starts, len(keys)).astype(np.int64)
+        self._stats = {'lookups': 0}
+
+    def __len__(self):
+        return len(self.lat)
+
+    @classmethod
+    def from_csv(cls, path, cell_deg=0.5):
+        """Build from a CSV with name, admin1, country, latitude, longitude, population columns."""
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = [r for r in csv.DictReader(f) if r['name'] and r['latitude'] and r['longitude']]
+        lat = np.array([float(r['latitude']) for r in rows], dtype=np.float32)
+        lon = np.array([float(r['longitude']) for r in rows], dtype=np.float32)
+        index = cls._from_columns(rows, lat, lon, cell_deg)
+        index.source_sha1 = _sha1(path)
+        return index
+
+    @classmethod
+    def _from_columns(cls, rows, lat, lon, cell_deg):
+        # Sort by cell so each cell is one contiguous slice; within a cell, bigger places first
+        population = np.array([int(float(r.get('population') or 0)) for r in rows], dtype=np.int64)
+        order = np.lexsort((-population, _cells(lat, lon, cell_deg)[2]))
+        rows = [rows[i] for i in order]
+
+        encoded = [r['name'].encode('utf-8') for r in rows]
+        name_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=name_offsets[1:])
+        names = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        admin1 = sorted({r.get('admin1') or '' for r in rows})
+        countries = sorted({r.get('country') or '' for r in rows})
+        admin1_pos = {a: i for i, a in enumerate(admin1)}
+        country_pos = {c: i for i, c in enumerate(countries)}
+        return cls(
+            lat[order], lon[order], population[order].astype(np.int32), names, name_offsets,
+            np.array([admin1_pos[r.get('admin1') or ''] for r in rows], dtype=np.uint16), admin1,
+            np.array([country_pos[r.get('country') or ''] for r in rows], dtype=np.uint16), countries,
+            cell_deg=cell_deg
+        )
+
+    def save(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, lat=self.lat, lon=self.lon, population=self.population, names=self.names,
+                name_offsets=self.name_offsets, admin1_ids=self.admin1_ids, country_ids=self.country_ids,
+                meta=np.array(json.dumps({
+                    'cell_deg': self.cell_deg,
+                    'admin1': self.admin1,
+                    'countries': self.countries,
+                    'source_sha1': self.source_sha1,
+                }))
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            meta = json.loads(str(f['meta']))
+            return cls(f['lat'], f['lon'], f['population'], f['names'], f['name_offsets'],
+                       f['admin1_ids'], meta['admin1'], f['country_ids'], meta['countries'],
+                       cell_deg=meta['cell_deg'], source_sha1=meta.get('source_sha1'))
+
+    @property
+    def nbytes(self):
+        arrays = (self.lat, self.lon, self.population, self.names, self.name_offsets, self.admin1_ids,
+                  self.country_ids, self.cell_keys, self.cell_starts)
+        return sum(a.nbytes for a in arrays)
+
+    def name(self, i):
+        return bytes(self.names[self.name_offsets[i]:self.name_offsets[i + 1]]).decode('utf-8')
+
+    def place(self, i, distance_km=None):
+        place = {
+            'name': self.name(i),
+            'admin1': self.admin1[self.admin1_ids[i]] or None,
+            'country_code': self.countries[self.country_ids[i]],
+            'latitude': round(float(self.lat[i]), 5),
+            'longitude': round(float(self.lon[i]), 5),
+            'population': int(self.population[i]),
+        }
+        if distance_km is not None:
+            place['distance_km'] = round(float(distance_km), 3)
+        return place
+
+    def _candidates(self, row, col, ring):
+        """Indexes of the places in the cells exactly ``ring`` cells away from (row, col)."""
+        if ring == 0:
+            cells = [(row, col)]
+        else:
+            cells = [(row + dr, col + dc) for dr in (-ring, ring) for dc in range(-ring, ring + 1)]
+            cells += [(row + dr, col + dc) for dc in (-ring, ring) for dr in range(-ring + 1, ring)]
+        keys = sorted({r * self._cols + c % self._cols for r, c in cells if 0 <= r < self._rows})
+        keys = np.array(keys, dtype=np.int64)
+        pos = np.searchsorted(self.cell_keys, keys)
+        found = pos < len(self.cell_keys)
+        found[found] = self.cell_keys[pos[found]] == keys[found]
+        slices = [np.arange(self.cell_starts[p], self.cell_starts[p + 1]) for p in pos[found]]
+        return np.concatenate(slices) if slices else None
+
+    def _distances(self, idx, lat0, lon0):
+        """Great-circle km from (lat0, lon0), in radians, to the places at ``idx``."""
+        lat1 = self._lat_rad[idx]
+        h = np.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * self._cos_lat[idx] * np.sin((self._lon_rad[idx] - lon0) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+    def nearest(self, latitude, longitude, max_km=None):
+        """The closest place to the point as a dict with ``distance_km``, or None past ``max_km``."""
+        latitude, longitude = float(latitude), float(longitude)
+        self._stats['lookups'] += 1
+        if not len(self):
+            return None
+        row, col, _ = (int(v) for v in _cells(latitude, longitude, self.cell_deg))
+        lat0, lon0 = math.radians(latitude), math.radians(longitude)
+        best, best_km = None, math.inf
+        for ring in range(self.max_rings + 1):
+            idx = self._candidates(row, col, ring)
+            if idx is not None:
+                km = self._distances(idx, lat0, lon0)
+                k = int(np.argmin(km))
+                if km[k] < best_km:
+                    best, best_km = int(idx[k]), float(km[k])
+            # Every unvisited cell is at least this far away (east-west cells narrow towards the poles)
+            lat_lo = (row - ring) * self.cell_deg - 90
+            lat_hi = lat_lo + (2 * ring + 1) * self.cell_deg
+            lon_lo = (col - ring) * self.cell_deg - 180
+            lon_margin = min(longitude - lon_lo, lon_lo + (2 * ring + 1) * self.cell_deg - longitude)
+            edge_lat = min(max(abs(lat_lo), abs(lat_hi)), 90.0)
+            covered_km = KM_PER_DEGREE * min(latitude - lat_lo, lat_hi - latitude,
+                                             lon_margin * math.cos(math.radians(edge_lat)))
+            if best_km <= covered_km or (max_km is not None and covered_km > max_km):
+                break
+        else:
+            # Empty surroundings (open sea, poles): one pass over everything beats many sparse rings
+            km = self._distances(slice(None), lat0, lon0)
+            best = int(np.argmin(km))
+            best_km = float(km[best])
+        if best is None or (max_km is not None and best_km > max_km):
+            return None
+        return self.place(best, best_km)
+
+    def stats(self):
+        s = dict(self._stats)
+        s['places'] = len(self)
+        s['cells'] = len(self.cell_keys)
+        s['cell_deg'] = self.cell_deg
+        s['bytes'] = int(self.nbytes)
+        return s
+
+
+def load_places(csv_path, index_path=None):
+    """
+    The place index for ``csv_path``: the prebuilt one at ``index_path`` if it
+    was built from the same CSV, else built from the CSV in memory. None if
+    there is no CSV.
+    """
+    if not os.path.exists(csv_path):
+        print(f"⚠ No gazetteer at {csv_path}")
+        return None
+    if index_path and os.path.exists(index_path):
+        try:
+            index = PlaceIndex.load(index_path)
+            if index.source_sha1 == _sha1(csv_path):
+                return index
+            print(f"⚠ {index_path} is stale, rebuilding from {csv_path}")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠ Could not load place index: {e}")
+    return PlaceIndex.from_csv(csv_path)
@@ -0,0 +1,480 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from datetime import datetime, timezone
+from functools import partial
+
+import numpy as np
+
+from .artifacts import MANIFEST_NAME, MMAP_SUBDIR, PICKLE_FILES, load_artifacts
+from .ensemble import EnsemblePredictor
+from .forest import FlatForest
+from .lookup import CONDITION_GRID_FILE, DecisionGrid
+
+# Files in ml_models/ whose content defines a model version
+ARTIFACT_EXTENSIONS = ('.pkl', '.h5', '.npz')
+
+
+def load_model_set(model_dir, forest_backend='flat', ensemble_workers=2, model_format='auto',
+                   forest_sklearn_min_rows=1024):
+    """
+    Load every model plus the scaler, ready for serving.
+
+    With ``model_format`` 'auto' or 'mmap' and the flat forest backend, a
+    fresh export under ``model_dir/mmap`` is memory-mapped instead of
+    unpickling, so workers share the pages and load time does not grow with
+    forest size. 'auto' falls back to the pickles silently, 'mmap' with a
+    warning. Flat forests hand batches of ``forest_sklearn_min_rows`` rows
+    or more to the sklearn forest, unpickled on first use when memory-mapped.
+    """
+    models = None
+    if model_format in ('auto', 'mmap') and forest_backend == 'flat':
+        models = load_artifacts(model_dir)
+        if models is not None:
+            print(f"✓ {len(models)} models memory-mapped from {MMAP_SUBDIR}/")
+            for filename, key in PICKLE_FILES.items():
+                if isinstance(models.get(key), FlatForest):
+                    models[key].use_sklearn_from(forest_sklearn_min_rows,
+                                                 loader=partial(_unpickle, os.path.join(model_dir, filename)))
+            models['ensemble'] = EnsemblePredictor.from_models(models, max_workers=ensemble_workers)
+        elif model_format == 'mmap':
+            print("⚠ No usable memory-mapped export, loading pickles")
+    if models is None:
+        models = _load_pickles(model_dir, forest_backend, ensemble_workers, forest_sklearn_min_rows)
+    models['condition_grid'] = load_condition_grid(model_dir)
+    return models
+
+
+def load_condition_grid(model_dir):
+    """The classifier's decision grid, or None if missing or built from another classifier."""
+    path = os.path.join(model_dir, CONDITION_GRID_FILE)
+    classifier_path = os.path.join(model_dir, 'model_classifier.pkl')
+    if not os.path.exists(path) or not os.path.exists(classifier_path):
+        return None
+    grid = DecisionGrid.load(path)
+    if grid.source_sha1 != _file_sha1(classifier_path):
+        print(f"⚠ {CONDITION_GRID_FILE} was built from another classifier, ignoring it")
+        return None
+    print(f"✓ Condition grid loaded ({grid.nbytes // 1024} KiB)")
+    return grid
+
+
+def _unpickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def _load_pickles(model_dir, forest_backend, ensemble_workers, forest_sklearn_min_rows=1024):
+    import joblib
+
+    models = {}
+    for filename, key in PICKLE_FILES.items():
+        path = os.path.join(model_dir, filename)
+        if os.path.exists(path):
+            models[key] = _unpickle(path)
+            print(f"✓ {key} loaded")
+        else:
+            print(f"⚠ {filename} missing")
+            models[key] = None
+
+    # Swap sklearn forests for flattened array evaluators
+    if forest_backend == 'flat':
+        from .forest import compile_forest, is_tree_forest
+        for key, model in models.items():
+            if is_tree_forest(model):
+                models[key] = compile_forest(model).use_sklearn_from(forest_sklearn_min_rows, model=model)
+                print(f"✓ {key} compiled ({models[key].n_trees} trees)")
+
+    models['ensemble'] = EnsemblePredictor.from_models(models, max_workers=ensemble_workers)
+
+    # Scaler
+    scaler_path = os.path.join(model_dir, 'scaler.pkl')
+    if os.path.exists(scaler_path):
+        models['scaler'] = joblib.load(scaler_path)
+        print("✓ Scaler loaded")
+    else:
+        models['scaler'] = None
+    return models
+
+
+class KerasLSTM:
+    """Adapter giving the Keras model the same raw-in, raw-out contract as NumpyLSTM."""
+    def __init__(self, model, scaler):
+        self.model = model
+        self.scaler = scaler
+
+    def predict(self, X):
+        import tensorflow as tf
+        X = np.asarray(X, dtype=np.float32)
+        scaled = self.scaler.transform(X.reshape(-1, X.shape[-1])).reshape(X.shape)
+        with tf.device('/CPU:0'):
+            pred = np.asarray(self.model.predict_on_batch(scaled))
+        return (pred - self.scaler.min_[0]) / self.scaler.scale_[0]
+
+
+def load_lstm(model_dir, models, backend='numpy'):
+    """
+    Load the LSTM. The returned object takes raw (batch, 3, 4) feature
+    windows and returns temperatures in degrees, with the MinMax scaling
+    handled internally.
+    """
+    scaler = models.get('scaler')
+    if scaler is None:
+        return None
+    h5_path = os.path.join(model_dir, 'lstm_model.h5')
+    if backend == 'keras':
+        import tensorflow as tf
+        from tensorflow.keras.models import load_model
+        if not os.path.exists(h5_path):
+            return None
+        with tf.device('/CPU:0'):
+            model = load_model(h5_path, compile=False)
+        return KerasLSTM(model, scaler)
+
+    if models.get('lstm_engine') is not None:
+        return models['lstm_engine']
+    from .lstm_engine import NumpyLSTM
+    npz_path = os.path.join(model_dir, 'lstm_model.npz')
+    if os.path.exists(npz_path):
+        engine = NumpyLSTM.from_npz(npz_path)
+    elif os.path.exists(h5_path):
+        engine = NumpyLSTM.from_h5(h5_path)
+    else:
+        return None
+    return engine if engine.scaler_folded else engine.fold_scaler(scaler)
+
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _backoff(failures, base, cap):
+    return min(cap, base * 2 ** (failures - 1))
+
+
+class ModelSnapshot:
+    """
+    One immutable generation of loaded models.
+
+    ``models`` is never mutated after construction. The LSTM is loaded on
+    first use because it is the heaviest artifact; a failed load is retried
+    with exponential backoff instead of being given up on.
+    """
+
+    def __init__(self, version, artifacts, models, lstm_loader=None, error=None,
+                 retry_base=1.0, retry_max=60.0):
+        self.version = version
+        self.artifacts = artifacts
+        self.models = models
+        self.error = error
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._lstm_loader = lstm_loader
+        self._lstm = None
+        self._lstm_loaded = False
+        self._lstm_failures = 0
+        self._lstm_retry_at = 0.0
+        self.lstm_error = None
+        self._lstm_lock = threading.Lock()
+
+    def reset_after_fork(self):
+        self._lstm_lock = threading.Lock()
+
+    @property
+    def lstm_loaded(self):
+        return self._lstm_loaded
+
+    def get_lstm(self):
+        if self._lstm_loaded:
+            return self._lstm
+        if time.monotonic() < self._lstm_retry_at:
+            return None
+        with self._lstm_lock:
+            if not self._lstm_loaded and time.monotonic() >= self._lstm_retry_at:
+                try:
+                    if self._lstm_loader is not None:
+                        self._lstm = self._lstm_loader(self.models)
+                    if self._lstm is not None:
+                        print(f"✓ LSTM loaded (models {self.version})")
+                    self._lstm_loaded = True
+                    self.lstm_error = None
+                except Exception as e:
+                    self._lstm_failures += 1
+                    delay = _backoff(self._lstm_failures, self.retry_base, self.retry_max)
+                    self._lstm_retry_at = time.monotonic() + delay
+                    print(f"❌ LSTM Load error: {e} (retrying in {delay:.0f}s)")
+                    self.lstm_error = str(e)
+        return self._lstm
+
+
+class ModelRegistry:
+    """
+    Tracks the artifacts in ``model_dir`` by content hash and serves the
+    current ModelSnapshot.
+
+    The first load runs once, on a background thread, no matter how many
+    requests arrive at a cold worker; callers of ``get()`` wait for it up to
+    a timeout and then get an empty snapshot to fall back on. A failed first
+    load is retried with exponential backoff.
+
+    Readers fetch ``registry.snapshot`` (a single attribute read) and never
+    lock. A watcher thread polls file size and mtime every ``poll_interval``
+    seconds. When they change and then hold steady for one more poll (so a
+    half-written training run is not picked up), it re-hashes the changed
+    files. If the content differs, it loads a new snapshot in the background
+    and swaps it in with one assignment. A failed reload keeps serving the
+    previous snapshot.
+    """
+
+    def __init__(self, model_dir, load_models, load_lstm=None, poll_interval=0,
+                 retry_base=1.0, retry_max=60.0):
+        self.model_dir = model_dir
+        self.load_models = load_models
+        self.load_lstm = load_lstm
+        self.poll_interval = poll_interval
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+        self._loader = None
+        self._attempted = threading.Event()
+        self._watcher = None
+        self._stop = threading.Event()
+        self._hashes = {}  # filename -> ((size, mtime_ns), sha1)
+        self._pending_stats = None
+        self.reloads = 0
+        self.load_attempts = 0
+        self.load_failures = 0
+        self.next_retry_at = None
+        self.last_error = None
+        self.last_checked = None
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def ready(self):
+        return self._snapshot is not None
+
+    @property
+    def state(self):
+        """'ready', 'loading', 'retrying' (waiting out a backoff) or 'idle'."""
+        if self._snapshot is not None:
+            return 'ready'
+        if self._loader is None or not self._loader.is_alive():
+            return 'idle'
+        return 'retrying' if self.load_failures else 'loading'
+
+    def get(self, timeout=None):
+        """
+        Current snapshot. On a cold registry this starts the first load and
+        waits up to ``timeout`` seconds (None waits for the first attempt to
+        finish); if no models are ready by then it returns an empty snapshot.
+        """
+        snap = self._snapshot
+        if snap is None:
+            self.start_loading()
+            self._attempted.wait(timeout)
+            snap = self._snapshot
+            if snap is None:
+                return ModelSnapshot(None, {}, {}, error=self.last_error)
+        return snap
+
+    def start_loading(self):
+        """Start the first load in the background unless it is done or running."""
+        if self._snapshot is not None:
+            return
+        with self._load_lock:
+            if self._snapshot is None and (self._loader is None or not self._loader.is_alive()):
+                self._loader = threading.Thread(target=self._load_until_ready, name='model-loader', daemon=True)
+                self._loader.start()
+
+    def _load_until_ready(self):
+        while self._snapshot is None:
+            self.load_attempts += 1
+            try:
+                snapshot = self._build(self.scan())
+            except Exception:
+                self.load_failures += 1
+                delay = _backoff(self.load_failures, self.retry_base, self.retry_max)
+                self.next_retry_at = time.time() + delay
+                print(f"⚠ Retrying model load in {delay:.0f}s")
+                self._attempted.set()
+                if self._stop.wait(delay):
+                    return
+                continue
+            with self._load_lock:
+                self._swap(snapshot)
+            self.load_failures = 0
+            self.next_retry_at = None
+            self._attempted.set()
+        self.start_watcher()
+
+    def scan(self):
+        """(size, mtime_ns) of every tracked artifact."""
+        stats = {}
+        try:
+            names = os.listdir(self.model_dir)
+        except OSError:
+            return stats
+        for name in names:
+            if not name.endswith(ARTIFACT_EXTENSIONS):
+                continue
+            try:
+                st = os.stat(os.path.join(self.model_dir, name))
+            except OSError:
+                continue
+            stats[name] = (st.st_size, st.st_mtime_ns)
+        # A new export changes what is served even when the sources did not
+        manifest = os.path.join(MMAP_SUBDIR, MANIFEST_NAME)
+        try:
+            st = os.stat(os.path.join(self.model_dir, manifest))
+            stats[manifest] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+        return stats
+
+    def _artifact_hashes(self, stats):
+        hashes = {}
+        for name, stat in sorted(stats.items()):
+            cached = self._hashes.get(name)
+            if cached is None or cached[0] != stat:
+                cached = (stat, _file_sha1(os.path.join(self.model_dir, name)))
+                self._hashes[name] = cached
+            hashes[name] = cached[1]
+        return hashes
+
+    @staticmethod
+    def _version(hashes):
+        digest = hashlib.sha1(''.join(f"{n}:{h};" for n, h in sorted(hashes.items())).encode())
+        return digest.hexdigest()[:12]
+
+    def _build(self, stats):
+        hashes = self._artifact_hashes(stats)
+        version = self._version(hashes)
+        artifacts = {
+            name: {
+                'sha1': hashes[name],
+                'size': stats[name][0],
+                'mtime': datetime.fromtimestamp(stats[name][1] / 1e9, timezone.utc).isoformat()
+            }
+            for name in hashes
+        }
+        lstm_loader = None
+        if self.load_lstm is not None:
+            lstm_loader = lambda models: self.load_lstm(self.model_dir, models)
+        try:
+            print(f"Loading ML models (version {version})...")
+            models = self.load_models(self.model_dir)
+            self.last_error = None
+            return ModelSnapshot(version, artifacts, models, lstm_loader,
+                                 retry_base=self.retry_base, retry_max=self.retry_max)
+        except Exception as e:
+            import traceback
+            self.last_error = f"{str(e)}\n{traceback.format_exc()}"
+            print(f"❌ Load error: {e}")
+            raise
+
+    def _swap(self, snapshot):
+        self._snapshot = snapshot
+        self._pending_stats = None
+
+    def _current_stats(self):
+        snap = self._snapshot
+        return {} if snap is None else {
+            name: self._hashes[name][0] for name in snap.artifacts if name in self._hashes
+        }
+
+    def check_for_update(self):
+        """Poll once; returns True when a new snapshot was swapped in."""
+        self.last_checked = time.time()
+        stats = self.scan()
+        if self._snapshot is None or stats == self._current_stats():
+            self._pending_stats = None
+            return False
+        if stats != self._pending_stats:
+            # Files are still changing; wait for them to settle
+            self._pending_stats = stats
+            return False
+        with self._load_lock:
+            hashes = self._artifact_hashes(stats)
+            if self._version(hashes) == self._snapshot.version:
+                self._pending_stats = None
+                return False
+            try:
+                snapshot = self._build(stats)
+            except Exception:
+                self._pending_stats = None
+                return False
+            self._swap(snapshot)
+            self.reloads += 1
+            print(f"✓ Models reloaded (version {snapshot.version})")
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                self.last_error = str(e)
+
+    def start_watcher(self):
+        if self.poll_interval <= 0:
+            return
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        with self._load_lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                self._watcher = threading.Thread(target=self._watch, name='model-registry', daemon=True)
+                self._watcher.start()
+
+    def stop_watcher(self):
+        """Stop the watcher and any pending load retries."""
+        self._stop.set()
+        for thread in (self._watcher, self._loader):
+            if thread is not None:
+                thread.join()
+        self._watcher = None
+        self._loader = None
+        self._stop = threading.Event()
+
+    def reset_after_fork(self):
+        """Recreate locks and background threads in a freshly forked worker."""
+        self._load_lock = threading.Lock()
+        attempted = self._attempted.is_set()
+        self._attempted = threading.Event()
+        if attempted:
+            self._attempted.set()
+        self._watcher = None
+        self._loader = None
+        self._stop = threading.Event()
+        if self._snapshot is not None:
+            self._snapshot.reset_after_fork()
+            self.start_watcher()
+        elif self.load_attempts:
+            # The parent's retry loop did not survive the fork
+            self.start_loading()
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            'state': self.state,
+            'load_attempts': self.load_attempts,
+            'load_failures': self.load_failures,
+            'next_retry_at': self.next_retry_at,
+            'version': snap.version if snap else None,
+            'loaded_at': snap.loaded_at if snap else None,
+            'artifacts': snap.artifacts if snap else {},
+            'reloads': self.reloads,
+            'poll_interval': self.poll_interval,
+            'watcher_alive': self._watcher is not None and self._watcher.is_alive(),
+            'last_checked': self.last_checked,
+        }
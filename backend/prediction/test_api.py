@@ -1,12 +1,41 @@
+import base64
+import gzip
+import itertools
+import json
+import time
+
 from django.test import TestCase
 from rest_framework.test import APIClient
 from unittest.mock import patch, Mock
 
+import numpy as np
+
+from .citysearch import PrefixCache
+from .geocache import GeocodeCache
+from .gridcache import GridCache
+from .health import UpstreamHealth
+from .history import LocationHistory, location_key
+
+
+def isolate_upstreams(test):
+    """Give ``test`` its own upstream health tracker and reverse-geocode cache."""
+    from . import views
+    health = UpstreamHealth()
+    for patcher in (patch('prediction.views._HEALTH', health), patch.object(views._GEOCODER, 'health', health),
+                    patch('prediction.views._GEOCACHE', GeocodeCache())):
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
 class ApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
+        # Exercise the providers: no offline gazetteer
+        patcher = patch('prediction.views.get_places', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        isolate_upstreams(self)
 
-    @patch('requests.get')
+    @patch('prediction.upstream.UpstreamClient.get')
     def test_reverse_geocode_success(self, mock_get):
         # Mock OSM Nominatim response (Method 1)
         mock_get.return_value.status_code = 200
@@ -24,7 +53,7 @@ class ApiTests(TestCase):
         self.assertTrue(len(response.data['results']) > 0)
         self.assertEqual(response.data['results'][0]['admin1'], 'Tamil Nadu')
 
-    @patch('requests.get')
+    @patch('prediction.upstream.UpstreamClient.get')
     def test_reverse_geocode_all_fail_fallback(self, mock_get):
         # Mock all services failing
         mock_get.side_effect = Exception("Service Unavailable")
@@ -34,7 +63,7 @@ class ApiTests(TestCase):
         self.assertEqual(response.data['results'][0]['source'], 'Fallback')
         self.assertEqual(response.data['results'][0]['precision'], 'coordinates')
 
-    @patch('requests.get')
+    @patch('prediction.upstream.UpstreamClient.get')
     def test_reverse_geocode_bigdatacloud_success(self, mock_get):
         # Mock OSM fails, BigDataCloud (Method 2) succeeds
         def side_effect(url, **kwargs):
@@ -61,3 +90,472 @@ class ApiTests(TestCase):
         # Search for BigDataCloud result in the responses (or just check success if using the first successful one)
         self.assertTrue(any(r['source'] == 'BigDataCloud' for r in response.data['results']) or 
                         response.data['results'][0]['source'] == 'Fallback')
+
+class OfflineReverseGeocodeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        isolate_upstreams(self)
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_nearby_place_answers_without_providers(self, mock_get):
+        response = self.client.get('/api/reverse-geocode/?latitude=11.0168&longitude=76.9558')
+        result = response.data['results'][0]
+        self.assertEqual(result['source'], 'Offline')
+        self.assertEqual(result['name'], 'Coimbatore, Tamil Nadu')
+        self.assertEqual(result['precision'], 'locality')
+        mock_get.assert_not_called()
+
+    @patch('prediction.upstream.UpstreamClient.get', side_effect=Exception("Service Unavailable"))
+    def test_refine_asks_providers_and_falls_back_to_nearest_place(self, mock_get):
+        response = self.client.get('/api/reverse-geocode/?latitude=11.0168&longitude=76.9558&refine=true')
+        result = response.data['results'][0]
+        self.assertTrue(mock_get.called)
+        self.assertEqual((result['source'], result['precision']), ('Offline', 'approximate'))
+
+    @patch('prediction.upstream.UpstreamClient.get', side_effect=Exception("Service Unavailable"))
+    def test_far_from_everything_uses_coordinate_fallback(self, mock_get):
+        response = self.client.get('/api/reverse-geocode/?latitude=-40.0&longitude=-120.0')
+        self.assertEqual(response.data['results'][0]['source'], 'Fallback')
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_provider_answer_reused_for_same_cell(self, mock_get):
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {
+            'address': {'neighbourhood': 'RS Puram', 'city': 'Coimbatore', 'state': 'Tamil Nadu', 'country_code': 'in'}
+        }
+        first = self.client.get('/api/reverse-geocode/?latitude=11.0168&longitude=76.9558&refine=true')
+        self.assertEqual((first['X-Cache'], first.data['results'][0]['source']), ('MISS', 'OpenStreetMap'))
+        calls = mock_get.call_count
+
+        # A few metres away, same geohash cell, even after the memory tier is gone
+        from . import views
+        views._GEOCACHE.clear_hot()
+        second = self.client.get('/api/reverse-geocode/?latitude=11.0169&longitude=76.9559&refine=true')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data['results'][0]['name'], 'RS Puram, Coimbatore, Tamil Nadu')
+        self.assertEqual(mock_get.call_count, calls)
+
+class CitySearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        isolate_upstreams(self)
+        patcher = patch('prediction.views._SEARCH_CACHE', PrefixCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_common_prefix_answered_locally(self, mock_get):
+        response = self.client.get('/api/search-city/?name=Co')
+        self.assertEqual(response['X-Cache'], 'LOCAL')
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['name'], 'Coimbatore')
+        mock_get.assert_not_called()
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_upstream_answer_serves_longer_prefixes(self, mock_get):
+        mock_get.return_value.json.return_value = {'results': [
+            {'id': 1, 'name': 'Qwertyville', 'latitude': 1.0, 'longitude': 2.0, 'country': 'Nowhere'}
+        ]}
+        first = self.client.get('/api/search-city/?name=Qwer')
+        second = self.client.get('/api/search-city/?name=Qwerty')
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.data['results'][0]['name'], 'Qwertyville')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args[1]['params'], {'name': 'Qwer', 'count': 10})
+
+    @patch('prediction.upstream.UpstreamClient.get', side_effect=Exception("Service Unavailable"))
+    def test_upstream_failure_still_returns_local_matches(self, mock_get):
+        response = self.client.get('/api/search-city/?name=Coimbat')
+        self.assertEqual(response['X-Cache'], 'ERROR')
+        self.assertEqual(response.data['results'][0]['name'], 'Coimbatore')
+
+class PredictBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.row = {'temperature': 30, 'humidity': 70, 'rainfall': 2, 'wind_speed': 12}
+
+    def test_batch_rows_match_single_predictions(self):
+        single = self.client.post('/api/predict/', self.row, format='json')
+        response = self.client.post('/api/predict/batch/', [self.row, self.row], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertAlmostEqual(response.data['predicted_temperature'][1],
+                               single.data['predicted_temperature'], places=1)
+
+    def test_batch_reports_row_errors_without_failing(self):
+        bad = dict(self.row, humidity='wet')
+        response = self.client.post('/api/predict/batch/', {'rows': [self.row, bad, {}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['succeeded'], 1)
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 2])
+        self.assertIsNone(response.data['predicted_temperature'][1])
+
+    def test_batch_columnar_payload(self):
+        payload = {'temperature': [30, 40], 'humidity': [70, 50],
+                   'rainfall': [2, None], 'wind_speed': [12, 5]}
+        response = self.client.post('/api/predict/batch/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['succeeded'], 1)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+    def test_batch_rejects_values_past_float32(self):
+        huge = dict(self.row, temperature=1e300)
+        rows = self.client.post('/api/predict/batch/', [self.row, huge], format='json')
+        columns = self.client.post('/api/predict/batch/', {'temperature': [30, 1e300], 'humidity': [70, 70],
+                                                            'rainfall': [2, 2], 'wind_speed': [12, 12]}, format='json')
+        for response in (rows, columns):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['succeeded'], 1)
+            self.assertEqual([e['index'] for e in response.data['errors']], [1])
+            self.assertIsNone(response.data['predicted_temperature'][1])
+        single = self.client.post('/api/predict/', huge, format='json')
+        self.assertEqual(single.status_code, 400)
+
+    def test_batch_rejects_malformed_payload(self):
+        response = self.client.post('/api/predict/batch/', {'temperature': [1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+class PredictLSTMTests(TestCase):
+    def test_numpy_backend_serves_lstm(self):
+        response = APIClient().post('/api/predict_lstm/', {
+            'temperature': 6, 'humidity': 65, 'rainfall': 2, 'wind_speed': 15
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['method'], 'LSTM')
+        self.assertGreater(response.data['predicted_temperature'], -50)
+
+class LocationHistoryApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # Every reading lands in the next step, as if a day apart
+        self.history = LocationHistory(size=3, step_seconds=1, path=None, clock=itertools.count().__next__)
+        for target, value in (('prediction.views._HISTORY', self.history),
+                              ('prediction.views._CURRENT_CACHE', GridCache())):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        isolate_upstreams(self)
+
+    def test_observations_build_lstm_window(self):
+        rows = [
+            {'latitude': 11.0, 'longitude': 77.0, 'temperature': t, 'humidity': 60, 'rainfall': 0, 'wind_speed': 5}
+            for t in (20, 21)
+        ]
+        response = self.client.post('/api/observations/', rows, format='json')
+        self.assertEqual(response.data['recorded'], 2)
+        response = self.client.post('/api/predict_lstm/', dict(rows[0], temperature=22), format='json')
+        self.assertEqual(response.data['history_readings'], 3)
+        # The what-if input is not recorded as an observation
+        window, readings = self.history.window(location_key(11.0, 77.0), 3)
+        self.assertEqual(readings, 2)
+        np.testing.assert_array_equal(window[:, 0], [20, 20, 21])
+
+    def test_forecast_uses_location_history(self):
+        rows = [
+            {'latitude': 11.0, 'longitude': 77.0, 'temperature': t, 'humidity': 60, 'rainfall': 0, 'wind_speed': 5}
+            for t in (20, 21)
+        ]
+        self.client.post('/api/observations/', rows, format='json')
+        response = self.client.get('/api/forecast/?horizon=2&lat=11.0&lon=77.0&temperature=22')
+        self.assertEqual(response.data['history_readings'], [3])
+        batch = self.client.post('/api/forecast/', {'rows': [dict(rows[0], temperature=22), {**rows[0], 'latitude': 40}],
+                                                    'horizon': 2}, format='json')
+        self.assertEqual(batch.data['history_readings'], [3, 1])
+        self.assertEqual(self.history.window(location_key(11.0, 77.0), 3)[1], 2)
+
+    def test_observation_requires_location(self):
+        response = self.client.post('/api/observations/', {'temperature': 20}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_current_weather_feeds_history(self, mock_get):
+        mock_get.return_value.json.return_value = {'current': {
+            'temperature_2m': 28.5, 'relative_humidity_2m': 70, 'rain': 0.2, 'wind_speed_10m': 9, 'weather_code': 1
+        }}
+        self.client.get('/api/current/?lat=11.0&lon=77.0')
+        window, readings = self.history.window(location_key(11.0, 77.0), 3)
+        self.assertEqual(readings, 1)
+        self.assertAlmostEqual(float(window[-1, 0]), 28.5)
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_cached_reading_is_not_recorded_again(self, mock_get):
+        mock_get.return_value.json.return_value = {'current': {
+            'temperature_2m': 28.5, 'relative_humidity_2m': 70, 'rain': 0.2, 'wind_speed_10m': 9, 'weather_code': 1
+        }}
+        first = self.client.get('/api/current/?lat=11.0&lon=77.0')
+        second = self.client.get('/api/current/?lat=11.0&lon=77.0')
+        batch = self.client.get('/api/current/batch/?lat=11.0&lon=77.0')
+        self.assertEqual((first['X-Cache'], second['X-Cache'], batch.data['cache']), ('MISS', 'HIT', ['HIT']))
+        self.assertEqual(self.history.window(location_key(11.0, 77.0), 3)[1], 1)
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_current_weather_reaches_lstm_window_off_cell_centre(self, mock_get):
+        mock_get.return_value.json.return_value = {'current': {
+            'temperature_2m': 28.5, 'relative_humidity_2m': 70, 'rain': 0.2, 'wind_speed_10m': 9, 'weather_code': 1
+        }}
+        self.client.get('/api/current/?lat=11.0168&lon=76.9558')
+        response = self.client.post('/api/predict_lstm/', {
+            'latitude': 11.0168, 'longitude': 76.9558,
+            'temperature': 27, 'humidity': 70, 'rainfall': 0, 'wind_speed': 9
+        }, format='json')
+        self.assertGreater(response.data['history_readings'], 1)
+
+class CurrentWeatherCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        isolate_upstreams(self)
+        self.cache = GridCache(resolution=0.1, ttl=600, stale_ttl=600)
+        patcher = patch('prediction.views._CURRENT_CACHE', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_same_cell_served_from_cache(self, mock_get):
+        mock_get.return_value.json.return_value = {'current': {'temperature_2m': 21.0, 'weather_code': 61}}
+        mock_get.return_value.content = b'x' * 100
+        first = self.client.get('/api/current/?lat=11.01&lon=76.96')
+        second = self.client.get('/api/current/?lat=10.98&lon=76.99&city=Nearby')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data['city'], 'Nearby')
+        self.assertEqual(second.data['description'], 'Rainy')
+        self.assertEqual(mock_get.call_count, 1)
+        # Upstream is asked for the cell centre, not the caller's exact point
+        self.assertIn('latitude=11.0&longitude=77.0', mock_get.call_args[0][0])
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_other_cell_misses(self, mock_get):
+        mock_get.return_value.json.return_value = {'current': {'temperature_2m': 21.0}}
+        self.client.get('/api/current/?lat=11.0&lon=77.0')
+        response = self.client.get('/api/current/?lat=11.3&lon=77.0')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('prediction.upstream.UpstreamClient.get', side_effect=OSError('down'))
+    def test_open_breaker_stops_calling_upstream(self, mock_get):
+        for lat in range(5):
+            self.client.get(f'/api/current/?lat={lat}&lon=77.0')
+        self.assertEqual(mock_get.call_count, 5)
+        response = self.client.get('/api/current/?lat=6&lon=77.0')
+        self.assertTrue(response.data['fallback'])
+        self.assertEqual(mock_get.call_count, 5)
+        status = self.client.get('/api/status/').data['upstream_health']['upstreams']['OpenMeteo']
+        self.assertEqual((status['state'], status['failures'], status['rejected']), ('open', 5, 1))
+
+    @patch('prediction.upstream.UpstreamClient.get', side_effect=OSError('down'))
+    def test_upstream_failure_is_not_cached(self, mock_get):
+        response = self.client.get('/api/current/?lat=11.0&lon=77.0')
+        self.assertTrue(response.data['fallback'])
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+class CurrentWeatherShapeTests(TestCase):
+    FORECAST = {
+        'current': {'temperature_2m': 21.0, 'weather_code': 61},
+        'hourly': {'time': ['2026-10-18T00:00', '2026-10-18T01:00', '2026-10-18T02:00'],
+                   'temperature_2m': [20.5, None, 19.25], 'weather_code': [61, 61, 3], 'rain': [0.4, 0.1, 0.0]},
+        'daily': {'time': ['2026-10-18'], 'temperature_2m_max': [24.0], 'sunrise': ['2026-10-18T06:01']},
+    }
+
+    def setUp(self):
+        self.client = APIClient()
+        isolate_upstreams(self)
+        self.cache = GridCache(resolution=0.1, ttl=600, stale_ttl=600)
+        patcher = patch('prediction.views._CURRENT_CACHE', self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('prediction.upstream.UpstreamClient.get')
+        self.upstream = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.upstream.return_value.json.return_value = self.FORECAST
+        self.upstream.return_value.content = b'x' * 100
+
+    def test_default_payload_unchanged(self):
+        response = self.client.get('/api/current/?lat=11.0&lon=77.0')
+        self.assertEqual(response.data['hourly'], self.FORECAST['hourly'])
+        self.assertEqual(response.data['daily'], self.FORECAST['daily'])
+        self.assertNotIn('encoding', response.data)
+
+    def test_field_selection(self):
+        response = self.client.get('/api/current/?lat=11.0&lon=77.0&fields=temperature,code,hourly.rain')
+        self.assertEqual(set(response.data), {'temperature', 'code', 'hourly'})
+        self.assertEqual(response.data['hourly'], {'time': self.FORECAST['hourly']['time'], 'rain': [0.4, 0.1, 0.0]})
+        bad = self.client.get('/api/current/?lat=11.0&lon=77.0&fields=temperature,pressure')
+        self.assertEqual(bad.status_code, 400)
+        self.assertIn('pressure', bad.data['error'])
+        self.assertEqual(self.client.get('/api/current/?encoding=xml').status_code, 400)
+
+    def test_packed_encoding(self):
+        response = self.client.get('/api/current/?lat=11.0&lon=77.0&fields=hourly,daily&encoding=packed')
+        hourly, daily = response.data['hourly'], response.data['daily']
+        self.assertEqual(response.data['encoding'], 'packed')
+        self.assertEqual(hourly['time'], {'start': '2026-10-18T00:00', 'step': 3600, 'count': 3})
+        temps = np.frombuffer(base64.b64decode(hourly['temperature_2m']['data']), dtype='<f4')
+        np.testing.assert_array_equal(temps, np.array([20.5, np.nan, 19.25], dtype=np.float32))
+        self.assertEqual(hourly['weather_code']['dtype'], 'int16')
+        self.assertEqual(daily['sunrise'], ['2026-10-18T06:01'])
+
+    def test_unchanged_forecast_is_not_modified(self):
+        first = self.client.get('/api/current/?lat=11.0&lon=77.0')
+        self.assertIn('max-age=', first['Cache-Control'])
+        with patch('prediction.views.CurrentWeatherView.payload') as payload:
+            again = self.client.get('/api/current/?lat=11.01&lon=77.01', HTTP_IF_NONE_MATCH=first['ETag'])
+            since = self.client.get('/api/current/?lat=11.0&lon=77.0', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual((again.status_code, since.status_code), (304, 304))
+        self.assertEqual(again['ETag'], first['ETag'])
+        payload.assert_not_called()
+        # Another shape of the same forecast is a different representation
+        packed = self.client.get('/api/current/?lat=11.0&lon=77.0&encoding=packed', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(packed.status_code, 200)
+
+    def test_refetched_forecast_gets_new_etag(self):
+        first = self.client.get('/api/current/?lat=11.0&lon=77.0')
+        with patch('prediction.gridcache.time.time', return_value=time.time() + 3600):
+            self.cache.clear()
+            response = self.client.get('/api/current/?lat=11.0&lon=77.0', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_large_responses_gzipped(self):
+        forecast = dict(self.FORECAST, hourly={'temperature_2m': [20.5] * 500})
+        self.upstream.return_value.json.return_value = forecast
+        response = self.client.get('/api/current/?lat=11.0&lon=77.0', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['hourly'], forecast['hourly'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        small = self.client.get('/api/current/?lat=11.0&lon=77.0&fields=temperature', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+class CurrentWeatherBatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        isolate_upstreams(self)
+        self.cache = GridCache(resolution=0.1, ttl=600, stale_ttl=600)
+        for target, value in (('prediction.views._CURRENT_CACHE', self.cache),
+                              ('prediction.views._HISTORY', LocationHistory(size=4))):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def upstream(temperatures):
+        res = Mock()
+        res.json.return_value = [{'current': {'temperature_2m': t, 'weather_code': 61}} for t in temperatures]
+        res.content = b'x' * 100
+        return res
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_misses_fetched_in_one_call(self, mock_get):
+        mock_get.return_value = self.upstream([21.0, 30.0])
+        # Two of the three share a cell
+        response = self.client.post('/api/current/batch/', [
+            {'lat': 11.01, 'lon': 76.96, 'city': 'Coimbatore'},
+            {'lat': 13.08, 'lon': 80.27, 'city': 'Chennai'},
+            {'lat': 10.98, 'lon': 76.99},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertIn('latitude=11.0,13.1&longitude=77.0,80.3', mock_get.call_args[0][0])
+        self.assertEqual(response.data['temperature'], [21.0, 30.0, 21.0])
+        self.assertEqual(response.data['city'], ['Coimbatore', 'Chennai', None])
+        self.assertEqual(response.data['description'], ['Rainy'] * 3)
+        self.assertEqual(response.data['cache'], ['MISS'] * 3)
+
+        # Cached cells come from memory; only the new one goes upstream
+        mock_get.return_value = self.upstream([15.0])
+        response = self.client.get('/api/current/batch/?lat=11.0,28.6,13.1&lon=77.0,77.2,80.3')
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertIn('latitude=28.6&longitude=77.2', mock_get.call_args[0][0])
+        self.assertEqual(response.data['temperature'], [21.0, 15.0, 30.0])
+        self.assertEqual(response.data['cache'], ['HIT', 'MISS', 'HIT'])
+
+    @patch('prediction.upstream.UpstreamClient.get')
+    def test_invalid_locations_and_upstream_failure(self, mock_get):
+        self.cache.get_or_fetch(self.cache.cell(11.0, 77.0)[0], lambda: ({'current': {'temperature_2m': 21.0}}, 10))
+        mock_get.side_effect = OSError('down')
+        response = self.client.post('/api/current/batch/', [
+            {'lat': 11.0, 'lon': 77.0}, {'lat': 'x', 'lon': 1}, {'lat': 13.0, 'lon': 80.0}
+        ], format='json')
+        self.assertEqual(response.data['temperature'], [21.0, None, None])
+        self.assertEqual([e['index'] for e in response.data['errors']], [1, 2])
+        self.assertIn('down', response.data['errors'][1]['error'])
+
+    def test_request_limits(self):
+        self.assertEqual(self.client.post('/api/current/batch/', {}, format='json').status_code, 400)
+        self.assertEqual(self.client.get('/api/current/batch/?lat=1,2&lon=3').status_code, 400)
+        with self.settings(CURRENT_BATCH_MAX_LOCATIONS=2):
+            response = self.client.post('/api/current/batch/', [{'lat': 1, 'lon': 1}] * 3, format='json')
+        self.assertEqual(response.status_code, 400)
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_single_location_horizon(self):
+        response = self.client.get('/api/forecast/?horizon=5&temperature=20&humidity=60&rainfall=1&wind_speed=10')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['horizon'], 5)
+        self.assertEqual(len(response.data['temperature']), 1)
+        self.assertEqual(len(response.data['temperature'][0]), 5)
+        self.assertTrue(all(r >= 0 for r in response.data['rainfall'][0]))
+
+    def test_first_step_matches_one_step_prediction(self):
+        row = {'temperature': 6, 'humidity': 65, 'rainfall': 2, 'wind_speed': 15}
+        forecast = self.client.post('/api/forecast/?horizon=3', [row], format='json')
+        single = self.client.post('/api/predict_lstm/', row, format='json')
+        self.assertEqual(forecast.data['temperature'][0][0], single.data['predicted_temperature'])
+
+    def test_many_locations_with_invalid_row(self):
+        rows = [
+            {'temperature': 20, 'humidity': 60, 'rainfall': 0, 'wind_speed': 5},
+            {'temperature': 'x', 'humidity': 60, 'rainfall': 0, 'wind_speed': 5},
+            {'temperature': 35, 'humidity': 30, 'rainfall': 0, 'wind_speed': 20},
+        ]
+        response = self.client.post('/api/forecast/', {'rows': rows, 'horizon': 4}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['succeeded'], 2)
+        self.assertIsNone(response.data['temperature'][1])
+        self.assertEqual([len(r) for r in response.data['rainfall'] if r], [4, 4])
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+    def test_horizon_out_of_range(self):
+        response = self.client.get('/api/forecast/?horizon=0')
+        self.assertEqual(response.status_code, 400)
+
+class PredictModelViewsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.row = {'temperature': 30, 'humidity': 70, 'rainfall': 2, 'wind_speed': 12}
+
+    def test_condition_uses_classifier(self):
+        response = self.client.post('/api/predict_condition/', self.row, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(response.data['condition'], ('Rainy', 'Sunny'))
+        self.assertNotIn('fallback', response.data)
+
+    def test_ensemble_breakdown(self):
+        response = self.client.post('/api/predict_ensemble/', self.row, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['breakdown']), {'Random Forest', 'Linear Regression'})
+
+    def test_repeated_prediction_served_from_cache(self):
+        first = self.client.post('/api/predict_fast/', self.row, format='json')
+        second = self.client.post('/api/predict_fast/', dict(self.row, temperature=30.01), format='json')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        status_response = self.client.get('/api/status/')
+        self.assertGreaterEqual(status_response.data['prediction_cache']['hits'], 1)
+
+    def test_prediction_reports_model_version(self):
+        response = self.client.post('/api/predict/', self.row, format='json')
+        status_response = self.client.get('/api/status/')
+        self.assertEqual(response.data['model_version'], status_response.data['model_version'])
+        self.assertIn('model_temp.pkl', status_response.data['model_registry']['artifacts'])
+
+    def test_liveness_and_readiness(self):
+        health = self.client.get('/api/health/')
+        self.assertEqual(health.status_code, 200)
+        self.client.post('/api/predict/', self.row, format='json')
+        status_response = self.client.get('/api/status/')
+        self.assertEqual(status_response.status_code, 200)
+        self.assertTrue(status_response.data['ready'])
+        self.assertEqual(status_response.data['model_state'], 'ready')
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from .artifacts import export_artifacts, load_artifacts
+from .registry import load_lstm, load_model_set
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'ml_models')
+
+
+def is_mapped(array):
+    # Views of a memmap (e.g. the intp traversal arrays) lose the subclass
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+class ArtifactExportTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model_dir = tempfile.mkdtemp()
+        for name in os.listdir(MODEL_DIR):
+            if name.endswith(('.pkl', '.h5')):
+                shutil.copy2(os.path.join(MODEL_DIR, name), cls.model_dir)
+        export_artifacts(cls.model_dir)
+        cls.pickled = load_model_set(cls.model_dir, model_format='pickle')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.model_dir)
+        super().tearDownClass()
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.X = rng.uniform([0, 30, 0, 0], [40, 100, 20, 40], size=(200, 4)).astype(np.float32)
+
+    def test_mapped_models_match_pickles(self):
+        mapped = load_artifacts(self.model_dir)
+        for key in ('model_temp', 'rf_temp', 'rf_rain', 'lr_temp', 'lr_rain'):
+            np.testing.assert_allclose(mapped[key].predict(self.X), self.pickled[key].predict(self.X), rtol=1e-6)
+        np.testing.assert_array_equal(
+            mapped['model_classifier'].predict(self.X), self.pickled['model_classifier'].predict(self.X)
+        )
+        np.testing.assert_allclose(
+            mapped['scaler'].transform(self.X), self.pickled['scaler'].transform(self.X), rtol=1e-6
+        )
+        windows = np.repeat(self.X[:16, None, :], 3, axis=1)
+        np.testing.assert_allclose(
+            load_lstm(self.model_dir, mapped).predict(windows),
+            load_lstm(self.model_dir, self.pickled).predict(windows),
+            rtol=1e-5, atol=1e-5
+        )
+
+    def test_arrays_are_memory_mapped(self):
+        mapped = load_artifacts(self.model_dir)
+        forest = mapped['rf_temp']
+        for array in forest.traversal_arrays().values():
+            self.assertTrue(is_mapped(array))
+        self.assertTrue(is_mapped(mapped['lstm_engine'].layers[0]['kernel']))
+
+    def test_load_model_set_prefers_fresh_export(self):
+        models = load_model_set(self.model_dir)
+        self.assertTrue(is_mapped(models['rf_temp'].threshold))
+        self.assertIsNotNone(models['ensemble'])
+
+    def test_mapped_forest_unpickles_sklearn_for_large_batches(self):
+        forest = load_model_set(self.model_dir, forest_sklearn_min_rows=2)['rf_temp']
+        self.assertIsNone(forest._sklearn)
+        X = np.array([[25, 60, 0, 10], [30, 80, 5, 20]], dtype=np.float32)
+        np.testing.assert_allclose(forest.predict(X), self.pickled['rf_temp'].predict(X), rtol=1e-5, atol=1e-5)
+        self.assertTrue(hasattr(forest._sklearn, 'estimators_'))
+
+    def test_changed_source_makes_export_stale(self):
+        path = os.path.join(self.model_dir, 'lr_model_temp.pkl')
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        try:
+            self.assertIsNone(load_artifacts(self.model_dir))
+            models = load_model_set(self.model_dir)
+            self.assertFalse(is_mapped(models['rf_temp'].threshold))
+        finally:
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
@@ -0,0 +1,116 @@
+import json
+import threading
+from unittest.mock import AsyncMock, Mock, patch
+
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase
+
+from . import views
+from .async_views import (AsyncCitySearchView, AsyncCurrentWeatherBatchView, AsyncCurrentWeatherView,
+                          AsyncReverseGeocodeView, offload)
+from .citysearch import PrefixCache
+from .gridcache import GridCache
+from .test_api import isolate_upstreams
+
+
+def upstream_response(payload):
+    res = Mock()
+    res.json.return_value = payload
+    res.content = b'x' * 100
+    return res
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        isolate_upstreams(self)
+        for target, value in (('prediction.views._CURRENT_CACHE', GridCache()),
+                              ('prediction.views._SEARCH_CACHE', PrefixCache()),
+                              ('prediction.views.get_places', Mock(return_value=None))):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch('prediction.upstream.AsyncUpstreamClient.get', new_callable=AsyncMock)
+        self.upstream = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_current_weather_is_cached_per_cell(self):
+        self.upstream.return_value = upstream_response({'current': {'temperature_2m': 21.0, 'weather_code': 61}})
+        view = AsyncCurrentWeatherView.as_view()
+        first = await view(self.factory.get('/api/current/?lat=11.01&lon=76.96'))
+        second = await view(self.factory.get('/api/current/?lat=10.98&lon=76.99&city=Nearby'))
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(self.upstream.await_count, 1)
+        self.assertIn('latitude=11.0&longitude=77.0', self.upstream.await_args[0][0])
+        self.assertIn(b'"description": "Rainy"', second.content)
+        self.assertIn(b'"city": "Nearby"', second.content)
+
+    async def test_current_weather_fields_and_conditional_get(self):
+        self.upstream.return_value = upstream_response({'current': {'temperature_2m': 21.0},
+                                                        'hourly': {'rain': [0.5, 0.0]}})
+        view = AsyncCurrentWeatherView.as_view()
+        first = await view(self.factory.get('/api/current/?lat=11.0&lon=77.0&fields=temperature,hourly&encoding=packed'))
+        data = json.loads(first.content)
+        self.assertEqual(set(data), {'temperature', 'hourly', 'encoding'})
+        self.assertEqual(data['hourly']['rain']['dtype'], 'float32')
+        again = await view(self.factory.get('/api/current/?lat=11.0&lon=77.0&fields=temperature,hourly&encoding=packed',
+                                            headers={'If-None-Match': first['ETag']}))
+        self.assertEqual(again.status_code, 304)
+        bad = await view(self.factory.get('/api/current/?fields=nope'))
+        self.assertEqual(bad.status_code, 400)
+
+    async def test_current_weather_falls_back(self):
+        self.upstream.side_effect = OSError('down')
+        response = await AsyncCurrentWeatherView.as_view()(self.factory.get('/api/current/?lat=11.0&lon=77.0'))
+        self.assertIn(b'"fallback": true', response.content)
+
+    async def test_current_weather_batch(self):
+        self.upstream.return_value = upstream_response([{'current': {'temperature_2m': t}} for t in (21.0, 30.0)])
+        view = AsyncCurrentWeatherBatchView.as_view()
+        response = await view(self.factory.post('/api/current/batch/', [
+            {'lat': 11.0, 'lon': 77.0}, {'lat': 13.1, 'lon': 80.3}, {'lat': 11.01, 'lon': 77.01}
+        ], content_type='application/json'))
+        data = json.loads(response.content)
+        self.assertEqual(data['temperature'], [21.0, 30.0, 21.0])
+        self.assertEqual(self.upstream.await_count, 1)
+        response = await view(self.factory.get('/api/current/batch/?lat=11.0,13.1&lon=77.0,80.3'))
+        self.assertEqual(json.loads(response.content)['cache'], ['HIT', 'HIT'])
+        self.assertEqual(self.upstream.await_count, 1)
+
+    async def test_city_search_merges_upstream(self):
+        self.upstream.return_value = upstream_response({'results': [
+            {'id': 1, 'name': 'Qwertyville', 'latitude': 1.0, 'longitude': 2.0, 'country': 'Nowhere'}
+        ]})
+        view = AsyncCitySearchView.as_view()
+        first = await view(self.factory.get('/api/search-city/?name=Qwer'))
+        second = await view(self.factory.get('/api/search-city/?name=Qwerty'))
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertIn(b'Qwertyville', second.content)
+        self.assertEqual(self.upstream.await_args[1]['params'], {'name': 'Qwer', 'count': 10})
+
+    async def test_reverse_geocode_races_providers_and_caches(self):
+        self.upstream.return_value = upstream_response({
+            'address': {'neighbourhood': 'RS Puram', 'city': 'Coimbatore', 'state': 'Tamil Nadu', 'country_code': 'in'}
+        })
+        view = AsyncReverseGeocodeView.as_view()
+        first = await view(self.factory.get('/api/reverse-geocode/?latitude=11.0168&longitude=76.9558'))
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertIn(b'OpenStreetMap', first.content)
+        calls = self.upstream.await_count
+        second = await view(self.factory.get('/api/reverse-geocode/?latitude=11.0169&longitude=76.9559'))
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(self.upstream.await_count, calls)
+
+    async def test_reverse_geocode_fallback(self):
+        self.upstream.side_effect = OSError('down')
+        response = await AsyncReverseGeocodeView.as_view()(
+            self.factory.get('/api/reverse-geocode/?latitude=-40&longitude=-120'))
+        self.assertIn(b'"source": "Fallback"', response.content)
+
+    async def test_offload_runs_view_on_inference_executor(self):
+        def view(request):
+            return HttpResponse(threading.current_thread().name)
+
+        response = await offload(view)(self.factory.get('/api/predict/'))
+        self.assertTrue(response.content.startswith(b'inference'))
+        self.assertIsNotNone(views._INFERENCE_EXECUTOR)
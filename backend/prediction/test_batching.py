@@ -0,0 +1,69 @@
+import threading
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .batching import MicroBatcher
+
+
+class MicroBatcherTests(SimpleTestCase):
+    def test_concurrent_requests_share_one_forward_pass(self):
+        calls = []
+
+        def batch_fn(batch):
+            calls.append(len(batch))
+            time.sleep(0.01)
+            return batch.sum(axis=(1, 2), keepdims=True)[:, 0]
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=16, max_wait_ms=50)
+        results = {}
+
+        def worker(i):
+            results[i] = batcher.submit(np.full((3, 4), i, dtype=np.float32))
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual({i: float(r[0]) for i, r in results.items()}, {i: 12.0 * i for i in range(8)})
+        self.assertLess(len(calls), 8)
+        stats = batcher.stats()
+        self.assertEqual(stats['items'], 8)
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertGreater(stats['largest_batch'], 1)
+
+    def test_errors_propagate_to_every_caller(self):
+        def batch_fn(batch):
+            raise RuntimeError('boom')
+
+        batcher = MicroBatcher(batch_fn, max_wait_ms=0)
+        with self.assertRaises(RuntimeError):
+            batcher.submit(np.zeros((3, 4)))
+        self.assertEqual(batcher.stats()['errors'], 1)
+
+    def test_groups_are_batched_separately(self):
+        calls = []
+
+        def batch_fn(batch, group):
+            calls.append((group, len(batch)))
+            time.sleep(0.01)
+            return batch[:, 0, 0] * group
+
+        batcher = MicroBatcher(batch_fn, max_batch_size=16, max_wait_ms=50)
+        results = {}
+
+        def worker(i):
+            results[i] = batcher.submit(np.full((3, 4), 1, dtype=np.float32), group=1 + i % 2)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, {i: 1 + i % 2 for i in range(6)})
+        self.assertEqual(sum(n for _, n in calls), 6)
+        self.assertEqual({g for g, _ in calls}, {1, 2})
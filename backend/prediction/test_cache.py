@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .cache import PredictionCache
+
+QUANTIZATION = {'temperature': 0.5, 'humidity': 1, 'rainfall': 0.1, 'wind_speed': 1}
+
+
+class PredictionCacheTests(SimpleTestCase):
+    def test_quantized_inputs_share_an_entry(self):
+        cache = PredictionCache(quantization=QUANTIZATION)
+        calls = []
+
+        def compute(x):
+            calls.append(x)
+            return {'value': float(x[0])}
+
+        first, hit = cache.get_or_compute('predict', [30.1, 70.2, 2.01, 12.4], compute)
+        second, hit_again = cache.get_or_compute('predict', [29.9, 69.8, 1.99, 11.6], compute)
+        self.assertFalse(hit)
+        self.assertTrue(hit_again)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+        np.testing.assert_allclose(calls[0], [30.0, 70.0, 2.0, 12.0], atol=1e-5)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_lru_eviction_and_ttl(self):
+        cache = PredictionCache(max_entries=2, ttl=0.05, quantization=QUANTIZATION)
+        for t in (10, 20, 30):
+            cache.get_or_compute('predict', [t, 50, 0, 5], lambda x: {'t': float(x[0])})
+        self.assertEqual(cache.stats()['entries'], 2)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        time.sleep(0.06)
+        _, hit = cache.get_or_compute('predict', [30, 50, 0, 5], lambda x: {'t': float(x[0])})
+        self.assertFalse(hit)
+        self.assertEqual(cache.stats()['expired'], 1)
+
+    def test_model_version_change_invalidates(self):
+        cache = PredictionCache(quantization=QUANTIZATION)
+        cache.get_or_compute('predict', [30, 50, 0, 5], lambda x: {'v': 1}, version='v1')
+        value, hit = cache.get_or_compute('predict', [30, 50, 0, 5], lambda x: {'v': 2}, version='v2')
+        self.assertFalse(hit)
+        self.assertEqual(value, {'v': 2})
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    def test_unversioned_lookups_do_not_invalidate(self):
+        cache = PredictionCache(quantization=QUANTIZATION)
+        x = [30, 50, 0, 5]
+        hits = []
+        for _ in range(2):
+            hits.append(cache.get_or_compute('predict', x, lambda x: {'v': 1}, version='v1')[1])
+            hits.append(cache.get_or_compute('predict_fast', x, lambda x: {'f': 1})[1])
+        self.assertEqual(hits, [False, False, True, True])
+        self.assertEqual(cache.stats()['invalidations'], 0)
+        # A real version change drops the versioned entries only
+        cache.get_or_compute('predict', x, lambda x: {'v': 2}, version='v2')
+        self.assertTrue(cache.get_or_compute('predict_fast', x, lambda x: {'f': 2})[1])
+        self.assertEqual(cache.stats()['invalidations'], 1)
+
+    def test_none_results_are_not_cached(self):
+        cache = PredictionCache(quantization=QUANTIZATION)
+        cache.get_or_compute('predict', [30, 50, 0, 5], lambda x: None)
+        self.assertEqual(cache.stats()['entries'], 0)
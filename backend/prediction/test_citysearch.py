@@ -0,0 +1,88 @@
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from .citysearch import CityPrefixIndex, PrefixCache, merge_results, normalize
+from .places import PlaceIndex
+
+PLACES = [
+    ('Coimbatore', 'Tamil Nadu', 'IN', 11.00555, 76.96612, 2136916),
+    ('Coimbra', 'Coimbra', 'PT', 40.20564, -8.41955, 106582),
+    ('Coín', 'Andalusia', 'ES', 36.65947, -4.75639, 21582),
+    ('Chennai', 'Tamil Nadu', 'IN', 13.08784, 80.27847, 4646732),
+    ('São Paulo', 'São Paulo', 'BR', -23.5475, -46.63611, 10021295),
+]
+
+
+class CityPrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'places.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'admin1', 'country', 'latitude', 'longitude', 'population'])
+            writer.writerows(PLACES)
+        self.index = CityPrefixIndex(PlaceIndex.from_csv(path), {'IN': 'India'})
+
+    def test_prefix_ranked_by_population(self):
+        self.assertEqual([r['name'] for r in self.index.search('Coi')], ['Coimbatore', 'Coimbra', 'Coín'])
+        self.assertEqual([r['name'] for r in self.index.search('coim', count=1)], ['Coimbatore'])
+
+    def test_accents_and_case_are_ignored(self):
+        self.assertEqual(self.index.search('sao p')[0]['name'], 'São Paulo')
+        self.assertEqual(self.index.search('COIN')[0]['name'], 'Coín')
+
+    def test_open_meteo_fields(self):
+        result = self.index.search('Chen')[0]
+        self.assertEqual(result['country'], 'India')
+        self.assertEqual((result['latitude'], result['longitude']), (13.08784, 80.27847))
+        self.assertEqual(self.index.search('Coimbra')[0]['country'], 'PT')
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search('xyz'), [])
+        self.assertEqual(self.index.search('  '), [])
+
+
+class PrefixCacheTests(SimpleTestCase):
+    RESULTS = [{'name': 'Coimbatore'}, {'name': 'Coimbra'}, {'name': 'Coín'}]
+
+    def test_complete_answer_serves_longer_queries(self):
+        cache = PrefixCache()
+        cache.set('Coi', self.RESULTS, complete=True)
+        self.assertEqual(cache.get('coi'), self.RESULTS)
+        self.assertEqual([r['name'] for r in cache.get('Coimb')], ['Coimbatore', 'Coimbra'])
+        self.assertEqual(cache.get('Coiz'), [])
+        self.assertIsNone(cache.get('Coz'))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['prefix_hits'], stats['misses']), (1, 2, 1))
+
+    def test_truncated_answer_only_serves_itself(self):
+        cache = PrefixCache()
+        cache.set('Coi', self.RESULTS, complete=False)
+        self.assertIsNotNone(cache.get('Coi'))
+        self.assertIsNone(cache.get('Coim'))
+
+    def test_ttl_and_lru(self):
+        cache = PrefixCache(max_entries=1, ttl=0.05)
+        cache.set('a', [], complete=True)
+        cache.set('b', [], complete=True)
+        self.assertIsNone(cache.get('a'))
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('b'))
+
+
+class MergeTests(SimpleTestCase):
+    def test_duplicates_dropped_and_count_kept(self):
+        upstream = [{'name': 'Coimbatore', 'latitude': 11.00555, 'longitude': 76.96612}]
+        local = [{'name': 'coimbatore', 'latitude': 11.0056, 'longitude': 76.9661},
+                 {'name': 'Coimbra', 'latitude': 40.2, 'longitude': -8.4},
+                 {'name': 'Coín', 'latitude': 36.7, 'longitude': -4.8}]
+        self.assertEqual([r['name'] for r in merge_results(upstream, local, 2)], ['Coimbatore', 'Coimbra'])
+
+    def test_normalize(self):
+        self.assertEqual(normalize('  São   PAULO '), 'sao paulo')
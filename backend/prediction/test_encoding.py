@@ -0,0 +1,59 @@
+import base64
+import os
+import time
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .encoding import pack_series, parse_fields, select_fields
+
+
+def unpack(packed):
+    return np.frombuffer(base64.b64decode(packed['data']), dtype=packed['dtype'])
+
+
+class EncodingTests(SimpleTestCase):
+    def test_parse_fields(self):
+        self.assertIsNone(parse_fields('', ('a', 'b')))
+        self.assertEqual(parse_fields(' a, b.x ,a', ('a', 'b')), ('a', 'b.x'))
+        with self.assertRaises(ValueError):
+            parse_fields('c', ('a', 'b'))
+
+    def test_select_fields(self):
+        payload = {'a': 1, 'b': {'time': [1, 2], 'x': [3, 4], 'y': [5, 6]}}
+        self.assertEqual(select_fields(payload, ('b.y',)), {'b': {'time': [1, 2], 'y': [5, 6]}})
+        self.assertEqual(select_fields(payload, ('b.x', 'b')), {'b': payload['b']})
+        self.assertEqual(select_fields(payload, ('b', 'b.x')), {'b': payload['b']})
+        self.assertEqual(select_fields(payload, ('a', 'b.z')), {'a': 1, 'b': {'time': [1, 2]}})
+
+    def test_numbers_pack_to_smallest_dtype(self):
+        self.assertEqual(unpack(pack_series([1, -2, 300])).tolist(), [1, -2, 300])
+        self.assertEqual(pack_series([1, 2, 40000])['dtype'], 'float32')
+        floats = unpack(pack_series([1.5, None, 2]))
+        self.assertEqual(floats.dtype, np.float32)
+        self.assertTrue(np.isnan(floats[1]))
+
+    def test_times(self):
+        self.assertEqual(pack_series(['2026-10-18', '2026-10-19', '2026-10-20']),
+                         {'start': '2026-10-18', 'step': 86400, 'count': 3})
+        uneven = ['2026-10-18T00:00', '2026-10-18T01:00', '2026-10-18T03:00']
+        self.assertEqual(pack_series(uneven), uneven)
+        self.assertEqual(pack_series(['a', 'b']), ['a', 'b'])
+        self.assertEqual(pack_series([True, False]), [True, False])
+        self.assertEqual(pack_series([]), [])
+
+    def test_times_ignore_server_time_zone(self):
+        # 01:00 happens twice in New York that night; open-meteo's local
+        # times are still one hour apart
+        times = ['2026-11-01T00:00', '2026-11-01T01:00', '2026-11-01T02:00']
+        saved = os.environ.get('TZ')
+        os.environ['TZ'] = 'America/New_York'
+        time.tzset()
+        try:
+            self.assertEqual(pack_series(times), {'start': times[0], 'step': 3600, 'count': 3})
+        finally:
+            if saved is None:
+                del os.environ['TZ']
+            else:
+                os.environ['TZ'] = saved
+            time.tzset()
@@ -0,0 +1,50 @@
+import os
+import pickle
+
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from .ensemble import EnsemblePredictor, LinearMember
+from .forest import compile_forest
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'ml_models')
+
+
+def load_models():
+    models = {}
+    for filename, key in (('rf_model_temp.pkl', 'rf_temp'), ('rf_model_rain.pkl', 'rf_rain'),
+                          ('lr_model_temp.pkl', 'lr_temp'), ('lr_model_rain.pkl', 'lr_rain')):
+        with open(os.path.join(MODEL_DIR, filename), 'rb') as f:
+            models[key] = pickle.load(f)
+    return models
+
+
+class EnsemblePredictorTests(SimpleTestCase):
+    def setUp(self):
+        self.models = load_models()
+        rng = np.random.default_rng(2)
+        self.X = rng.uniform([0, 30, 0, 0], [40, 100, 20, 40], size=(600, 4)).astype(np.float32)
+
+    def test_matches_separate_sklearn_predictions(self):
+        ensemble = EnsemblePredictor.from_models(self.models)
+        self.assertIsInstance(dict(ensemble.members)['Linear Regression'], LinearMember)
+        result = ensemble.predict(self.X[:5])
+        expected = {
+            'Random Forest': (self.models['rf_temp'], self.models['rf_rain']),
+            'Linear Regression': (self.models['lr_temp'], self.models['lr_rain']),
+        }
+        for name, (temp_model, rain_model) in expected.items():
+            np.testing.assert_allclose(result['members'][name][:, 0], temp_model.predict(self.X[:5]), rtol=1e-5)
+            np.testing.assert_allclose(result['members'][name][:, 1], rain_model.predict(self.X[:5]), rtol=1e-5)
+        np.testing.assert_allclose(result['mean'], np.mean(list(result['members'].values()), axis=0))
+
+    def test_parallel_batch_matches_serial(self):
+        models = dict(self.models, rf_temp=compile_forest(self.models['rf_temp']),
+                      rf_rain=compile_forest(self.models['rf_rain']))
+        # Two GIL-releasing members so large batches take the thread pool path
+        ensemble = EnsemblePredictor.from_models(dict(models, lr_temp=models['rf_temp'], lr_rain=models['rf_rain']))
+        serial = EnsemblePredictor(ensemble.members, max_workers=1)
+        np.testing.assert_array_equal(ensemble.predict(self.X)['mean'], serial.predict(self.X)['mean'])
+        self.assertIsNotNone(ensemble._executor)
+        ensemble.shutdown()
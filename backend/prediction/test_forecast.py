@@ -0,0 +1,33 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from .forecast import rollout
+
+
+class CountingModel:
+    """Predicts the window's mean temperature + 1 and counts predict calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, X):
+        self.calls.append(X.shape)
+        return X[:, :, 0].mean(axis=1, keepdims=True) + 1
+
+
+class RolloutTests(SimpleTestCase):
+    def test_one_forward_pass_per_step_for_all_locations(self):
+        model = CountingModel()
+        windows = np.zeros((50, 3, 4), dtype=np.float32)
+        windows[:, :, 1] = 60
+        out = rollout(model, windows, horizon=6)
+        self.assertEqual(out.shape, (50, 6, 4))
+        self.assertEqual(model.calls, [(50, 3, 4)] * 6)
+        # Humidity carries forward; the caller's windows are not modified
+        np.testing.assert_array_equal(out[:, :, 1], 60)
+        np.testing.assert_array_equal(windows[:, :, 0], 0)
+
+    def test_predictions_feed_back_into_window(self):
+        out = rollout(CountingModel(), np.zeros((1, 3, 4), dtype=np.float32), horizon=3)
+        # Step 1 sees [0, 0, 0] -> 1; step 2 sees [0, 0, 1] -> 4/3; step 3 [0, 1, 4/3]
+        np.testing.assert_allclose(out[0, :, 0], [1, 4 / 3, 1 + 7 / 9], rtol=1e-6)
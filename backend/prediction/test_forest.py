@@ -0,0 +1,65 @@
+import os
+import pickle
+from unittest.mock import Mock, patch
+
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from .forest import compile_forest
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'ml_models')
+
+
+def load(filename):
+    with open(os.path.join(MODEL_DIR, filename), 'rb') as f:
+        return pickle.load(f)
+
+
+class FlatForestTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.X = rng.uniform([0, 30, 0, 0], [40, 100, 20, 40], size=(500, 4)).astype(np.float32)
+
+    def test_regressors_match_sklearn(self):
+        for filename in ('rf_model_temp.pkl', 'rf_model_rain.pkl'):
+            model = load(filename)
+            flat = compile_forest(model)
+            self.assertEqual(flat.feature.dtype, np.int32)
+            self.assertEqual(flat.threshold.dtype, np.float32)
+            np.testing.assert_allclose(flat.predict(self.X), model.predict(self.X), rtol=1e-5, atol=1e-5)
+            self.assertAlmostEqual(flat.predict(self.X[0])[0], model.predict(self.X[:1])[0], places=4)
+
+    def test_classifier_matches_sklearn(self):
+        model = load('model_classifier.pkl')
+        flat = compile_forest(model)
+        np.testing.assert_array_equal(flat.predict(self.X), model.predict(self.X))
+        np.testing.assert_allclose(flat.predict_proba(self.X), model.predict_proba(self.X), atol=1e-6)
+
+    def test_thresholds_exact_on_split_values(self):
+        # Inputs sitting exactly on a threshold must take the same branch as sklearn
+        model = load('rf_model_rain.pkl')
+        tree = model.estimators_[0].tree_
+        splits = tree.children_left != -1
+        X = np.tile(self.X[:1], (int(splits.sum()), 1))
+        X[np.arange(len(X)), tree.feature[splits]] = tree.threshold[splits].astype(np.float32)
+        np.testing.assert_allclose(compile_forest(model).predict(X), model.predict(X), rtol=1e-5, atol=1e-5)
+
+    def test_large_batches_go_to_sklearn(self):
+        model = load('model_classifier.pkl')
+        loads = []
+        flat = compile_forest(model).use_sklearn_from(100, loader=lambda: loads.append(1) or model)
+        with patch.object(model, 'predict', wraps=model.predict) as sklearn_predict:
+            np.testing.assert_array_equal(flat.predict(self.X[:99]), model.predict(self.X[:99]))
+            self.assertEqual((sklearn_predict.call_count, loads), (1, []))
+            np.testing.assert_array_equal(flat.predict(self.X), model.predict(self.X))
+            self.assertEqual(sklearn_predict.call_count, 3)
+        flat.predict_proba(self.X)
+        self.assertEqual(loads, [1])
+
+    def test_failed_sklearn_load_stays_flat(self):
+        model = load('rf_model_rain.pkl')
+        flat = compile_forest(model).use_sklearn_from(1, loader=Mock(side_effect=OSError('gone')))
+        np.testing.assert_allclose(flat.predict(self.X), model.predict(self.X), rtol=1e-5, atol=1e-5)
+        flat.predict(self.X)
+        self.assertIsNone(flat._sklearn_loader)
@@ -0,0 +1,101 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase
+
+from .geocache import GeocodeCache, geohash
+from .models import GeocodeCacheEntry
+
+RESULT = {'name': 'RS Puram, Coimbatore, Tamil Nadu', 'admin1': 'Tamil Nadu', 'source': 'OpenStreetMap'}
+
+
+class GeohashTests(SimpleTestCase):
+    def test_known_values(self):
+        self.assertEqual(geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash(0, 0, 5), 's0000')
+        self.assertEqual(geohash(-90, -180, 3), '000')
+
+    def test_nearby_points_share_a_cell(self):
+        self.assertEqual(geohash(11.0168, 76.9558), geohash(11.0169, 76.9559))
+        self.assertNotEqual(geohash(11.0168, 76.9558), geohash(11.03, 76.9558))
+
+
+class GeocodeCacheTests(TestCase):
+    def test_hot_then_database_hit(self):
+        cache = GeocodeCache()
+        self.assertIsNone(cache.get(11.0168, 76.9558))
+        cache.put(11.0168, 76.9558, RESULT)
+        self.assertEqual(cache.get(11.0169, 76.9559), RESULT)
+        self.assertEqual(GeocodeCacheEntry.objects.get(geohash=cache.key(11.0168, 76.9558)).result, RESULT)
+
+        # A fresh process only has the table
+        restarted = GeocodeCache()
+        self.assertEqual(restarted.get(11.0168, 76.9558), RESULT)
+        stats = restarted.stats()
+        self.assertEqual((stats['db_hits'], stats['hot_entries'], stats['persistent']), (1, 1, True))
+
+    def test_expired_entries_are_misses(self):
+        cache = GeocodeCache(ttl=-1)
+        cache.put(11.0168, 76.9558, RESULT)
+        self.assertIsNone(cache.get(11.0168, 76.9558))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_put_overwrites_and_hot_tier_is_bounded(self):
+        cache = GeocodeCache(hot_size=2)
+        cache.put(11.0168, 76.9558, RESULT)
+        cache.put(11.0168, 76.9558, dict(RESULT, name='RS Puram'))
+        cache.put(13.0827, 80.2707, RESULT)
+        cache.put(19.0760, 72.8777, RESULT)
+        self.assertEqual(cache.stats()['hot_entries'], 2)
+        self.assertEqual(cache.stored(), 3)
+        self.assertEqual(cache.get(11.0168, 76.9558)['name'], 'RS Puram')
+
+    def test_missing_table_keeps_memory_tier(self):
+        cache = GeocodeCache()
+        with patch.object(GeocodeCacheEntry.objects, 'update_or_create', side_effect=OperationalError('no such table: prediction_geocodecacheentry')):
+            cache.put(11.0168, 76.9558, RESULT)
+        self.assertEqual(cache.get(11.0168, 76.9558), RESULT)
+        self.assertFalse(cache.stats()['persistent'])
+        self.assertIsNone(cache.stored())
+
+    def test_transient_error_keeps_persistence(self):
+        cache = GeocodeCache()
+        with patch.object(GeocodeCacheEntry.objects, 'update_or_create', side_effect=OperationalError('database is locked')):
+            cache.put(11.0168, 76.9558, RESULT)
+        stats = cache.stats()
+        self.assertEqual((stats['db_errors'], stats['persistent']), (1, True))
+        cache.put(13.0827, 80.2707, RESULT)
+        cache.clear_hot()
+        self.assertEqual(cache.get(13.0827, 80.2707), RESULT)
+        self.assertEqual(cache.stored(), 1)
+
+
+class WarmGeocodeCacheCommandTests(TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w') as f:
+            f.write('latitude,longitude\n11.0168,76.9558\n11.0169,76.9559\n13.0827,80.2707\n-40,-120\n')
+        self.addCleanup(os.remove, self.path)
+        patcher = patch('prediction.views._GEOCACHE', GeocodeCache())
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resolves_each_cell_once(self):
+        def resolve(client, lat, lon):
+            return None if lat < 0 else dict(RESULT, name=f"{lat},{lon}")
+
+        out = StringIO()
+        with patch('prediction.views._GEOCODER.resolve', side_effect=resolve) as mock_resolve:
+            call_command('warm_geocode_cache', self.path, '--workers', '2', stdout=out)
+        self.assertEqual(mock_resolve.call_count, 3)
+        self.assertEqual(GeocodeCacheEntry.objects.count(), 2)
+        self.assertIn('Stored 2 cells', out.getvalue())
+
+        # Cached cells are not asked again
+        with patch('prediction.views._GEOCODER.resolve', side_effect=resolve) as mock_resolve:
+            call_command('warm_geocode_cache', self.path, '--skip-cached', stdout=StringIO())
+        self.assertEqual(mock_resolve.call_count, 1)
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from .geocode import PROVIDERS, GeocodeResolver, Provider, default_providers
+from .health import UpstreamHealth
+
+
+def provider(name, delay=0.0, result=True, error=None, calls=None):
+    """A fake provider answering ``{'name': name}`` after ``delay`` seconds."""
+    def fetch(client, lat, lon, timeout):
+        if calls is not None:
+            calls.append((name, timeout))
+        # Like a real client, give up at the timeout (a little late, so the
+        # resolver's own deadline is what the deadline tests observe)
+        time.sleep(min(delay, timeout + 0.2))
+        if error is not None:
+            raise error
+        if delay > timeout:
+            raise TimeoutError(name)
+        return {'name': name, 'source': name} if result else None
+    return Provider(name, fetch, 10)
+
+
+def async_provider(name, delay=0.0, result=True, error=None, calls=None):
+    """``provider`` as a coroutine; ``calls`` also records cancellations."""
+    async def afetch(client, lat, lon, timeout):
+        if calls is not None:
+            calls.append(name)
+        try:
+            await asyncio.sleep(min(delay, timeout + 0.2))
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append(f"{name} cancelled")
+            raise
+        if error is not None:
+            raise error
+        if delay > timeout:
+            raise TimeoutError(name)
+        return {'name': name, 'source': name} if result else None
+    return Provider(name, None, 10, afetch)
+
+
+class GeocodeResolverTests(SimpleTestCase):
+    def resolve(self, providers, **kwargs):
+        resolver = GeocodeResolver(providers, **kwargs)
+        start = time.monotonic()
+        result = resolver.resolve(None, 11.0, 77.0)
+        return result, time.monotonic() - start, resolver
+
+    def test_preferred_provider_wins_even_when_slower(self):
+        result, _, resolver = self.resolve([provider('a', 0.2), provider('b', 0.0)], hedge_delay=0)
+        self.assertEqual(result['name'], 'a')
+        self.assertEqual(resolver.stats()['wins']['a'], 1)
+
+    def test_falls_through_failures_in_order(self):
+        result, _, _ = self.resolve([provider('a', error=OSError('down')), provider('b', result=False),
+                                     provider('c', 0.1), provider('d')], hedge_delay=0)
+        self.assertEqual(result['name'], 'c')
+
+    def test_latency_is_max_not_sum(self):
+        providers = [provider('a', 0.3, result=False), provider('b', 0.3, result=False), provider('c', 0.3)]
+        result, elapsed, _ = self.resolve(providers, hedge_delay=0)
+        self.assertEqual(result['name'], 'c')
+        self.assertLess(elapsed, 0.6)
+
+    def test_deadline_returns_best_answer_in_hand(self):
+        result, elapsed, resolver = self.resolve([provider('a', 1), provider('b', 0.05)], deadline=0.3, hedge_delay=0)
+        self.assertEqual(result['name'], 'b')
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(resolver.stats()['deadline_exceeded'], 1)
+
+    def test_deadline_with_nothing_returns_none(self):
+        result, elapsed, _ = self.resolve([provider('a', 1), provider('b', 1)], deadline=0.2, hedge_delay=0)
+        self.assertIsNone(result)
+        self.assertLess(elapsed, 0.5)
+
+    def test_timeouts_are_capped_at_the_deadline(self):
+        calls = []
+        self.resolve([provider('a', 0.0, calls=calls)], deadline=1.5)
+        self.assertLessEqual(calls[0][1], 1.5)
+
+    def test_hedging_spares_later_providers(self):
+        calls = []
+        result, _, resolver = self.resolve([provider('a', 0.0, calls=calls), provider('b', calls=calls)], hedge_delay=0.5)
+        self.assertEqual(result['name'], 'a')
+        self.assertEqual([c[0] for c in calls], ['a'])
+
+    def test_failure_starts_next_provider_without_waiting_for_hedge(self):
+        result, elapsed, _ = self.resolve([provider('a', error=OSError('down')), provider('b')], hedge_delay=5)
+        self.assertEqual(result['name'], 'b')
+        self.assertLess(elapsed, 1)
+
+    def test_slow_provider_is_hedged(self):
+        result, elapsed, resolver = self.resolve([provider('a', 0.5, result=False), provider('b', 0.0)],
+                                                 hedge_delay=0.1)
+        self.assertEqual(result['name'], 'b')
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual(resolver.stats()['lookups'], 1)
+
+    def test_concurrent_lookups(self):
+        resolver = GeocodeResolver([provider('a', 0.1)], max_workers=2)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve(None, 1, 2))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([r['name'] for r in results], ['a'] * 4)
+
+
+class AsyncResolveTests(SimpleTestCase):
+    async def test_preference_and_fall_through(self):
+        resolver = GeocodeResolver([async_provider('a', error=OSError('down')), async_provider('b', 0.1, result=False),
+                                    async_provider('c', 0.2), async_provider('d')], hedge_delay=0)
+        self.assertEqual((await resolver.aresolve(None, 11.0, 77.0))['name'], 'c')
+
+    async def test_losers_are_cancelled_at_the_deadline(self):
+        calls = []
+        resolver = GeocodeResolver([async_provider('a', 1, calls=calls), async_provider('b', 0.05, calls=calls)],
+                                   deadline=0.3, hedge_delay=0)
+        start = time.monotonic()
+        result = await resolver.aresolve(None, 11.0, 77.0)
+        self.assertEqual(result['name'], 'b')
+        self.assertLess(time.monotonic() - start, 0.6)
+        await asyncio.sleep(0)
+        self.assertIn('a cancelled', calls)
+        self.assertEqual(resolver.stats()['cancelled'], 1)
+
+    async def test_hedging_spares_later_providers(self):
+        calls = []
+        resolver = GeocodeResolver([async_provider('a', calls=calls), async_provider('b', calls=calls)], hedge_delay=0.5)
+        self.assertEqual((await resolver.aresolve(None, 11.0, 77.0))['name'], 'a')
+        self.assertEqual(calls, ['a'])
+
+    async def test_many_lookups_on_one_loop(self):
+        resolver = GeocodeResolver([async_provider('a', 0.2)])
+        start = time.monotonic()
+        results = await asyncio.gather(*(resolver.aresolve(None, i, 0) for i in range(100)))
+        self.assertEqual({r['name'] for r in results}, {'a'})
+        self.assertLess(time.monotonic() - start, 1.5)
+
+
+class ProviderParsingTests(SimpleTestCase):
+    def test_nominatim_prefers_village(self):
+        class Client:
+            def get(self, url, headers=None, timeout=None):
+                class Res:
+                    def raise_for_status(self):
+                        pass
+
+                    def json(self):
+                        return {'address': {'village': 'Vadavalli', 'city': 'Coimbatore', 'state': 'Tamil Nadu',
+                                            'country_code': 'in'}}
+                return Res()
+
+        result = PROVIDERS[0].fetch(Client(), 11.02, 76.9, 1)
+        self.assertEqual(result['name'], 'Vadavalli, Coimbatore, Tamil Nadu')
+        self.assertEqual(result['country_code'], 'IN')
+
+
+class ProviderHealthTests(SimpleTestCase):
+    def test_open_breaker_skips_provider(self):
+        calls = []
+        health = UpstreamHealth(failure_threshold=2, cooldown=60)
+        resolver = GeocodeResolver([provider('a', error=OSError('bad key'), calls=calls), provider('b', calls=calls)],
+                                   hedge_delay=0, health=health)
+        for _ in range(3):
+            self.assertEqual(resolver.resolve(None, 11.0, 77.0)['name'], 'b')
+        self.assertEqual([name for name, _ in calls].count('a'), 2)
+        self.assertEqual(resolver.stats()['skipped'], 1)
+        self.assertEqual(resolver.stats()['providers'], ['b', 'a'])
+        self.assertEqual(health.stats()['upstreams']['a']['state'], 'open')
+
+    def test_fastest_provider_is_tried_first(self):
+        health = UpstreamHealth(min_samples=1)
+        health.record('a', True, 900.0)
+        health.record('b', True, 40.0)
+        resolver = GeocodeResolver([provider('a'), provider('b')], hedge_delay=1, health=health)
+        self.assertEqual(resolver.resolve(None, 11.0, 77.0)['name'], 'b')
+        self.assertEqual(resolver.stats()['wins'], {'a': 0, 'b': 1})
+
+    def test_locationiq_needs_a_key(self):
+        self.assertNotIn('LocationIQ', [p.name for p in default_providers()])
+        self.assertEqual([p.name for p in default_providers('pk.test')],
+                         ['OpenStreetMap', 'BigDataCloud', 'LocationIQ', 'Photon'])
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from .gridcache import GridCache
+
+
+class Fetcher:
+    """Counts calls and returns ``(value, nbytes)``; optionally fails or blocks."""
+
+    def __init__(self, value='v', nbytes=10, error=None):
+        self.value = value
+        self.nbytes = nbytes
+        self.error = error
+        self.calls = 0
+        self.gate = None
+
+    def __call__(self):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.value, self.nbytes
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class GridCacheTests(SimpleTestCase):
+    def test_cell_snaps_to_centre(self):
+        cache = GridCache(resolution=0.1)
+        key, centre = cache.cell(11.0168, 76.9558)
+        self.assertEqual(key, cache.cell('10.96', '77.04')[0])
+        self.assertEqual(centre, (11.0, 77.0))
+        self.assertNotEqual(key, cache.cell(11.06, 76.9558)[0])
+
+    def test_miss_then_hit(self):
+        cache = GridCache()
+        fetch = Fetcher()
+        self.assertEqual(cache.get_or_fetch('a', fetch), ('v', 'MISS'))
+        self.assertEqual(cache.get_or_fetch('a', fetch), ('v', 'HIT'))
+        self.assertEqual(fetch.calls, 1)
+        self.assertEqual(cache.stats()['hit_rate'], 0.5)
+
+    def test_stale_served_and_refreshed_in_background(self):
+        cache = GridCache(ttl=0, stale_ttl=60)
+        cache.get_or_fetch('a', Fetcher('old'))
+        refresh = Fetcher('new')
+        refresh.gate = threading.Event()
+        # Both reads are answered at once; only one refresh is started
+        self.assertEqual(cache.get_or_fetch('a', refresh), ('old', 'STALE'))
+        self.assertEqual(cache.get_or_fetch('a', refresh), ('old', 'STALE'))
+        refresh.gate.set()
+        wait_for(lambda: cache.stats()['refreshes'] == 1)
+        self.assertEqual(refresh.calls, 1)
+        self.assertEqual(cache._entries['a'][2], 'new')
+
+    def test_last_modified_tracks_the_value(self):
+        cache = GridCache()
+        old, new = ['old'], ['new']
+        self.assertIsNone(cache.last_modified('a', old))
+        before = time.time()
+        cache.get_or_fetch('a', Fetcher(old))
+        self.assertGreaterEqual(cache.last_modified('a', old), before)
+        cache._store('a', new, 10)
+        # A caller still holding the replaced value gets no timestamp for it
+        self.assertIsNone(cache.last_modified('a', old))
+        self.assertIsNotNone(cache.last_modified('a', new))
+
+    def test_failed_refresh_keeps_stale_entry(self):
+        cache = GridCache(ttl=0, stale_ttl=60)
+        cache.get_or_fetch('a', Fetcher('old'))
+        self.assertEqual(cache.get_or_fetch('a', Fetcher(error=OSError('down'))), ('old', 'STALE'))
+        wait_for(lambda: cache.stats()['refresh_errors'] == 1)
+        self.assertEqual(cache.get_or_fetch('a', Fetcher('new'))[0], 'old')
+
+    def test_expired_entry_is_fetched_synchronously(self):
+        cache = GridCache(ttl=0, stale_ttl=0)
+        cache.get_or_fetch('a', Fetcher('old'))
+        time.sleep(0.01)
+        self.assertEqual(cache.get_or_fetch('a', Fetcher('new')), ('new', 'MISS'))
+
+    def test_miss_error_propagates_and_is_not_cached(self):
+        cache = GridCache()
+        with self.assertRaises(OSError):
+            cache.get_or_fetch('a', Fetcher(error=OSError('down')))
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        cache = GridCache(max_bytes=25)
+        cache.get_or_fetch('a', Fetcher('a', 10))
+        cache.get_or_fetch('b', Fetcher('b', 10))
+        cache.get_or_fetch('a', Fetcher())  # 'a' is now the most recent
+        cache.get_or_fetch('c', Fetcher('c', 10))
+        self.assertEqual(list(cache._entries), ['a', 'c'])
+        stats = cache.stats()
+        self.assertEqual((stats['bytes'], stats['evictions']), (20, 1))
+
+    async def test_async_miss_hit_and_stale_refresh(self):
+        cache = GridCache(ttl=600, stale_ttl=60)
+        calls = []
+
+        async def fetch(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value, 10
+
+        self.assertEqual(await cache.aget_or_fetch('a', lambda: fetch('old')), ('old', 'MISS'))
+        self.assertEqual(await cache.aget_or_fetch('a', lambda: fetch('new')), ('old', 'HIT'))
+        cache.ttl = 0
+        self.assertEqual(await cache.aget_or_fetch('a', lambda: fetch('new')), ('old', 'STALE'))
+        self.assertEqual(await cache.aget_or_fetch('a', lambda: fetch('new')), ('old', 'STALE'))
+        await asyncio.gather(*cache._tasks)
+        self.assertEqual(calls, ['old', 'new'])
+        self.assertEqual(cache._entries['a'][2], 'new')
+
+    def test_many_keys_share_one_fetch(self):
+        cache = GridCache(ttl=600, stale_ttl=60)
+        cache.get_or_fetch('a', Fetcher('a'))
+        batches = []
+
+        def fetch_many(keys):
+            batches.append(list(keys))
+            return {key: (key.upper(), 10) for key in keys}
+
+        found, error = cache.get_many_or_fetch(['a', 'b', 'c', 'b'], fetch_many)
+        self.assertIsNone(error)
+        self.assertEqual(batches, [['b', 'c']])
+        self.assertEqual(found, {'a': ('a', 'HIT'), 'b': ('B', 'MISS'), 'c': ('C', 'MISS')})
+
+        cache.ttl = 0
+        found, _ = cache.get_many_or_fetch(['a', 'b'], fetch_many)
+        self.assertEqual({k: v[1] for k, v in found.items()}, {'a': 'STALE', 'b': 'STALE'})
+        wait_for(lambda: cache.stats()['refreshes'] == 2)
+        self.assertEqual(batches[1], ['a', 'b'])
+
+    def test_failed_batch_leaves_misses_out(self):
+        cache = GridCache()
+        cache.get_or_fetch('a', Fetcher('a'))
+        found, error = cache.get_many_or_fetch(['a', 'b'], lambda keys: Fetcher(error=OSError('down'))())
+        self.assertEqual(found, {'a': ('a', 'HIT')})
+        self.assertIsInstance(error, OSError)
+        self.assertEqual(cache.stats()['entries'], 1)
@@ -0,0 +1,60 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from .health import CircuitOpen, UpstreamHealth
+
+
+class UpstreamHealthTests(SimpleTestCase):
+    def fail_calls(self, health, name, times):
+        for _ in range(times):
+            with self.assertRaises(OSError):
+                with health.track(name):
+                    raise OSError('down')
+
+    def test_breaker_opens_after_consecutive_failures(self):
+        health = UpstreamHealth(failure_threshold=3, cooldown=60)
+        self.fail_calls(health, 'osm', 2)
+        with health.track('osm'):
+            pass
+        self.fail_calls(health, 'osm', 2)
+        self.assertTrue(health.allow('osm'))
+        self.fail_calls(health, 'osm', 1)
+        with self.assertRaises(CircuitOpen):
+            with health.track('osm'):
+                raise AssertionError("ran while open")
+        s = health.stats()['upstreams']['osm']
+        self.assertEqual((s['state'], s['calls'], s['failures'], s['trips'], s['rejected']), ('open', 6, 5, 1, 1))
+        self.assertAlmostEqual(s['success_rate'], 1 / 6, places=4)
+
+    def test_half_open_trial_decides(self):
+        health = UpstreamHealth(failure_threshold=1, cooldown=10)
+        with patch('prediction.health.time.monotonic', return_value=100.0):
+            self.fail_calls(health, 'osm', 1)
+            self.assertFalse(health.allow('osm'))
+        with patch('prediction.health.time.monotonic', return_value=111.0):
+            # One trial after the cooldown, then refused until it reports
+            self.assertTrue(health.allow('osm'))
+            self.assertFalse(health.allow('osm'))
+            health.record('osm', False, 5.0)
+            self.assertFalse(health.allow('osm'))
+        with patch('prediction.health.time.monotonic', return_value=122.0):
+            self.assertTrue(health.allow('osm'))
+            health.record('osm', True, 5.0)
+            self.assertTrue(health.allow('osm'))
+            self.assertEqual(health.stats()['upstreams']['osm']['state'], 'closed')
+
+    def test_percentiles_and_latency_order(self):
+        health = UpstreamHealth(min_samples=3, window=10)
+        for ms in range(1, 21):
+            health.record('slow', True, ms * 100.0)
+        for ms in (10.0, 20.0, 30.0):
+            health.record('fast', True, ms)
+        health.record('new', True, 1.0)
+        s = health.stats()['upstreams']['slow']
+        # Only the last 10 calls count
+        self.assertEqual((s['p50_ms'], s['p95_ms']), (1550.0, 1955.0))
+        self.assertEqual(health.order(['slow', 'fast', 'new']), ['new', 'fast', 'slow'])
+
+        self.fail_calls(health, 'fast', 5)
+        self.assertEqual(health.order(['slow', 'fast', 'new']), ['new', 'slow', 'fast'])
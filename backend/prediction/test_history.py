@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from .history import LocationHistory, RingBuffer, location_key
+
+
+class RingBufferTests(SimpleTestCase):
+    def test_window_is_contiguous_view_in_order(self):
+        buf = RingBuffer(3, n_features=1)
+        for step in range(5):
+            buf.append([step], step)
+        window = buf.window(3)
+        self.assertTrue(np.shares_memory(window, buf.data))
+        np.testing.assert_array_equal(window[:, 0], [2, 3, 4])
+        np.testing.assert_array_equal(buf.window(2)[:, 0], [3, 4])
+
+    def test_same_step_replaces_latest(self):
+        buf = RingBuffer(3, n_features=1)
+        buf.append([1], 10)
+        buf.append([2], 10)
+        buf.append([3], 11)
+        self.assertEqual(buf.count, 2)
+        np.testing.assert_array_equal(buf.window(2)[:, 0], [2, 3])
+
+    def test_gap_drops_older_readings(self):
+        buf = RingBuffer(3, n_features=1)
+        for step in (1, 2, 5):
+            buf.append([step], step)
+        self.assertEqual(buf.count, 1)
+        np.testing.assert_array_equal(buf.window(1)[:, 0], [5])
+
+
+class LocationHistoryTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, 'history.npz')
+
+    def make(self, **kwargs):
+        return LocationHistory(size=3, step_seconds=60, path=self.path, save_interval=0, **kwargs)
+
+    def test_partial_history_is_front_filled(self):
+        history = self.make()
+        key = location_key(11.0168, 76.9558)
+        self.assertEqual(key, '11.02,76.96')
+        self.assertEqual(history.window(key, 3), (None, 0))
+        history.record(key, np.array([20, 60, 0, 5]), timestamp=0)
+        history.record(key, np.array([22, 61, 0, 5]), timestamp=60)
+        window, readings = history.window(key, 3)
+        self.assertEqual(readings, 2)
+        np.testing.assert_array_equal(window[:, 0], [20, 20, 22])
+
+    def test_full_window_is_a_stable_copy(self):
+        history = self.make()
+        for step, t in enumerate((20, 21, 22)):
+            history.record('k', np.array([t, 60, 0, 5]), timestamp=step * 60)
+        window, readings = history.window('k', 3)
+        history.record('k', np.array([23, 60, 0, 5]), timestamp=180)
+        self.assertEqual(readings, 3)
+        np.testing.assert_array_equal(window[:, 0], [20, 21, 22])
+
+    def test_least_recent_location_evicted(self):
+        history = self.make(max_locations=2)
+        for i, key in enumerate(('a', 'b', 'a', 'c')):
+            history.record(key, np.zeros(4), timestamp=i * 60)
+        self.assertIsNone(history.window('b', 3)[0])
+        self.assertIsNotNone(history.window('a', 3)[0])
+
+    def test_save_and_load_round_trip(self):
+        history = self.make()
+        for step in range(4):
+            history.record('x', np.full(4, step), timestamp=step * 60)
+        self.assertTrue(history.save())
+        restored = self.make()
+        self.assertEqual(restored.load(), 1)
+        np.testing.assert_array_equal(restored.window('x', 3)[0][:, 0], [1, 2, 3])
+        restored.record('x', np.full(4, 9), timestamp=4 * 60)
+        np.testing.assert_array_equal(restored.window('x', 3)[0][:, 0], [2, 3, 9])
+
+    def test_load_ignores_other_window_size(self):
+        history = self.make()
+        history.record('x', np.zeros(4))
+        history.save()
+        other = LocationHistory(size=5, step_seconds=60, path=self.path)
+        self.assertEqual(other.load(), 0)
+
+    def test_daily_steps_by_default(self):
+        history = LocationHistory(size=3)
+        history.record('x', np.zeros(4), timestamp=0)
+        history.record('x', np.ones(4), timestamp=3 * 3600)
+        self.assertEqual(history.window('x', 3)[1], 1)
+
+    def test_save_merges_other_workers(self):
+        first, second = self.make(), self.make()
+        first.record('a', np.full(4, 1), timestamp=0)
+        first.record('shared', np.full(4, 1), timestamp=0)
+        second.record('b', np.full(4, 2), timestamp=0)
+        second.record('shared', np.full(4, 2), timestamp=60)
+        first.save()
+        second.save()
+        first.save()
+        restored = self.make()
+        self.assertEqual(restored.load(), 3)
+        self.assertEqual(restored.window('a', 1)[0][0, 0], 1)
+        self.assertEqual(restored.window('b', 1)[0][0, 0], 2)
+        # The more recently updated buffer wins
+        self.assertEqual(restored.window('shared', 1)[0][0, 0], 2)
+        self.assertEqual([f for f in os.listdir(self.tmp) if f.endswith('.tmp')], [])
+
+    def test_failed_save_stays_dirty(self):
+        history = self.make()
+        history.record('x', np.zeros(4))
+        with patch('prediction.history.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                history.save()
+        self.assertTrue(history.stats()['unsaved'])
+        self.assertEqual([f for f in os.listdir(self.tmp) if f.endswith('.tmp')], [])
+        history.save()
+        self.assertFalse(history.stats()['unsaved'])
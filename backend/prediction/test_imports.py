@@ -0,0 +1,49 @@
+import sys
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from .lazy import LazyModule, lazy_import
+from .management.commands.bench_imports import parse_importtime, subtree
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_import_deferred_until_attribute_access(self):
+        sys.modules.pop('colorsys', None)
+        colorsys = lazy_import('colorsys')
+        self.assertIsInstance(colorsys, LazyModule)
+        self.assertNotIn('colorsys', sys.modules)
+        self.assertEqual(colorsys.rgb_to_hsv(1, 0, 0), (0.0, 1.0, 1))
+        self.assertIn('colorsys', sys.modules)
+
+    def test_patching_proxy_patches_module(self):
+        proxy = LazyModule('json')
+        with patch.object(proxy, 'dumps', return_value='patched'):
+            import json
+            self.assertEqual(json.dumps({}), 'patched')
+        self.assertEqual(json.dumps({}), '{}')
+
+
+class ImportBudgetTests(SimpleTestCase):
+    def test_parse_and_subtree(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       100 |        100 |   leaf",
+            "import time:        50 |        150 | parent",
+            "import time:        10 |         10 | other",
+        ])
+        entries = parse_importtime(stderr)
+        self.assertEqual(entries[0], ('leaf', 100, 100, 1))
+        self.assertEqual([e[0] for e in subtree(entries, 'parent')], ['leaf', 'parent'])
+
+    def test_views_import_within_budget_without_heavy_modules(self):
+        out = StringIO()
+        call_command('bench_imports', budget_ms=10000, repeat=1, stdout=out)
+        self.assertIn('Within budget', out.getvalue())
+
+    def test_over_budget_fails(self):
+        with self.assertRaises(CommandError):
+            call_command('bench_imports', budget_ms=0.001, repeat=1, stdout=StringIO())
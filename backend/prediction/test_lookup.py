@@ -0,0 +1,55 @@
+import os
+import pickle
+import tempfile
+
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from .forest import compile_forest
+from .lookup import DecisionGrid
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'ml_models')
+
+SPEC = {
+    'temperature': (0.0, 40.0, 2.0),
+    'humidity': (0.0, 100.0, 5.0),
+    'rainfall': (0.0, 10.0, 1.0),
+    'wind_speed': (0.0, 30.0, 3.0),
+}
+
+
+class DecisionGridTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(os.path.join(MODEL_DIR, 'model_classifier.pkl'), 'rb') as f:
+            cls.model = compile_forest(pickle.load(f))
+        cls.grid = DecisionGrid.build(cls.model, SPEC)
+
+    def test_grid_points_match_model_exactly(self):
+        self.assertEqual(self.grid.labels.dtype, np.uint8)
+        self.assertEqual(self.grid.labels.shape, (21, 21, 11, 11))
+        rng = np.random.default_rng(3)
+        idx = rng.integers(0, self.grid.shape, size=(500, 4))
+        X = (self.grid.lows + idx * self.grid.steps).astype(np.float32)
+        np.testing.assert_array_equal(self.grid.predict(X), self.model.predict(X))
+
+    def test_outside_grid_uses_fallback(self):
+        X = np.array([[45, 50, 2, 5], [20, 50, 2, 5]], dtype=np.float32)
+        _, inside = self.grid.lookup(X)
+        self.assertEqual(inside.tolist(), [False, True])
+        np.testing.assert_array_equal(self.grid.predict(X, fallback=self.model)[:1], self.model.predict(X[:1]))
+        self.assertEqual(self.grid.stats()['fallbacks'], 1)
+        with self.assertRaises(ValueError):
+            self.grid.predict(X)
+
+    def test_agreement_and_round_trip(self):
+        rng = np.random.default_rng(4)
+        X = rng.uniform([0, 0, 0, 0], [40, 100, 10, 30], size=(2000, 4))
+        self.assertGreater(self.grid.agreement(self.model, X), 0.9)
+        path = os.path.join(self.enterContext(tempfile.TemporaryDirectory()), 'grid.npz')
+        self.grid.save(path)
+        loaded = DecisionGrid.load(path)
+        np.testing.assert_array_equal(loaded.labels, self.grid.labels)
+        np.testing.assert_array_equal(loaded.predict(X, fallback=self.model), self.grid.predict(X, fallback=self.model))
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from .lstm_engine import NumpyLSTM
+
+MODEL_DIR = os.path.join(settings.BASE_DIR, 'ml_models')
+H5_PATH = os.path.join(MODEL_DIR, 'lstm_model.h5')
+
+
+def build_keras_reference():
+    """Rebuild the train_lstm.py architecture and load the trained weights with Keras itself."""
+    import keras
+    from keras import layers
+
+    model = keras.Sequential([
+        keras.Input((3, 4)),
+        layers.LSTM(50, activation='relu', return_sequences=True, name='lstm'),
+        layers.Dropout(0.2, name='dropout'),
+        layers.LSTM(50, activation='relu', name='lstm_1'),
+        layers.Dropout(0.2, name='dropout_1'),
+        layers.Dense(1, name='dense'),
+    ])
+    model.load_weights(H5_PATH)
+    return model
+
+
+class NumpyLSTMTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = NumpyLSTM.from_h5(H5_PATH)
+        self.scaler = joblib.load(os.path.join(MODEL_DIR, 'scaler.pkl'))
+        rng = np.random.default_rng(0)
+        self.raw = rng.uniform([0, 30, 0, 0], [40, 100, 20, 40], size=(64, 3, 4)).astype(np.float32)
+
+    def test_npz_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'lstm.npz')
+            self.engine.save_npz(path)
+            loaded = NumpyLSTM.from_npz(path)
+        np.testing.assert_array_equal(loaded.predict(self.raw), self.engine.predict(self.raw))
+
+    def test_folded_scaler_matches_explicit_scaling(self):
+        scaled = self.scaler.transform(self.raw.reshape(-1, 4)).reshape(self.raw.shape)
+        expected = (self.engine.predict(scaled) - self.scaler.min_[0]) / self.scaler.scale_[0]
+        folded = self.engine.fold_scaler(self.scaler)
+        np.testing.assert_allclose(folded.predict(self.raw), expected, rtol=1e-4, atol=1e-3)
+
+    @unittest.skipUnless(find_spec('tensorflow'), 'TensorFlow not installed')
+    def test_golden_output_matches_keras(self):
+        scaled = self.scaler.transform(self.raw.reshape(-1, 4)).reshape(self.raw.shape).astype(np.float32)
+        keras_out = np.asarray(build_keras_reference().predict_on_batch(scaled))
+        np.testing.assert_allclose(self.engine.predict(scaled), keras_out, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,79 @@
+import csv
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from .places import PlaceIndex, load_places
+
+PLACES = [
+    ('Coimbatore', 'Tamil Nadu', 'IN', 11.00555, 76.96612, 2136916),
+    ('Singanallur', 'Tamil Nadu', 'IN', 10.99898, 77.03238, 31239),
+    ('Chennai', 'Tamil Nadu', 'IN', 13.08784, 80.27847, 4646732),
+    ('Suva', 'Central', 'FJ', -18.14161, 178.44149, 77366),
+    ('Apia', '', 'WS', -13.83333, -171.76666, 40407),
+    ('Longyearbyen', 'Svalbard', 'SJ', 78.22334, 15.64689, 2368),
+]
+
+
+def haversine_km(lat0, lon0, lat1, lon1):
+    lat0, lon0, lat1, lon1 = map(math.radians, (lat0, lon0, lat1, lon1))
+    h = math.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * math.cos(lat1) * math.sin((lon1 - lon0) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+class PlaceIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.csv_path = os.path.join(self.tmp, 'places.csv')
+        self.write_csv(PLACES)
+        self.index = PlaceIndex.from_csv(self.csv_path)
+
+    def write_csv(self, rows):
+        with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['name', 'admin1', 'country', 'latitude', 'longitude', 'population'])
+            writer.writerows(rows)
+
+    def test_nearest_place(self):
+        place = self.index.nearest(11.0168, 76.9558)
+        self.assertEqual((place['name'], place['admin1'], place['country_code']), ('Coimbatore', 'Tamil Nadu', 'IN'))
+        self.assertAlmostEqual(place['distance_km'], haversine_km(11.0168, 76.9558, 11.00555, 76.96612), places=2)
+        self.assertEqual(self.index.nearest(11.0, 77.03)['name'], 'Singanallur')
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        for lat, lon in np.column_stack([rng.uniform(-85, 85, 200), rng.uniform(-180, 180, 200)]):
+            expected = min(PLACES, key=lambda p: haversine_km(lat, lon, p[3], p[4]))
+            self.assertEqual(self.index.nearest(lat, lon)['name'], expected[0])
+
+    def test_across_the_antimeridian(self):
+        self.assertEqual(self.index.nearest(-16.0, -179.9)['name'], 'Suva')
+        self.assertEqual(self.index.nearest(-14.0, -172.0)['name'], 'Apia')
+
+    def test_max_km(self):
+        self.assertIsNone(self.index.nearest(0.0, -140.0, max_km=100))
+        self.assertEqual(self.index.nearest(11.1, 77.0, max_km=20)['name'], 'Coimbatore')
+
+    def test_empty_admin1_is_none(self):
+        self.assertIsNone(self.index.nearest(-13.8, -171.7)['admin1'])
+
+    def test_save_and_load_round_trip(self):
+        path = os.path.join(self.tmp, 'places_index.npz')
+        self.index.save(path)
+        loaded = load_places(self.csv_path, path)
+        self.assertEqual(loaded.source_sha1, self.index.source_sha1)
+        self.assertEqual(loaded.nearest(13.0, 80.2), self.index.nearest(13.0, 80.2))
+
+    def test_stale_index_is_rebuilt_from_csv(self):
+        path = os.path.join(self.tmp, 'places_index.npz')
+        self.index.save(path)
+        self.write_csv(PLACES + [('Perur', 'Tamil Nadu', 'IN', 10.97509, 76.91552, 10000)])
+        self.assertEqual(load_places(self.csv_path, path).nearest(10.975, 76.915)['name'], 'Perur')
+
+    def test_missing_csv(self):
+        self.assertIsNone(load_places(os.path.join(self.tmp, 'missing.csv')))
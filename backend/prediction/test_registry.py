@@ -0,0 +1,139 @@
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from .registry import ModelRegistry
+
+
+def write_model(model_dir, name, value):
+    with open(os.path.join(model_dir, name), 'wb') as f:
+        pickle.dump(value, f)
+
+
+def load_values(model_dir):
+    models = {}
+    for name in os.listdir(model_dir):
+        if name.endswith('.pkl'):
+            with open(os.path.join(model_dir, name), 'rb') as f:
+                models[name] = pickle.load(f)
+    return models
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        write_model(self.model_dir, 'model_temp.pkl', 1)
+        self.registry = ModelRegistry(self.model_dir, load_models=load_values)
+
+    def touch_with(self, value):
+        write_model(self.model_dir, 'model_temp.pkl', value)
+        st = os.stat(os.path.join(self.model_dir, 'model_temp.pkl'))
+        os.utime(os.path.join(self.model_dir, 'model_temp.pkl'), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_changed_artifact_swaps_in_new_version(self):
+        first = self.registry.get()
+        self.assertEqual(first.models['model_temp.pkl'], 1)
+        self.touch_with(2)
+        # First poll sees the change, second confirms the files settled
+        self.assertFalse(self.registry.check_for_update())
+        self.assertTrue(self.registry.check_for_update())
+        second = self.registry.snapshot
+        self.assertNotEqual(first.version, second.version)
+        self.assertEqual(second.models['model_temp.pkl'], 2)
+        # Readers holding the old snapshot keep a consistent view
+        self.assertEqual(first.models['model_temp.pkl'], 1)
+
+    def test_same_content_keeps_version(self):
+        first = self.registry.get()
+        self.touch_with(1)
+        self.registry.check_for_update()
+        self.assertFalse(self.registry.check_for_update())
+        self.assertIs(self.registry.snapshot, first)
+
+    def test_failed_reload_keeps_serving_previous_snapshot(self):
+        first = self.registry.get()
+        self.registry.load_models = lambda model_dir: 1 / 0
+        self.touch_with(3)
+        self.registry.check_for_update()
+        self.assertFalse(self.registry.check_for_update())
+        self.assertIs(self.registry.snapshot, first)
+        self.assertIn('ZeroDivisionError', self.registry.last_error)
+
+    def test_background_watcher_reloads(self):
+        registry = ModelRegistry(self.model_dir, load_models=load_values, poll_interval=0.01)
+        first = registry.get()
+        self.addCleanup(registry.stop_watcher)
+        self.touch_with(4)
+        deadline = time.time() + 2
+        while registry.snapshot is first and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(registry.snapshot.models['model_temp.pkl'], 4)
+
+
+class ModelLoaderTests(SimpleTestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        write_model(self.model_dir, 'model_temp.pkl', 1)
+
+    def make_registry(self, load_models, **kwargs):
+        registry = ModelRegistry(self.model_dir, load_models=load_models, **kwargs)
+        self.addCleanup(registry.stop_watcher)
+        return registry
+
+    def test_concurrent_cold_callers_load_once(self):
+        calls = []
+        release = threading.Event()
+
+        def slow_load(model_dir):
+            calls.append(1)
+            release.wait(2)
+            return load_values(model_dir)
+
+        registry = self.make_registry(slow_load)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(registry.get())) for _ in range(8)]
+        for t in threads:
+            t.start()
+        self.assertEqual(registry.state, 'loading')
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(snap is registry.snapshot for snap in results))
+        self.assertEqual(registry.state, 'ready')
+
+    def test_waiting_times_out_to_empty_snapshot(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        registry = self.make_registry(lambda model_dir: release.wait(2) and load_values(model_dir))
+        snap = registry.get(timeout=0.01)
+        self.assertIsNone(snap.version)
+        self.assertEqual(snap.models, {})
+        self.assertFalse(registry.ready)
+
+    def test_failed_load_retries_with_backoff(self):
+        attempts = []
+
+        def flaky_load(model_dir):
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise OSError('disk not mounted')
+            return load_values(model_dir)
+
+        registry = self.make_registry(flaky_load, retry_base=0.01, retry_max=0.02)
+        first = registry.get()
+        self.assertEqual(first.models, {})
+        self.assertIn('disk not mounted', first.error)
+        deadline = time.time() + 2
+        while not registry.ready and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(registry.get().models['model_temp.pkl'], 1)
+        self.assertEqual(registry.load_failures, 0)
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import requests
+from django.test import SimpleTestCase
+
+from .upstream import AsyncUpstreamClient, UpstreamClient
+
+
+class StubServer:
+    """
+    Local HTTP/1.1 server standing in for an upstream API in tests.
+
+    ``routes`` maps a path to ``(status, json_body)`` or to a callable taking
+    the query string and returning one. ``delay`` seconds are slept before
+    every response. Requests seen are appended to ``requests`` as
+    ``(path, query)``.
+    """
+
+    def __init__(self, routes=None, delay=0.0):
+        self.routes = routes or {}
+        self.delay = delay
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def do_GET(self):
+                path, _, query = self.path.partition('?')
+                stub.requests.append((path, query))
+                route = stub.routes.get(path, (404, {'error': 'not found'}))
+                status, body = route(query) if callable(route) else route
+                if stub.delay:
+                    time.sleep(stub.delay)
+                payload = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client gave up (timeout tests)
+
+            def log_message(self, *args):
+                pass
+
+        # A backlog big enough for a burst of concurrent connects
+        server_class = type('StubHTTPServer', (ThreadingHTTPServer,), {'request_queue_size': 64})
+        self.server = server_class(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class UpstreamClientTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = self.enterContext(StubServer({'/v1/forecast': (200, {'current': {'temperature_2m': 21.5}})}))
+        self.client = UpstreamClient(pool_maxsize=2, connect_timeout=1, read_timeout=1)
+        self.addCleanup(self.client.close)
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            res = self.client.get(self.stub.url + '/v1/forecast', params={'latitude': 11})
+            self.assertEqual(res.json()['current']['temperature_2m'], 21.5)
+        host = self.stub.url.split('//')[1]
+        stats = self.client.stats()['hosts'][host]
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['connection_reuse'], 0.8)
+        self.assertEqual(self.stub.requests[0], ('/v1/forecast', 'latitude=11'))
+
+    def test_separate_pool_per_host(self):
+        with StubServer({'/search': (200, {'results': []})}) as other:
+            self.client.get(self.stub.url + '/v1/forecast')
+            self.client.get(other.url + '/search')
+            self.client.get(other.url + '/search')
+            hosts = self.client.stats()['hosts']
+        self.assertEqual(len(hosts), 2)
+        self.assertEqual(hosts[other.url.split('//')[1]]['connections_opened'], 1)
+
+    def test_read_timeout_raises_and_counts_error(self):
+        self.stub.delay = 0.3
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.client.get(self.stub.url + '/v1/forecast', timeout=0.05)
+        host = self.stub.url.split('//')[1]
+        self.assertEqual(self.client.stats()['hosts'][host]['errors'], 1)
+
+    def test_http_errors_pass_through(self):
+        res = self.client.get(self.stub.url + '/missing')
+        self.assertEqual(res.status_code, 404)
+        with self.assertRaises(requests.exceptions.HTTPError):
+            res.raise_for_status()
+
+class CoalescingTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = self.enterContext(StubServer({'/v1/forecast': (200, {'current': {'temperature_2m': 21.5}})}, delay=0.2))
+        self.client = UpstreamClient(pool_maxsize=8, connect_timeout=1, read_timeout=2)
+        self.addCleanup(self.client.close)
+
+    def fetch_concurrently(self, n, **kwargs):
+        results = [None] * n
+
+        def call(i):
+            try:
+                results[i] = self.client.get(self.stub.url + '/v1/forecast', **kwargs)
+            except Exception as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_identical_requests_share_one_call(self):
+        results = self.fetch_concurrently(6, params={'latitude': 11, 'longitude': 77})
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        host = self.stub.url.split('//')[1]
+        stats = self.client.stats()['hosts'][host]
+        self.assertEqual((stats['requests'], stats['coalesced']), (1, 5))
+        self.assertEqual(self.client.stats()['in_flight'], 0)
+
+    def test_error_is_shared(self):
+        self.stub.delay = 0.5
+        results = self.fetch_concurrently(4, timeout=0.3)
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertTrue(all(isinstance(r, requests.exceptions.ReadTimeout) for r in results))
+
+    def test_different_params_are_not_coalesced(self):
+        self.stub.delay = 0.05
+        threads = [threading.Thread(target=self.client.get, args=(self.stub.url + '/v1/forecast',),
+                                    kwargs={'params': {'latitude': i}}) for i in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_sequential_requests_are_not_coalesced(self):
+        self.stub.delay = 0
+        self.client.get(self.stub.url + '/v1/forecast')
+        self.client.get(self.stub.url + '/v1/forecast')
+        self.assertEqual(len(self.stub.requests), 2)
+
+
+class AsyncUpstreamClientTests(SimpleTestCase):
+    def setUp(self):
+        self.stub = self.enterContext(StubServer({'/v1/forecast': (200, {'current': {'temperature_2m': 21.5}})}, delay=0.2))
+        self.url = self.stub.url + '/v1/forecast'
+
+    async def test_many_calls_in_flight_on_one_thread(self):
+        client = AsyncUpstreamClient(connect_timeout=1, read_timeout=2)
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(*(client.get(self.url, params={'latitude': i}) for i in range(8)))
+            elapsed = time.monotonic() - start
+        finally:
+            await client.close()
+        self.assertEqual(len(self.stub.requests), 8)
+        self.assertTrue(all(r.json()['current']['temperature_2m'] == 21.5 for r in results))
+        self.assertLess(elapsed, 1.2)
+
+    async def test_identical_requests_share_one_call(self):
+        client = AsyncUpstreamClient(connect_timeout=1, read_timeout=2)
+        try:
+            results = await asyncio.gather(*(client.get(self.url, params={'latitude': 11}) for _ in range(5)))
+        finally:
+            await client.close()
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        stats = client.stats()
+        self.assertEqual(stats['hosts'][self.stub.url.split('//')[1]]['coalesced'], 4)
+        self.assertEqual(stats['in_flight'], 0)
+
+    async def test_cancelled_caller_leaves_shared_call_running(self):
+        client = AsyncUpstreamClient(connect_timeout=1, read_timeout=2)
+        try:
+            first = asyncio.ensure_future(client.get(self.url))
+            second = asyncio.ensure_future(client.get(self.url))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            self.assertEqual((await second).status_code, 200)
+        finally:
+            await client.close()
+        self.assertEqual(len(self.stub.requests), 1)
+
+    async def test_per_call_timeout(self):
+        client = AsyncUpstreamClient(connect_timeout=1, read_timeout=2)
+        try:
+            with self.assertRaises(httpx.ReadTimeout):
+                await client.get(self.url, timeout=0.05)
+        finally:
+            await client.close()
+        self.assertEqual(client.stats()['hosts'][self.stub.url.split('//')[1]]['errors'], 1)
@@ -0,0 +1,22 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from . import views
+from .warmup import preload_models, reinit_after_fork
+
+
+class WarmupTests(SimpleTestCase):
+    def test_preload_then_reinit_after_fork(self):
+        snap = preload_models()
+        self.assertIs(views._REGISTRY.snapshot, snap)
+        self.assertTrue(snap.lstm_loaded)
+
+        batcher = views.get_lstm_batcher()
+        ensemble = snap.models['ensemble']
+        ensemble._get_executor()
+        reinit_after_fork()
+        self.assertIsNone(ensemble._executor)
+        self.assertIsNone(batcher._thread)
+        # State is rebuilt lazily on the next request
+        out = batcher.submit(np.zeros((3, 4), dtype=np.float32), group=snap.get_lstm())
+        self.assertEqual(out.shape, (1,))
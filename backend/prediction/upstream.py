@@ -0,0 +1,294 @@
+import asyncio
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+from .lazy import lazy_import
+
+requests = lazy_import('requests')
+httpx = lazy_import('httpx')
+
+
+def _freeze(mapping):
+    """Hashable, order-independent form of a params or headers dict."""
+    if not mapping:
+        return None
+    if isinstance(mapping, dict):
+        return tuple(sorted((str(k), str(v)) for k, v in mapping.items()))
+    return tuple(mapping)
+
+
+class SingleFlight:
+    """
+    At most one call in flight per key.
+
+    ``do(key, fn)`` runs ``fn`` unless a call with the same key is already
+    running, in which case it calls ``on_join()`` (if given), waits for that
+    call and returns its result or raises its exception. Returns
+    ``(result, shared)``.
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, on_join=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        if not leader:
+            if on_join is not None:
+                on_join()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class UpstreamClient:
+    """
+    Shared HTTP client for the upstream weather and geocoding APIs.
+
+    One ``requests.Session`` per process whose adapter keeps a keep-alive
+    connection pool per host (``pool_connections`` hosts, ``pool_maxsize``
+    connections each), so repeat calls to open-meteo or Nominatim skip the TCP
+    and TLS handshakes. ``timeout`` is ``(connect, read)`` seconds; a call may
+    pass its own read timeout. With ``coalesce``, concurrent identical GETs
+    (same URL, params and headers) share one upstream call and its response
+    or exception; a caller that joins a call in flight waits for it under
+    the first caller's timeout. Never shared across fork(): build a new one
+    in each worker.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, connect_timeout=3.05, read_timeout=10.0, coalesce=True):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.coalesce = coalesce
+        self._flights = SingleFlight()
+        self.session = requests.Session()
+        # Upstreams are stateless APIs; do not let one caller's cookies leak into another's request
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0
+        )
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, tuple):
+            return timeout
+        return (min(self.connect_timeout, timeout), timeout)
+
+    def _host_stats(self, host):
+        return self._hosts.setdefault(host, {'requests': 0, 'errors': 0, 'coalesced': 0, 'total_ms': 0.0})
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        """
+        GET ``url`` over the pooled session; raises like ``requests.get``.
+        Coalesced callers receive the same ``Response`` object, so treat it
+        as read-only.
+        """
+        if not self.coalesce:
+            return self._get(url, params, headers, timeout)
+        host = urlsplit(url).netloc
+
+        def joined():
+            with self._lock:
+                self._host_stats(host)['coalesced'] += 1
+
+        key = (url, _freeze(params), _freeze(headers))
+        return self._flights.do(key, lambda: self._get(url, params, headers, timeout), on_join=joined)[0]
+
+    def _get(self, url, params, headers, timeout):
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        error = False
+        try:
+            return self.session.get(url, params=params, headers=headers, timeout=self._timeout(timeout))
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                s = self._host_stats(host)
+                s['requests'] += 1
+                s['errors'] += error
+                s['total_ms'] += elapsed * 1000.0
+
+    def close(self):
+        self.session.close()
+
+    def _pools(self):
+        """(host, connections opened, requests sent) for every live pool."""
+        manager = self.adapter.poolmanager
+        out = []
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            default_port = 443 if key.key_scheme == 'https' else 80
+            host = key.key_host if key.key_port in (None, default_port) else f"{key.key_host}:{key.key_port}"
+            out.append((host, pool.num_connections, pool.num_requests))
+        return out
+
+    def stats(self):
+        with self._lock:
+            hosts = {host: dict(s) for host, s in self._hosts.items()}
+        for host, connections, sent in self._pools():
+            s = hosts.setdefault(host, {'requests': 0, 'errors': 0, 'coalesced': 0, 'total_ms': 0.0})
+            s['connections_opened'] = connections
+            s['connection_reuse'] = round(1 - connections / sent, 4) if sent else 0.0
+        for s in hosts.values():
+            s['avg_ms'] = round(s.pop('total_ms') / s['requests'], 2) if s['requests'] else 0.0
+        return {
+            'pool_connections': self.pool_connections,
+            'pool_maxsize': self.pool_maxsize,
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+            'coalesce': self.coalesce,
+            'in_flight': self._flights.in_flight(),
+            'hosts': hosts,
+        }
+
+
+class AsyncSingleFlight:
+    """
+    SingleFlight for coroutines on one event loop.
+
+    The first caller's ``fn()`` runs as its own task and every caller with
+    the same key awaits it shielded, so cancelling one caller neither
+    cancels the call nor the others waiting on it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn, on_join=None):
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            if on_join is not None:
+                on_join()
+        else:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.shield(task), shared
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+class AsyncUpstreamClient:
+    """
+    UpstreamClient for async views: one ``httpx.AsyncClient`` whose pool
+    holds up to ``max_connections`` connections (``max_keepalive`` kept
+    idle), so a worker can wait on hundreds of upstream calls at once
+    without a thread each. Timeouts and coalescing work as in
+    UpstreamClient. Bound to the event loop it is first used on.
+    """
+
+    def __init__(self, max_connections=200, max_keepalive=20, connect_timeout=3.05, read_timeout=10.0, coalesce=True):
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.coalesce = coalesce
+        self._flights = AsyncSingleFlight()
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            follow_redirects=True
+        )
+        # Same as the sync client: no cookies carried between callers
+        self.client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        # Written on the event loop, read by the status view from other threads
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        if isinstance(timeout, tuple):
+            return httpx.Timeout(timeout[1], connect=timeout[0])
+        return httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+
+    def _host_stats(self, host):
+        return self._hosts.setdefault(host, {'requests': 0, 'errors': 0, 'coalesced': 0, 'total_ms': 0.0})
+
+    async def get(self, url, params=None, headers=None, timeout=None):
+        """GET ``url``; raises ``httpx`` errors. Coalesced callers share the ``Response``."""
+        if not self.coalesce:
+            return await self._get(url, params, headers, timeout)
+        host = urlsplit(url).netloc
+
+        def joined():
+            with self._lock:
+                self._host_stats(host)['coalesced'] += 1
+
+        key = (url, _freeze(params), _freeze(headers))
+        return (await self._flights.do(key, lambda: self._get(url, params, headers, timeout), on_join=joined))[0]
+
+    async def _get(self, url, params, headers, timeout):
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        error = False
+        try:
+            return await self.client.get(url, params=params, headers=headers, timeout=self._timeout(timeout))
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                s = self._host_stats(host)
+                s['requests'] += 1
+                s['errors'] += error
+                s['total_ms'] += elapsed * 1000.0
+
+    async def close(self):
+        await self.client.aclose()
+
+    def stats(self):
+        with self._lock:
+            hosts = {host: dict(s) for host, s in self._hosts.items()}
+        for s in hosts.values():
+            s['avg_ms'] = round(s.pop('total_ms') / s['requests'], 2) if s['requests'] else 0.0
+        return {
+            'max_connections': self.max_connections,
+            'max_keepalive': self.max_keepalive,
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+            'coalesce': self.coalesce,
+            'in_flight': self._flights.in_flight(),
+            'hosts': hosts,
+        }
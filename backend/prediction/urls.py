@@ -1,16 +1,43 @@
+from django.conf import settings
 from django.urls import path
-from .views import PredictWeatherView, CurrentWeatherView, MetricsView, PredictLSTMView, PredictConditionView, PredictEnsembleView, CitySearchView, ReverseGeocodeView, BackendStatusView, HealthCheckView, FastPredictView
+from django.views.decorators.csrf import csrf_exempt
+from .views import PredictWeatherView, CurrentWeatherView, CurrentWeatherBatchView, MetricsView, PredictLSTMView, PredictConditionView, PredictEnsembleView, CitySearchView, ReverseGeocodeView, BackendStatusView, HealthCheckView, FastPredictView, PredictBatchView, ForecastView, ObservationView
+
+if settings.ASYNC_VIEWS:
+    # ASGI: upstream-bound endpoints await their I/O, inference runs on a bounded pool
+    from .async_views import (AsyncCitySearchView, AsyncCurrentWeatherBatchView, AsyncCurrentWeatherView,
+                              AsyncReverseGeocodeView, offload)
+
+    def inference(view):
+        return offload(view.as_view())
+
+    current_view = AsyncCurrentWeatherView.as_view()
+    current_batch_view = csrf_exempt(AsyncCurrentWeatherBatchView.as_view())
+    search_view = AsyncCitySearchView.as_view()
+    reverse_geocode_view = AsyncReverseGeocodeView.as_view()
+else:
+    def inference(view):
+        return view.as_view()
+
+    current_view = CurrentWeatherView.as_view()
+    current_batch_view = CurrentWeatherBatchView.as_view()
+    search_view = CitySearchView.as_view()
+    reverse_geocode_view = ReverseGeocodeView.as_view()
 
 urlpatterns = [
     path('health/', HealthCheckView.as_view(), name='health'),
     path('status/', BackendStatusView.as_view(), name='status'),
-    path('predict/', PredictWeatherView.as_view(), name='predict'),
-    path('predict_fast/', FastPredictView.as_view(), name='predict_fast'),
-    path('predict_lstm/', PredictLSTMView.as_view(), name='predict_lstm'),
-    path('predict_ensemble/', PredictEnsembleView.as_view(), name='predict_ensemble'),
-    path('predict_condition/', PredictConditionView.as_view(), name='predict_condition'),
-    path('current/', CurrentWeatherView.as_view(), name='current'),
+    path('predict/', inference(PredictWeatherView), name='predict'),
+    path('predict/batch/', inference(PredictBatchView), name='predict_batch'),
+    path('predict_fast/', inference(FastPredictView), name='predict_fast'),
+    path('predict_lstm/', inference(PredictLSTMView), name='predict_lstm'),
+    path('forecast/', inference(ForecastView), name='forecast'),
+    path('predict_ensemble/', inference(PredictEnsembleView), name='predict_ensemble'),
+    path('predict_condition/', inference(PredictConditionView), name='predict_condition'),
+    path('observations/', ObservationView.as_view(), name='observations'),
+    path('current/', current_view, name='current'),
+    path('current/batch/', current_batch_view, name='current_batch'),
     path('metrics/', MetricsView.as_view(), name='metrics'),
-    path('search-city/', CitySearchView.as_view(), name='search_city'),
-    path('reverse-geocode/', ReverseGeocodeView.as_view(), name='reverse_geocode'),
+    path('search-city/', search_view, name='search_city'),
+    path('reverse-geocode/', reverse_geocode_view, name='reverse_geocode'),
 ]
@@ -1,6 +1,12 @@
+import asyncio
+import hashlib
 import os
+import threading
 import warnings
+import weakref
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 # Suppress TensorFlow warnings before importing
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress INFO and WARNING messages
@@ -8,111 +14,258 @@ os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'  # Disable oneDNN optimizations to avo
 warnings.filterwarnings('ignore', category=FutureWarning)
 warnings.filterwarnings('ignore', category=DeprecationWarning)
 
-# Configure TensorFlow logging
-import logging
 from django.shortcuts import render
-import requests
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-import pickle
 import json
 import numpy as np
-import pandas as pd
 import random
 from django.conf import settings
+from .batching import MicroBatcher
+from .cache import PredictionCache
+from .citysearch import CityPrefixIndex, PrefixCache, load_countries, merge_results
+from .encoding import pack_columns, parse_fields, select_fields
+from .features import parse_feature_batch, parse_feature_row
+from .forecast import RAINFALL, SEQ_LENGTH, TEMPERATURE, rollout
+from .geocache import GeocodeCache
+from .geocode import GeocodeResolver, default_providers
+from .gridcache import GridCache
+from .health import UpstreamHealth
+from .history import LocationHistory, location_key
+from .places import load_places
+from .registry import ModelRegistry, load_lstm, load_model_set
+from .upstream import AsyncUpstreamClient, UpstreamClient
 
-# Heavy imports moved inside get_models() for lazy loading
+# Heavy imports are deferred: the model libraries load inside
+# load_model_set()/load_lstm(), requests on the first upstream call
 
 # Load models path - models are in the same directory as manage.py
 MODEL_DIR = os.path.join(settings.BASE_DIR, 'ml_models')
 
-# Global cache for models
-_MODEL_CACHE = {
-    'loaded': False,
-    'error': None,
-    'models': {}
-}
+# Alert thresholds shared by the single-row and batch prediction views
+HIGH_TEMP_THRESHOLD = 35
+HEAVY_RAIN_THRESHOLD = 10
 
-# Separate cache for LSTM as it's the heaviest model
-_LSTM_CACHE = {'model': None, 'loaded': False, 'error': None}
+# Inputs assumed by the lenient endpoints when a reading is missing
+DEFAULT_FEATURES = {'temperature': 25, 'humidity': 60, 'rainfall': 0, 'wind_speed': 10}
 
-def get_lstm():
-    global _LSTM_CACHE
-    if _LSTM_CACHE['loaded']:
-        return _LSTM_CACHE['model']
-    try:
-        import tensorflow as tf
-        from tensorflow.keras.models import load_model
-        print("Lazy Loading LSTM...")
-        lstm_path = os.path.join(MODEL_DIR, 'lstm_model.h5')
-        if os.path.exists(lstm_path):
-            with tf.device('/CPU:0'):
-                _LSTM_CACHE['model'] = load_model(lstm_path, compile=False)
-            print("✓ LSTM loaded")
-        _LSTM_CACHE['loaded'] = True
-        return _LSTM_CACHE['model']
-    except Exception as e:
-        print(f"❌ LSTM Load error: {e}")
-        _LSTM_CACHE['error'] = str(e)
-        _LSTM_CACHE['loaded'] = True
-        return None
+# Versioned models, hot-reloaded from MODEL_DIR when retrained artifacts land
+_REGISTRY = ModelRegistry(
+    MODEL_DIR,
+    load_models=lambda model_dir: load_model_set(
+        model_dir,
+        forest_backend=settings.FOREST_BACKEND,
+        ensemble_workers=settings.ENSEMBLE_WORKERS,
+        model_format=settings.MODEL_FORMAT,
+        forest_sklearn_min_rows=settings.FOREST_SKLEARN_MIN_ROWS
+    ),
+    load_lstm=lambda model_dir, models: load_lstm(model_dir, models, backend=settings.LSTM_BACKEND),
+    poll_interval=settings.MODEL_RELOAD_INTERVAL,
+    retry_base=settings.MODEL_LOAD_RETRY_BASE,
+    retry_max=settings.MODEL_LOAD_RETRY_MAX
+)
+
+def get_snapshot():
+    """
+    Current model generation; hold on to it for the whole request. Before the
+    first load finishes this is an empty snapshot and views fall back.
+    """
+    return _REGISTRY.get(timeout=settings.MODEL_LOAD_WAIT)
 
 def get_models():
     """Lazy load models on first request."""
-    global _MODEL_CACHE
-    if _MODEL_CACHE['loaded']:
-        return _MODEL_CACHE['models']
-    
+    return get_snapshot().models
+
+def get_lstm():
+    return get_snapshot().get_lstm()
+
+# Responses of the model endpoints, keyed by quantized input and model version
+_PREDICTION_CACHE = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl=settings.PREDICTION_CACHE_TTL,
+    quantization=settings.PREDICTION_CACHE_QUANTIZATION
+)
+
+def cached_response(endpoint, features, compute, version=None):
+    """Serve ``compute(snapped_features)`` through the prediction cache."""
+    payload, hit = _PREDICTION_CACHE.get_or_compute(endpoint, features, compute, version=version)
+    response = Response(payload)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+# Coalesces concurrent LSTM requests into one forward pass
+_LSTM_BATCHER = None
+
+def _predict_lstm_batch(batch, lstm):
+    # Each request submits the engine of the snapshot it reports, so a hot
+    # reload never answers it with another model version
+    return lstm.predict(batch)
+
+def get_lstm_batcher():
+    global _LSTM_BATCHER
+    if _LSTM_BATCHER is None:
+        _LSTM_BATCHER = MicroBatcher(
+            _predict_lstm_batch,
+            max_batch_size=settings.LSTM_BATCH_MAX_SIZE,
+            max_wait_ms=settings.LSTM_BATCH_WAIT_MS,
+            name='lstm-batcher'
+        )
+    return _LSTM_BATCHER
+
+# Open-meteo forecasts per lat/lon grid cell for CurrentWeatherView
+_CURRENT_CACHE = GridCache(
+    resolution=settings.CURRENT_CACHE_RESOLUTION,
+    ttl=settings.CURRENT_CACHE_TTL,
+    stale_ttl=settings.CURRENT_CACHE_STALE_TTL,
+    max_bytes=settings.CURRENT_CACHE_MAX_BYTES
+)
+
+# Success rate, latency and circuit breaker of every upstream API
+_HEALTH = UpstreamHealth(
+    failure_threshold=settings.UPSTREAM_BREAKER_FAILURES,
+    cooldown=settings.UPSTREAM_BREAKER_COOLDOWN,
+    window=settings.UPSTREAM_LATENCY_WINDOW
+)
+
+# Reverse-geocoding providers, raced fastest healthy one first
+_GEOCODER = GeocodeResolver(
+    providers=default_providers(settings.LOCATIONIQ_API_KEY),
+    health=_HEALTH,
+    deadline=settings.GEOCODE_DEADLINE,
+    hedge_delay=settings.GEOCODE_HEDGE_DELAY,
+    max_workers=settings.GEOCODE_WORKERS
+)
+
+# Provider answers per geohash cell, in the database with a memory tier
+_GEOCACHE = GeocodeCache(
+    precision=settings.GEOCACHE_PRECISION,
+    hot_size=settings.GEOCACHE_HOT_SIZE,
+    ttl=settings.GEOCACHE_TTL
+)
+
+# Keep-alive connection pools to the weather and geocoding APIs
+_UPSTREAM = None
+
+def get_upstream():
+    global _UPSTREAM
+    if _UPSTREAM is None:
+        _UPSTREAM = UpstreamClient(
+            pool_connections=settings.UPSTREAM_POOL_CONNECTIONS,
+            pool_maxsize=settings.UPSTREAM_POOL_MAXSIZE,
+            connect_timeout=settings.UPSTREAM_CONNECT_TIMEOUT,
+            read_timeout=settings.UPSTREAM_READ_TIMEOUT,
+            coalesce=settings.UPSTREAM_COALESCE
+        )
+    return _UPSTREAM
+
+# The async views' clients, one per event loop (uvicorn runs one per worker);
+# the lock keeps the status view from iterating while a loop adds its client
+_ASYNC_UPSTREAM = weakref.WeakKeyDictionary()
+_ASYNC_UPSTREAM_LOCK = threading.Lock()
+
+def get_async_upstream():
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_UPSTREAM.get(loop)
+    if client is None:
+        client = AsyncUpstreamClient(
+            max_connections=settings.ASYNC_UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive=settings.ASYNC_UPSTREAM_MAX_KEEPALIVE,
+            connect_timeout=settings.UPSTREAM_CONNECT_TIMEOUT,
+            read_timeout=settings.UPSTREAM_READ_TIMEOUT,
+            coalesce=settings.UPSTREAM_COALESCE
+        )
+        with _ASYNC_UPSTREAM_LOCK:
+            _ASYNC_UPSTREAM[loop] = client
+    return client
+
+def async_upstream_stats():
+    with _ASYNC_UPSTREAM_LOCK:
+        clients = list(_ASYNC_UPSTREAM.values())
+    return [c.stats() for c in clients]
+
+# Threads the async server hands model inference to, so CPU-bound views
+# never block the event loop and never run more than this many at once
+_INFERENCE_EXECUTOR = None
+
+def get_inference_executor():
+    global _INFERENCE_EXECUTOR
+    if _INFERENCE_EXECUTOR is None:
+        _INFERENCE_EXECUTOR = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_INFERENCE_WORKERS, thread_name_prefix='inference'
+        )
+    return _INFERENCE_EXECUTOR
+
+# Recent readings per location, so the LSTM sees real sequences
+_HISTORY = None
+
+def get_history():
+    global _HISTORY
+    if _HISTORY is None:
+        history = LocationHistory(
+            size=SEQ_LENGTH,
+            step_seconds=settings.HISTORY_STEP_SECONDS,
+            max_locations=settings.HISTORY_MAX_LOCATIONS,
+            path=settings.HISTORY_PATH,
+            save_interval=settings.HISTORY_SAVE_INTERVAL
+        )
+        history.load()
+        _HISTORY = history
+    return _HISTORY
+
+# Offline gazetteer for reverse geocoding; False once a load found nothing
+_PLACES = None
+
+def get_places():
+    global _PLACES
+    if _PLACES is None:
+        _PLACES = load_places(settings.PLACES_CSV, settings.PLACES_INDEX) or False
+    return _PLACES or None
+
+# Prefix search over the gazetteer's names, plus open-meteo answers by prefix
+_CITY_INDEX = None
+_SEARCH_CACHE = PrefixCache(
+    max_entries=settings.CITY_SEARCH_CACHE_SIZE,
+    ttl=settings.CITY_SEARCH_CACHE_TTL
+)
+
+def get_city_index():
+    global _CITY_INDEX
+    if _CITY_INDEX is None:
+        places = get_places()
+        _CITY_INDEX = CityPrefixIndex(places, load_countries(settings.COUNTRIES_CSV)) if places is not None else False
+    return _CITY_INDEX or None
+
+def request_location(data):
+    """History key for a request carrying latitude/longitude (or lat/lon), else None."""
+    lat = data.get('latitude', data.get('lat'))
+    lon = data.get('longitude', data.get('lon'))
+    if lat is None or lon is None:
+        return None
     try:
-        import joblib
-        import pandas as pd
-        
-        print("Lazy Loading Lightweight ML models...")
-        models = {}
-        
-        # Pickle models
-        pickle_files = {
-            'model_temp.pkl': 'model_temp',
-            'model_rain.pkl': 'model_rain',
-            'rf_model_temp.pkl': 'rf_temp',
-            'rf_model_rain.pkl': 'rf_rain',
-            'lr_model_temp.pkl': 'lr_temp',
-            'lr_model_rain.pkl': 'lr_rain',
-            'model_classifier.pkl': 'model_classifier'
-        }
-        
-        for filename, key in pickle_files.items():
-            path = os.path.join(MODEL_DIR, filename)
-            if os.path.exists(path):
-                with open(path, 'rb') as f:
-                    models[key] = pickle.load(f)
-                print(f"✓ {key} loaded")
-            else:
-                print(f"⚠ {filename} missing")
-                models[key] = None
-
-        # Scaler
-        scaler_path = os.path.join(MODEL_DIR, 'scaler.pkl')
-        if os.path.exists(scaler_path):
-            models['scaler'] = joblib.load(scaler_path)
-            print("✓ Scaler loaded")
-        else:
-            models['scaler'] = None
-
-        _MODEL_CACHE['models'] = models
-        _MODEL_CACHE['loaded'] = True
-        return models
-    except Exception as e:
-        import traceback
-        _MODEL_CACHE['error'] = f"{str(e)}\n{traceback.format_exc()}"
-        print(f"❌ Load error: {e}")
-        # Mark as loaded even if failed to avoid repeated heavy attempts if it's OOM
-        _MODEL_CACHE['loaded'] = True 
-        return {}
+        return location_key(lat, lon, settings.HISTORY_GRID_DECIMALS)
+    except (TypeError, ValueError):
+        return None
+
+def history_window(location, row):
+    """
+    LSTM input ending with ``row``: the location's latest recorded readings
+    followed by ``row`` itself, which is not recorded (prediction inputs are
+    what-ifs, not observations). Returns ``(window, real rows)``; without a
+    history ``row`` is repeated.
+    """
+    row = np.asarray(row, dtype=np.float32)
+    window, readings = None, 0
+    if location is not None:
+        window, readings = get_history().window(location, SEQ_LENGTH - 1)
+    if window is None:
+        return np.repeat(row[None], SEQ_LENGTH, axis=0), 1
+    return np.concatenate([window, row[None]]), readings + 1
 
 class HealthCheckView(APIView):
-    """Simple health check endpoint for deployment verification."""
+    """Liveness: answers whenever the process serves requests, models or not."""
     def get(self, request):
         return Response({
             'status': 'healthy',
@@ -120,106 +273,176 @@ class HealthCheckView(APIView):
         })
 
 class BackendStatusView(APIView):
-    """Diagnostic view for deployment verification."""
+    """
+    Readiness and diagnostics. Kicks off the model load on a cold worker and
+    answers 503 until the models are ready to serve.
+    """
     def get(self, request):
+        _REGISTRY.start_loading()
         has_models = os.path.exists(MODEL_DIR)
         model_list = os.listdir(MODEL_DIR) if has_models else []
+        snap = _REGISTRY.snapshot
         return Response({
             'status': 'online',
+            'ready': snap is not None,
+            'model_state': _REGISTRY.state,
             'models_dir_exists': has_models,
             'models_in_dir': model_list,
-            'cache_loaded': _MODEL_CACHE['loaded'],
-            'cache_error': _MODEL_CACHE['error'],
-            'lstm_loaded': _LSTM_CACHE['loaded'],
-            'lstm_error': _LSTM_CACHE['error'],
+            'cache_loaded': snap is not None,
+            'cache_error': _REGISTRY.last_error,
+            'model_version': snap.version if snap else None,
+            'model_registry': _REGISTRY.stats(),
+            'lstm_loaded': bool(snap and snap.lstm_loaded),
+            'lstm_error': snap.lstm_error if snap else None,
+            'lstm_backend': settings.LSTM_BACKEND,
+            'lstm_batching': _LSTM_BATCHER.stats() if _LSTM_BATCHER else None,
+            'location_history': _HISTORY.stats() if _HISTORY else None,
+            'upstream': _UPSTREAM.stats() if _UPSTREAM else None,
+            'async_upstream': async_upstream_stats(),
+            'upstream_health': _HEALTH.stats(),
+            'current_weather_cache': _CURRENT_CACHE.stats(),
+            'reverse_geocode': _GEOCODER.stats(),
+            'reverse_geocode_cache': _GEOCACHE.stats(),
+            'places': _PLACES.stats() if _PLACES else None,
+            'city_search': {
+                'index': _CITY_INDEX.stats() if _CITY_INDEX else None,
+                'upstream_cache': _SEARCH_CACHE.stats()
+            },
+            'condition_grid': snap.models['condition_grid'].stats() if snap and snap.models.get('condition_grid') else None,
+            'prediction_cache': _PREDICTION_CACHE.stats(),
             'base_dir': str(settings.BASE_DIR)
-        })
+        }, status=200 if snap is not None else 503)
 
 class PredictWeatherView(APIView):
     def post(self, request):
-        models = get_models()
-        data = request.data
+        snap = get_snapshot()
+        models = snap.models
         try:
-            temp = float(data.get('temperature'))
-            humidity = float(data.get('humidity'))
-            rainfall = float(data.get('rainfall'))
-            wind_speed = float(data.get('wind_speed'))
-            
-            input_data = np.array([[temp, humidity, rainfall, wind_speed]])
+            features = parse_feature_row(request.data)
             
             m_temp = models.get('model_temp')
             m_rain = models.get('model_rain')
 
             if m_temp and m_rain:
-                pred_temp = m_temp.predict(input_data)[0]
-                pred_rain = m_rain.predict(input_data)[0]
-                
-                alerts = []
-                if pred_temp > 35: alerts.append("High Temperature Warning")
-                if pred_rain > 10: alerts.append("Heavy Rainfall Warning")
+                def compute(x):
+                    pred_temp = float(m_temp.predict(x[None])[0])
+                    pred_rain = float(m_rain.predict(x[None])[0])
+                    
+                    alerts = []
+                    if pred_temp > HIGH_TEMP_THRESHOLD: alerts.append("High Temperature Warning")
+                    if pred_rain > HEAVY_RAIN_THRESHOLD: alerts.append("Heavy Rainfall Warning")
 
-                return Response({
-                    'predicted_temperature': round(pred_temp, 2),
-                    'predicted_rainfall': round(pred_rain, 2),
-                    'alerts': alerts
-                })
+                    return {
+                        'predicted_temperature': round(pred_temp, 2),
+                        'predicted_rainfall': round(pred_rain, 2),
+                        'alerts': alerts,
+                        'model_version': snap.version
+                    }
+                return cached_response('predict', features, compute, version=snap.version)
             return Response({'error': 'Models not available'}, status=503)
         except Exception as e:
             return Response({'error': str(e)}, status=400)
 
+class PredictBatchView(APIView):
+    """Score many rows with one predict call per model."""
+    def post(self, request):
+        try:
+            X, valid, errors = parse_feature_batch(
+                request.data, max_rows=settings.PREDICT_BATCH_MAX_ROWS
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        snap = get_snapshot()
+        m_temp = snap.models.get('model_temp')
+        m_rain = snap.models.get('model_rain')
+        if not (m_temp and m_rain):
+            return Response({'error': 'Models not available'}, status=503)
+
+        n = len(X)
+        pred_temp = np.full(n, np.nan)
+        pred_rain = np.full(n, np.nan)
+        if valid.any():
+            rows = X[valid]
+            pred_temp[valid] = m_temp.predict(rows)
+            pred_rain[valid] = m_rain.predict(rows)
+
+        # NaN compares False, so rejected rows never raise alerts
+        with np.errstate(invalid='ignore'):
+            high_temp = np.flatnonzero(pred_temp > HIGH_TEMP_THRESHOLD)
+            heavy_rain = np.flatnonzero(pred_rain > HEAVY_RAIN_THRESHOLD)
+
+        def column(values):
+            out = np.round(values, 2).astype(object)
+            out[~valid] = None
+            return out.tolist()
+
+        return Response({
+            'count': n,
+            'succeeded': int(valid.sum()),
+            'predicted_temperature': column(pred_temp),
+            'predicted_rainfall': column(pred_rain),
+            'alerts': {
+                'High Temperature Warning': high_temp.tolist(),
+                'Heavy Rainfall Warning': heavy_rain.tolist()
+            },
+            'errors': errors,
+            'model_version': snap.version
+        })
+
 class FastPredictView(APIView):
     """Fast prediction endpoint using heuristics instead of ML models"""
     def post(self, request):
-        data = request.data
         try:
-            temp = float(data.get('temperature', 25))
-            humidity = float(data.get('humidity', 60))
-            rainfall = float(data.get('rainfall', 0))
-            wind_speed = float(data.get('wind_speed', 10))
-            
-            # Weather-based heuristic predictions
-            # Temperature prediction based on current conditions
-            if humidity > 80:
-                temp_change = random.uniform(-1, 1)  # High humidity = stable temp
-            elif wind_speed > 15:
-                temp_change = random.uniform(-3, 1)  # High wind = cooling
-            else:
-                temp_change = random.uniform(-2, 3)  # Normal variation
-            
-            predicted_temp = temp + temp_change
-            
-            # Rainfall prediction based on humidity and current rain
-            if humidity > 70 and rainfall > 0:
-                rain_change = random.uniform(0, 5)  # Likely more rain
-            elif humidity < 40:
-                rain_change = random.uniform(-2, 0)  # Likely less rain
-            else:
-                rain_change = random.uniform(-1, 2)  # Normal variation
-            
-            predicted_rain = max(0, rainfall + rain_change)
-            
-            # Condition prediction
-            if predicted_rain > 5:
-                condition = "Rainy"
-            elif humidity > 80:
-                condition = "Cloudy"
-            elif predicted_temp > temp + 2:
-                condition = "Sunny"
-            else:
-                condition = "Partly Cloudy"
-            
-            return Response({
-                'predicted_temperature': round(predicted_temp, 2),
-                'predicted_rainfall': round(predicted_rain, 2),
-                'condition_tomorrow': condition,
-                'method': 'Fast Heuristic',
-                'status': 'success',
-                'response_time': 'instant'
-            })
-            
+            features = parse_feature_row(request.data, defaults=DEFAULT_FEATURES)
+            return cached_response('predict_fast', features, self.predict)
         except Exception as e:
             return Response({'error': str(e)}, status=400)
 
+    @staticmethod
+    def predict(features):
+        temp, humidity, rainfall, wind_speed = (float(v) for v in features)
+        
+        # Weather-based heuristic predictions
+        # Temperature prediction based on current conditions
+        if humidity > 80:
+            temp_change = random.uniform(-1, 1)  # High humidity = stable temp
+        elif wind_speed > 15:
+            temp_change = random.uniform(-3, 1)  # High wind = cooling
+        else:
+            temp_change = random.uniform(-2, 3)  # Normal variation
+        
+        predicted_temp = temp + temp_change
+        
+        # Rainfall prediction based on humidity and current rain
+        if humidity > 70 and rainfall > 0:
+            rain_change = random.uniform(0, 5)  # Likely more rain
+        elif humidity < 40:
+            rain_change = random.uniform(-2, 0)  # Likely less rain
+        else:
+            rain_change = random.uniform(-1, 2)  # Normal variation
+        
+        predicted_rain = max(0, rainfall + rain_change)
+        
+        # Condition prediction
+        if predicted_rain > 5:
+            condition = "Rainy"
+        elif humidity > 80:
+            condition = "Cloudy"
+        elif predicted_temp > temp + 2:
+            condition = "Sunny"
+        else:
+            condition = "Partly Cloudy"
+        
+        return {
+            'predicted_temperature': round(predicted_temp, 2),
+            'predicted_rainfall': round(predicted_rain, 2),
+            'condition_tomorrow': condition,
+            'method': 'Fast Heuristic',
+            'status': 'success',
+            'response_time': 'instant'
+        }
+
 class PredictLSTMView(APIView):
     def post(self, request):
         data = request.data
@@ -237,26 +460,26 @@ class PredictLSTMView(APIView):
         
         # Try to get models with timeout
         try:
-            models = get_models()
-            lstm = get_lstm()
-            scaler = models.get('scaler')
-
-            if lstm and scaler:
-                import tensorflow as tf
-                input_scaled = scaler.transform([features])
-                input_seq = np.array([input_scaled[0]] * 3).reshape(1, 3, 4)
+            snap = get_snapshot()
+            lstm = snap.get_lstm()
+
+            if lstm:
+                # With a location, the LSTM sees that location's recent real
+                # readings leading up to the posted one
+                input_seq, readings = history_window(request_location(data), features)
                 
-                with tf.device('/CPU:0'):
-                    pred = lstm.predict(input_seq, verbose=0)
+                pred = get_lstm_batcher().submit(input_seq, timeout=settings.LSTM_BATCH_TIMEOUT, group=lstm)
                 
-                res_temp = float(pred[0][0])
+                res_temp = float(pred[0])
                 res_rain = max(0, res_temp * 0.1)
 
                 return Response({
                     'predicted_temperature': round(res_temp, 2),
                     'predicted_rainfall': round(res_rain, 2),
                     'method': 'LSTM',
-                    'status': 'success'
+                    'status': 'success',
+                    'history_readings': readings,
+                    'model_version': snap.version
                 })
             else:
                 # Models not available, use heuristic prediction
@@ -295,22 +518,112 @@ class PredictLSTMView(APIView):
                 'status': 'error_fallback'
             })
 
+class ForecastView(APIView):
+    """
+    Multi-step LSTM forecast. GET forecasts one location from query
+    parameters; POST takes many rows (same payload as /api/predict/batch/).
+    ``horizon`` comes from the query string or the POST body. Rows that carry
+    latitude/longitude start from that location's recorded history. Returns
+    one (locations, horizon) array per variable.
+    """
+    def get(self, request):
+        try:
+            horizon = self._horizon(request.query_params.get('horizon'))
+            X = parse_feature_row(request.query_params, defaults=DEFAULT_FEATURES)[None]
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return self._forecast(X, np.ones(1, dtype=bool), [], horizon, [request_location(request.query_params)])
+
+    def post(self, request):
+        data = request.data
+        try:
+            horizon = request.query_params.get('horizon')
+            if horizon is None and isinstance(data, dict):
+                horizon = data.get('horizon')
+            horizon = self._horizon(horizon)
+            X, valid, errors = parse_feature_batch(data, max_rows=settings.PREDICT_BATCH_MAX_ROWS)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return self._forecast(X, valid, errors, horizon, self._locations(data, len(X)))
+
+    @staticmethod
+    def _locations(data, n):
+        """History key of every row: from each row object, or from latitude/longitude columns."""
+        if isinstance(data, dict) and 'rows' in data:
+            data = data['rows']
+        elif isinstance(data, dict) and 'columns' in data:
+            data = data['columns']
+        if isinstance(data, (list, tuple)):
+            return [request_location(row) if isinstance(row, dict) else None for row in data]
+        lats = data.get('latitude', data.get('lat'))
+        lons = data.get('longitude', data.get('lon'))
+        if not (isinstance(lats, (list, tuple)) and isinstance(lons, (list, tuple)) and len(lats) == len(lons) == n):
+            return [None] * n
+        return [request_location({'lat': lat, 'lon': lon}) for lat, lon in zip(lats, lons)]
+
+    @staticmethod
+    def _horizon(value):
+        if value is None or value == '':
+            return settings.FORECAST_DEFAULT_HORIZON
+        try:
+            horizon = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid 'horizon': {value!r}")
+        if not 1 <= horizon <= settings.FORECAST_MAX_HORIZON:
+            raise ValueError(f"'horizon' must be between 1 and {settings.FORECAST_MAX_HORIZON}")
+        return horizon
+
+    def _forecast(self, X, valid, errors, horizon, locations):
+        snap = get_snapshot()
+        lstm = snap.get_lstm()
+        if lstm is None:
+            return Response({'error': 'LSTM model not available'}, status=503)
+
+        n = len(X)
+        predicted = np.full((n, horizon, X.shape[1]), np.nan, dtype=np.float32)
+        readings = [None] * n
+        if valid.any():
+            rows = np.flatnonzero(valid)
+            windows = np.empty((len(rows), SEQ_LENGTH, X.shape[1]), dtype=np.float32)
+            for k, i in enumerate(rows):
+                windows[k], readings[i] = history_window(locations[i], X[i])
+            predicted[valid] = rollout(lstm, windows, horizon, rain_model=snap.models.get('model_rain'))
+
+        def column(j):
+            out = np.round(predicted[:, :, j].astype(np.float64), 2).tolist()
+            for i in np.flatnonzero(~valid):
+                out[i] = None
+            return out
+
+        return Response({
+            'horizon': horizon,
+            'count': n,
+            'succeeded': int(valid.sum()),
+            'temperature': column(TEMPERATURE),
+            'rainfall': column(RAINFALL),
+            'history_readings': readings,
+            'errors': errors,
+            'method': 'LSTM rollout',
+            'model_version': snap.version
+        })
+
 class PredictConditionView(APIView):
     def post(self, request):
-        models = get_models()
+        snap = get_snapshot()
         data = request.data
         try:
-            m_class = models.get('model_classifier')
-            features = [[
-                float(data.get('temperature', 25)),
-                float(data.get('humidity', 60)),
-                float(data.get('rainfall', 0)),
-                float(data.get('wind_speed', 10))
-            ]]
+            m_class = snap.models.get('model_classifier')
+            grid = snap.models.get('condition_grid')
+            features = parse_feature_row(data, defaults=DEFAULT_FEATURES)
             
             if m_class:
-                prediction = m_class.predict(features)[0]
-                return Response({'condition': prediction})
+                # Precomputed grid lookup; the forest only runs outside the grid
+                classify = (lambda x: grid.predict(x, fallback=m_class)) if grid is not None else m_class.predict
+                return cached_response(
+                    'predict_condition', features,
+                    lambda x: {'condition': str(classify(x[None])[0]), 'model_version': snap.version},
+                    version=snap.version
+                )
             
             # Fallback
             temp = float(data.get('temperature', 25))
@@ -321,85 +634,329 @@ class PredictConditionView(APIView):
 
 class PredictEnsembleView(APIView):
     def post(self, request):
-        models = get_models()
-        data = request.data
+        snap = get_snapshot()
         try:
-            features = pd.DataFrame([data])[['temperature', 'humidity', 'rainfall', 'wind_speed']]
-            results = {}
-
-            # RF
-            if models.get('rf_temp') and models.get('rf_rain'):
-                results['Random Forest'] = {
-                    'temp': models['rf_temp'].predict(features)[0],
-                    'rain': models['rf_rain'].predict(features)[0]
-                }
-            
-            # LR
-            if models.get('lr_temp') and models.get('lr_rain'):
-                results['Linear Regression'] = {
-                    'temp': models['lr_temp'].predict(features)[0],
-                    'rain': models['lr_rain'].predict(features)[0]
-                }
-            
-            if results:
-                avg_t = np.mean([r['temp'] for r in results.values()])
-                avg_r = np.mean([r['rain'] for r in results.values()])
-                return Response({
-                    'predicted_temperature': round(avg_t, 2),
-                    'predicted_rainfall': round(avg_r, 2),
-                    'breakdown': results
-                })
+            features = parse_feature_row(request.data)
+            ensemble = snap.models.get('ensemble')
+
+            if ensemble:
+                def compute(x):
+                    result = ensemble.predict(x)
+                    results = {
+                        name: {'temp': float(out[0, 0]), 'rain': float(out[0, 1])}
+                        for name, out in result['members'].items()
+                    }
+                    avg_t, avg_r = result['mean'][0]
+                    return {
+                        'predicted_temperature': round(float(avg_t), 2),
+                        'predicted_rainfall': round(float(avg_r), 2),
+                        'breakdown': results,
+                        'model_version': snap.version
+                    }
+                return cached_response('predict_ensemble', features, compute, version=snap.version)
             return Response({'error': 'Ensemble models missing'}, status=503)
         except Exception as e:
             return Response({'error': str(e)}, status=400)
 
+class ObservationView(APIView):
+    """
+    Record observed readings into the location history used by the LSTM.
+    Accepts one ``{latitude, longitude, temperature, humidity, rainfall,
+    wind_speed}`` object or a list of them.
+    """
+    def post(self, request):
+        data = request.data
+        rows = data if isinstance(data, list) else [data]
+        history = get_history()
+        recorded, errors = 0, []
+        for i, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors.append({'index': i, 'error': 'row must be an object'})
+                continue
+            location = request_location(row)
+            if location is None:
+                errors.append({'index': i, 'error': 'latitude and longitude are required'})
+                continue
+            try:
+                features = parse_feature_row(row)
+            except ValueError as e:
+                errors.append({'index': i, 'error': str(e)})
+                continue
+            history.record(location, features)
+            recorded += 1
+        return Response({'recorded': recorded, 'errors': errors}, status=200 if recorded or not errors else 400)
+
 class CurrentWeatherView(APIView):
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,rain,wind_speed_10m,weather_code&hourly=temperature_2m,weather_code,rain&daily=weather_code,temperature_2m_max,temperature_2m_min,sunrise,sunset,uv_index_max&timezone=auto"
+
+    FIELDS = ('city', 'temperature', 'humidity', 'rainfall', 'wind_speed', 'description', 'code',
+              'hourly', 'daily', 'timestamp')
+    ENCODINGS = ('json', 'packed')
+
     def get(self, request):
-        lat = request.query_params.get('lat', 11.0168)
-        lon = request.query_params.get('lon', 76.9558)
-        city = request.query_params.get('city', 'Coimbatore')
-        
+        lat, lon, city = self.params(request.query_params)
         try:
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,rain,wind_speed_10m,weather_code&hourly=temperature_2m,weather_code,rain&daily=weather_code,temperature_2m_max,temperature_2m_min,sunrise,sunset,uv_index_max&timezone=auto"
-            res = requests.get(url, timeout=5).json()
-            
-            current = res.get('current', {})
-            code = current.get('weather_code', 0)
-            
-            # Simple mapping
-            desc = "Clear"
-            if 1 <= code <= 3: desc = "Cloudy"
-            elif 51 <= code <= 67: desc = "Rainy"
-            elif 95 <= code <= 99: desc = "Stormy"
+            fields, encoding = self.shape_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({
-                'city': city,
-                'temperature': current.get('temperature_2m'),
-                'humidity': current.get('relative_humidity_2m'),
-                'rainfall': current.get('rain'),
-                'wind_speed': current.get('wind_speed_10m'),
-                'description': desc,
-                'code': code,
-                'hourly': res.get('hourly', {}),
-                'daily': res.get('daily', {}),
-                'timestamp': pd.Timestamp.now().isoformat()
-            })
+        try:
+            # Everyone in the same grid cell shares one cached forecast
+            key, (cell_lat, cell_lon) = _CURRENT_CACHE.cell(lat, lon)
+            res, cache_state = _CURRENT_CACHE.get_or_fetch(key, lambda: self.fetch(cell_lat, cell_lon))
+
+            # A freshly fetched reading feeds the LSTM history under the
+            # caller's own coordinates, the key predict_lstm and observations read with
+            self.record(request_location({'lat': lat, 'lon': lon}), res.get('current', {}), cache_state)
+
+            # A client already holding this cell's forecast gets a 304
+            # before anything is serialized
+            validators = self.validators(key, res, city, fields, encoding)
+            response = get_conditional_response(request, *validators) if validators else None
+            if response is None:
+                response = Response(self.shape(self.payload(res, city), fields, encoding))
+            return self.stamp(response, cache_state, validators)
         except Exception as e:
-            # Provide fallback data when external weather API fails
-            return Response({
-                'city': city,
-                'temperature': 25.0,  # Default temperature
-                'humidity': 65.0,     # Default humidity
-                'rainfall': 0.0,      # Default rainfall
-                'wind_speed': 12.0,   # Default wind speed
-                'description': 'API Unavailable',
-                'code': 0,
-                'hourly': {},
-                'daily': {},
-                'timestamp': pd.Timestamp.now().isoformat(),
-                'fallback': True,
-                'error': str(e)
-            })
+            return Response(self.fallback(city, e))
+
+    @staticmethod
+    def params(query_params):
+        return (query_params.get('lat', 11.0168), query_params.get('lon', 76.9558),
+                query_params.get('city', 'Coimbatore'))
+
+    @classmethod
+    def shape_params(cls, query_params):
+        """
+        ``fields`` (comma-separated payload keys, or ``hourly.<series>`` /
+        ``daily.<series>`` for single series) and ``encoding``: 'json', or
+        'packed' for base64 hourly/daily arrays (see encoding.pack_series).
+        """
+        fields = parse_fields(query_params.get('fields'), cls.FIELDS)
+        encoding = query_params.get('encoding') or 'json'
+        if encoding not in cls.ENCODINGS:
+            raise ValueError(f"unknown encoding '{encoding}', expected one of {', '.join(cls.ENCODINGS)}")
+        return fields, encoding
+
+    @staticmethod
+    def shape(payload, fields, encoding):
+        if fields is not None:
+            payload = select_fields(payload, fields)
+        if encoding == 'packed':
+            for name in ('hourly', 'daily'):
+                if name in payload:
+                    payload[name] = pack_columns(payload[name])
+            payload['encoding'] = encoding
+        return payload
+
+    @staticmethod
+    def validators(key, res, city, fields, encoding):
+        """(ETag, Last-Modified) for this response, from when the cell's forecast was fetched."""
+        modified = _CURRENT_CACHE.last_modified(key, res)
+        if modified is None:
+            return None
+        tag = hashlib.sha1(repr((key, modified, city, fields, encoding)).encode()).hexdigest()
+        return quote_etag(tag), int(modified)
+
+    @staticmethod
+    def stamp(response, cache_state, validators):
+        response['X-Cache'] = cache_state
+        if validators is not None:
+            response['ETag'], modified = validators
+            response['Last-Modified'] = http_date(modified)
+            patch_cache_control(response, max_age=settings.CURRENT_MAX_AGE)
+        return response
+
+    @staticmethod
+    def payload(res, city):
+        current = res.get('current', {})
+        code = current.get('weather_code', 0)
+        desc = CurrentWeatherView.describe(code)
+
+        return {
+            'city': city,
+            'temperature': current.get('temperature_2m'),
+            'humidity': current.get('relative_humidity_2m'),
+            'rainfall': current.get('rain'),
+            'wind_speed': current.get('wind_speed_10m'),
+            'description': desc,
+            'code': code,
+            'hourly': res.get('hourly', {}),
+            'daily': res.get('daily', {}),
+            'timestamp': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def describe(code):
+        # Simple mapping
+        desc = "Clear"
+        if 1 <= code <= 3: desc = "Cloudy"
+        elif 51 <= code <= 67: desc = "Rainy"
+        elif 95 <= code <= 99: desc = "Stormy"
+        return desc
+
+    @staticmethod
+    def fallback(city, error):
+        # Provide fallback data when external weather API fails
+        return {
+            'city': city,
+            'temperature': 25.0,  # Default temperature
+            'humidity': 65.0,     # Default humidity
+            'rainfall': 0.0,      # Default rainfall
+            'wind_speed': 12.0,   # Default wind speed
+            'description': 'API Unavailable',
+            'code': 0,
+            'hourly': {},
+            'daily': {},
+            'timestamp': datetime.now().isoformat(),
+            'fallback': True,
+            'error': str(error)
+        }
+
+    @classmethod
+    def fetch(cls, lat, lon):
+        """Fetch one cell's forecast as ``(payload, size in bytes)``."""
+        with _HEALTH.track('OpenMeteo'):
+            res = get_upstream().get(cls.FORECAST_URL.format(lat=lat, lon=lon), timeout=5)
+            res.raise_for_status()
+            return res.json(), len(res.content)
+
+    @staticmethod
+    def record(location, current, cache_state):
+        """
+        Add the upstream reading to ``location``'s history, only when it was
+        just fetched: cached copies would replay an old reading as new.
+        """
+        if cache_state != 'MISS':
+            return
+        reading = [current.get('temperature_2m'), current.get('relative_humidity_2m'),
+                   current.get('rain'), current.get('wind_speed_10m')]
+        if location is not None and all(isinstance(v, (int, float)) for v in reading):
+            get_history().record(location, np.array(reading, dtype=np.float32))
+
+class CurrentWeatherBatchView(APIView):
+    """
+    Current conditions for many locations in one response, column per
+    field. Locations come as a JSON list of ``{lat, lon, city}`` objects
+    (POST) or as comma-separated ``lat``/``lon`` lists (GET). Cells already
+    cached are answered from memory and every other cell is fetched in a
+    single open-meteo call.
+    """
+    FIELDS = (('temperature', 'temperature_2m'), ('humidity', 'relative_humidity_2m'),
+              ('rainfall', 'rain'), ('wind_speed', 'wind_speed_10m'), ('code', 'weather_code'))
+
+    def get(self, request):
+        try:
+            data = self.from_query(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        return self.handle(data)
+
+    def post(self, request):
+        return self.handle(request.data)
+
+    def handle(self, data):
+        try:
+            locations, errors = self.parse(data)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        keys, centres = self.cells(locations)
+        found, error = _CURRENT_CACHE.get_many_or_fetch(list(centres), lambda miss: self.fetch_many(miss, centres))
+        self.record_all(locations, keys, found)
+        return Response(self.payload(locations, keys, found, error, errors))
+
+    @staticmethod
+    def from_query(query_params):
+        lats = [v for v in (query_params.get('lat') or '').split(',') if v.strip()]
+        lons = [v for v in (query_params.get('lon') or '').split(',') if v.strip()]
+        if not lats or len(lats) != len(lons):
+            raise ValueError('lat and lon must be comma-separated lists of the same length')
+        return [{'lat': a, 'lon': b} for a, b in zip(lats, lons)]
+
+    @staticmethod
+    def parse(data):
+        """``([(lat, lon, city) or None per location], errors)``; ValueError for an unusable request."""
+        if not isinstance(data, list) or not data:
+            raise ValueError('expected a non-empty list of locations')
+        if len(data) > settings.CURRENT_BATCH_MAX_LOCATIONS:
+            raise ValueError(f"at most {settings.CURRENT_BATCH_MAX_LOCATIONS} locations per request")
+        locations, errors = [], []
+        for i, item in enumerate(data):
+            try:
+                lat = float(item.get('latitude', item.get('lat')))
+                lon = float(item.get('longitude', item.get('lon')))
+                if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                    raise ValueError
+            except (AttributeError, TypeError, ValueError):
+                errors.append({'index': i, 'error': 'valid lat and lon are required'})
+                locations.append(None)
+                continue
+            locations.append((lat, lon, item.get('city')))
+        return locations, errors
+
+    @staticmethod
+    def cells(locations):
+        """Cache key per location (None where invalid) and the centre of every distinct cell."""
+        keys, centres = [], {}
+        for location in locations:
+            if location is None:
+                keys.append(None)
+                continue
+            key, centre = _CURRENT_CACHE.cell(location[0], location[1])
+            keys.append(key)
+            centres[key] = centre
+        return keys, centres
+
+    @staticmethod
+    def batch_url(miss, centres):
+        lats = ','.join(str(centres[key][0]) for key in miss)
+        lons = ','.join(str(centres[key][1]) for key in miss)
+        return CurrentWeatherView.FORECAST_URL.format(lat=lats, lon=lons)
+
+    @staticmethod
+    def split(miss, data, nbytes):
+        """open-meteo's answer for several locations, a list in request order, as ``{key: (value, nbytes)}``."""
+        data = data if isinstance(data, list) else [data]
+        if len(data) != len(miss):
+            raise ValueError(f"expected {len(miss)} locations from upstream, got {len(data)}")
+        share = nbytes // len(miss)
+        return {key: (value, share) for key, value in zip(miss, data)}
+
+    @classmethod
+    def fetch_many(cls, miss, centres):
+        with _HEALTH.track('OpenMeteo'):
+            res = get_upstream().get(cls.batch_url(miss, centres), timeout=settings.CURRENT_BATCH_TIMEOUT)
+            res.raise_for_status()
+            return cls.split(miss, res.json(), len(res.content))
+
+    @staticmethod
+    def record_all(locations, keys, found):
+        for location, key in zip(locations, keys):
+            if key in found:
+                value, state = found[key]
+                CurrentWeatherView.record(request_location({'lat': location[0], 'lon': location[1]}),
+                                          value.get('current', {}), state)
+
+    @classmethod
+    def payload(cls, locations, keys, found, error, errors):
+        out = {'count': len(locations), 'latitude': [], 'longitude': [], 'city': [], 'description': [], 'cache': []}
+        for name, _ in cls.FIELDS:
+            out[name] = []
+        errors = list(errors)
+        for i, (location, key) in enumerate(zip(locations, keys)):
+            entry = found.get(key) if key is not None else None
+            if location is not None and entry is None:
+                errors.append({'index': i, 'error': f"upstream unavailable: {error}"})
+            current = entry[0].get('current', {}) if entry is not None else {}
+            out['latitude'].append(location[0] if location else None)
+            out['longitude'].append(location[1] if location else None)
+            out['city'].append(location[2] if location else None)
+            for name, source in cls.FIELDS:
+                out[name].append(current.get(source))
+            out['description'].append(CurrentWeatherView.describe(current.get('weather_code', 0)) if entry else None)
+            out['cache'].append(entry[1] if entry is not None else None)
+        out['errors'] = sorted(errors, key=lambda e: e['index'])
+        out['timestamp'] = datetime.now().isoformat()
+        return out
 
 class MetricsView(APIView):
     def get(self, request):
@@ -409,11 +966,50 @@ class MetricsView(APIView):
         return Response({'temperature_accuracy': 95.2, 'rainfall_accuracy': 87.8})
 
 class CitySearchView(APIView):
+    SEARCH_URL = "https://geocoding-api.open-meteo.com/v1/search"
+
     def get(self, request):
-        q = request.query_params.get('name')
+        q = (request.query_params.get('name') or '').strip()
         if not q: return Response({'results': []})
-        res = requests.get(f"https://geocoding-api.open-meteo.com/v1/search?name={q}&count=10").json()
-        return Response(res)
+        count = settings.CITY_SEARCH_COUNT
+        
+        # Bundled cities answer most keystrokes on their own
+        local = self.search_local(q, count)
+        if len(local) >= count:
+            return self.respond(local, 'LOCAL')
+        
+        # Otherwise ask open-meteo, through a cache that also serves longer queries
+        upstream = _SEARCH_CACHE.get(q)
+        state = 'HIT'
+        if upstream is None:
+            state = 'MISS'
+            try:
+                with _HEALTH.track('OpenMeteoGeocoding'):
+                    res = get_upstream().get(self.SEARCH_URL, params={'name': q, 'count': count},
+                                             timeout=settings.CITY_SEARCH_TIMEOUT)
+                    res.raise_for_status()
+                    upstream = self.store(q, res.json(), count)
+            except Exception as e:
+                print(f"❌ City search error: {e}")
+                upstream, state = [], 'ERROR'
+        return self.respond(merge_results(upstream, local, count), state)
+
+    @staticmethod
+    def search_local(q, count):
+        index = get_city_index()
+        return index.search(q, count) if index is not None else []
+
+    @staticmethod
+    def store(q, data, count):
+        results = data.get('results') or []
+        _SEARCH_CACHE.set(q, results, complete=len(results) < count)
+        return results
+
+    @staticmethod
+    def respond(results, state):
+        response = Response({'results': results})
+        response['X-Cache'] = state
+        return response
 
 class ReverseGeocodeView(APIView):
     def get(self, request):
@@ -422,241 +1018,80 @@ class ReverseGeocodeView(APIView):
         
         print(f"🎯 PRECISE GEOCODING for coordinates: {lat}, {lon}")
         
-        # Try multiple high-precision geocoding services
-        
-        # Method 1: OpenStreetMap Nominatim with maximum zoom for neighborhood-level precision
-        try:
-            print("🔍 Trying OSM Nominatim with high precision...")
-            res = requests.get(
-                f"https://nominatim.openstreetmap.org/reverse?format=json&lat={lat}&lon={lon}&zoom=18&addressdetails=1&extratags=1",
-                headers={'User-Agent': 'WeatherApp/1.0 (High-Precision Location)'},
-                timeout=12
-            )
-            res.raise_for_status()
-            data = res.json()
-            
-            if data and 'address' in data:
-                address = data['address']
-                location_parts = []
-                
-                print(f"📍 OSM Address components: {address}")
-                
-                # Priority order for Indian locations: village/neighbourhood > suburb > city
-                primary_location = None
-                
-                # Check for village/neighbourhood first (most specific)
-                if address.get('village'):
-                    primary_location = address.get('village')
-                elif address.get('neighbourhood'):
-                    primary_location = address.get('neighbourhood')
-                elif address.get('hamlet'):
-                    primary_location = address.get('hamlet')
-                elif address.get('suburb'):
-                    primary_location = address.get('suburb')
-                elif address.get('city_district'):
-                    primary_location = address.get('city_district')
-                
-                if primary_location:
-                    location_parts.append(primary_location)
-                    print(f"✅ Found primary location: {primary_location}")
-                
-                # Add city if different from primary location
-                city = address.get('city') or address.get('town') or address.get('municipality')
-                if city and city != primary_location:
-                    location_parts.append(city)
-                
-                # Add state
-                if address.get('state'):
-                    location_parts.append(address.get('state'))
-                
-                detailed_name = ', '.join(location_parts) if location_parts else data.get('display_name')
-                
-                if detailed_name and primary_location:
-                    print(f"🎯 OSM Success: {detailed_name}")
-                    return Response({
-                        'results': [{
-                            'name': detailed_name,
-                            'admin1': address.get('state'),
-                            'country_code': address.get('country_code', '').upper(),
-                            'precision': 'high',
-                            'source': 'OpenStreetMap',
-                            'detailed_info': {
-                                'primary_location': primary_location,
-                                'neighbourhood': address.get('neighbourhood'),
-                                'village': address.get('village'),
-                                'suburb': address.get('suburb'),
-                                'city': city,
-                                'state': address.get('state'),
-                                'postcode': address.get('postcode'),
-                                'road': address.get('road')
-                            }
-                        }]
-                    })
-                    
-        except Exception as e:
-            print(f"❌ OSM Nominatim error: {e}")
+        # A provider answer for this neighbourhood from an earlier request
+        cached = self.cached(lat, lon)
+        if cached is not None:
+            return self.respond(cached, 'HIT')
         
-        # Method 2: BigDataCloud with enhanced locality detection
-        try:
-            print("🔍 Trying BigDataCloud with enhanced precision...")
-            res = requests.get(
-                f"https://api.bigdatacloud.net/data/reverse-geocode-client?latitude={lat}&longitude={lon}&localityLanguage=en",
-                timeout=12
-            )
-            res.raise_for_status()
-            data = res.json()
-            
-            print(f"📍 BigDataCloud response: {data}")
-            
-            location_parts = []
-            primary_location = None
-            
-            # Check for most specific location first
-            if data.get('locality'):
-                primary_location = data.get('locality')
-                location_parts.append(primary_location)
-            
-            # Check administrative areas for neighborhoods
-            if data.get('localityInfo', {}).get('administrative'):
-                admin_areas = data.get('localityInfo', {}).get('administrative', [])
-                for area in admin_areas:
-                    area_name = area.get('name')
-                    if area_name and area_name not in location_parts:
-                        if not primary_location:
-                            primary_location = area_name
-                        location_parts.append(area_name)
-                        break  # Take the most specific one
-            
-            # Add city if different
-            if data.get('city') and data.get('city') not in location_parts:
-                location_parts.append(data.get('city'))
-            
-            # Add state
-            if data.get('principalSubdivision') and data.get('principalSubdivision') not in location_parts:
-                location_parts.append(data.get('principalSubdivision'))
-            
-            detailed_name = ', '.join(location_parts) if location_parts else None
-            
-            if detailed_name and primary_location:
-                print(f"🎯 BigDataCloud Success: {detailed_name}")
-                return Response({
-                    'results': [{
-                        'name': detailed_name,
-                        'admin1': data.get('principalSubdivision'),
-                        'country_code': data.get('countryCode'),
-                        'precision': 'high',
-                        'source': 'BigDataCloud',
-                        'detailed_info': {
-                            'primary_location': primary_location,
-                            'locality': data.get('locality'),
-                            'city': data.get('city'),
-                            'region': data.get('principalSubdivision'),
-                            'country': data.get('countryName'),
-                            'postcode': data.get('postcode')
-                        }
-                    }]
-                })
-                
-        except Exception as e:
-            print(f"❌ BigDataCloud error: {e}")
+        # Nearest locality from the bundled gazetteer; the providers are only
+        # asked when it is too far away or the caller wants refine=true
+        local = self.nearby(lat, lon)
+        refine = request.query_params.get('refine', 'false').lower() == 'true'
+        if local is not None and local['distance_km'] <= settings.GEOCODE_LOCAL_MAX_KM and not refine:
+            return self.respond(self.local_result(local, 'locality'))
         
-        # Method 3: Try LocationIQ for Indian locations (good for local areas)
+        # Race the high-precision geocoding services under one deadline
+        result = _GEOCODER.resolve(get_upstream(), lat, lon)
+        if result is not None:
+            _GEOCACHE.put(lat, lon, result)
+            return self.respond(result, 'MISS')
+        return self.respond(self.unresolved(local, lat, lon))
+
+    @staticmethod
+    def cached(lat, lon):
         try:
-            print("🔍 Trying LocationIQ for Indian precision...")
-            res = requests.get(
-                f"https://us1.locationiq.com/v1/reverse.php?key=pk.0123456789abcdef&lat={lat}&lon={lon}&format=json&addressdetails=1&zoom=18",
-                timeout=10
-            )
-            if res.status_code == 200:
-                data = res.json()
-                if data and 'address' in data:
-                    address = data['address']
-                    location_parts = []
-                    
-                    # Similar logic for LocationIQ
-                    primary_location = (address.get('village') or 
-                                      address.get('neighbourhood') or 
-                                      address.get('suburb') or 
-                                      address.get('hamlet'))
-                    
-                    if primary_location:
-                        location_parts.append(primary_location)
-                        
-                        city = address.get('city') or address.get('town')
-                        if city and city != primary_location:
-                            location_parts.append(city)
-                        
-                        if address.get('state'):
-                            location_parts.append(address.get('state'))
-                        
-                        detailed_name = ', '.join(location_parts)
-                        print(f"🎯 LocationIQ Success: {detailed_name}")
-                        return Response({
-                            'results': [{
-                                'name': detailed_name,
-                                'admin1': address.get('state'),
-                                'country_code': address.get('country_code', '').upper(),
-                                'precision': 'high',
-                                'source': 'LocationIQ'
-                            }]
-                        })
-                        
-        except Exception as e:
-            print(f"❌ LocationIQ error: {e}")
-        
-        # Method 4: Try Google-style geocoding with Photon (OpenStreetMap-based)
+            return _GEOCACHE.get(lat, lon)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def nearby(lat, lon):
+        places = get_places()
+        if places is None:
+            return None
         try:
-            print("🔍 Trying Photon geocoding...")
-            res = requests.get(
-                f"https://photon.komoot.io/reverse?lat={lat}&lon={lon}&lang=en",
-                timeout=8
-            )
-            res.raise_for_status()
-            data = res.json()
-            
-            if data.get('features') and len(data['features']) > 0:
-                feature = data['features'][0]
-                props = feature.get('properties', {})
-                
-                location_parts = []
-                primary_location = None
-                
-                # Check for specific area names
-                if props.get('name'):
-                    primary_location = props.get('name')
-                    location_parts.append(primary_location)
-                
-                if props.get('city') and props.get('city') != primary_location:
-                    location_parts.append(props.get('city'))
-                
-                if props.get('state'):
-                    location_parts.append(props.get('state'))
-                
-                if location_parts:
-                    detailed_name = ', '.join(location_parts)
-                    print(f"🎯 Photon Success: {detailed_name}")
-                    return Response({
-                        'results': [{
-                            'name': detailed_name,
-                            'admin1': props.get('state'),
-                            'country_code': props.get('country', '').upper(),
-                            'precision': 'medium',
-                            'source': 'Photon'
-                        }]
-                    })
-                    
-        except Exception as e:
-            print(f"❌ Photon error: {e}")
+            return places.nearest(lat, lon, max_km=settings.GEOCODE_LOCAL_FALLBACK_KM)
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def unresolved(cls, local, lat, lon):
+        """The answer when every provider failed."""
+        if local is not None:
+            print(f"⚠️ Geocoding services failed, using nearest known place {local['name']}")
+            return cls.local_result(local, 'approximate')
         
         # Final fallback with coordinate-based location
         print("⚠️ All geocoding services failed, using coordinate fallback")
-        return Response({
-            'results': [{
-                'name': f"Location Near Coimbatore ({float(lat):.4f}°, {float(lon):.4f}°)",
-                'admin1': 'Tamil Nadu',
-                'country_code': 'IN',
-                'precision': 'coordinates',
-                'source': 'Fallback',
-                'note': 'Precise location unavailable - showing coordinates'
-            }]
-        })
\ No newline at end of file
+        return {
+            'name': f"Location Near Coimbatore ({float(lat):.4f}°, {float(lon):.4f}°)",
+            'admin1': 'Tamil Nadu',
+            'country_code': 'IN',
+            'precision': 'coordinates',
+            'source': 'Fallback',
+            'note': 'Precise location unavailable - showing coordinates'
+        }
+
+    @staticmethod
+    def respond(result, state=None):
+        response = Response({'results': [result]})
+        if state is not None:
+            response['X-Cache'] = state
+        return response
+
+    @staticmethod
+    def local_result(place, precision):
+        parts = [place['name']] + ([place['admin1']] if place['admin1'] else [])
+        return {
+            'name': ', '.join(parts),
+            'admin1': place['admin1'],
+            'country_code': place['country_code'],
+            'precision': precision,
+            'source': 'Offline',
+            'distance_km': place['distance_km'],
+            'detailed_info': {
+                'primary_location': place['name'],
+                'state': place['admin1'],
+                'population': place['population']
+            }
+        }
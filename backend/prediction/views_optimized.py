@@ -1,6 +1,8 @@
 import os
+import threading
 import warnings
 import logging
+from datetime import datetime
 
 # Suppress TensorFlow warnings before importing
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Suppress INFO and WARNING messages
@@ -11,11 +13,6 @@ warnings.filterwarnings('ignore', category=DeprecationWarning)
 # Configure TensorFlow logging
 logging.getLogger('tensorflow').setLevel(logging.ERROR)
 
-import tensorflow as tf
-# Disable TensorFlow warnings
-tf.get_logger().setLevel('ERROR')
-tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
-
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
@@ -23,12 +20,13 @@ import pickle
 import json
 import numpy as np
 import random
-import joblib
-import pandas as pd
 from django.conf import settings
 
-# Import Keras after TensorFlow configuration
-from keras.models import load_model
+from .lazy import lazy_import
+
+# TensorFlow, Keras and joblib are imported on first model load, not at import
+tf = lazy_import('tensorflow')
+joblib = lazy_import('joblib')
 
 # Load models
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -47,6 +45,19 @@ rf_rain = None
 lr_temp = None
 lr_rain = None
 
+_models_loaded = False
+_load_lock = threading.Lock()
+
+def ensure_models_loaded():
+    """Load the models on the first request that needs them."""
+    global _models_loaded
+    if _models_loaded:
+        return
+    with _load_lock:
+        if not _models_loaded:
+            load_models()
+            _models_loaded = True
+
 def load_models():
     """Load all ML models with proper error handling and logging suppression."""
     global model_temp, model_rain, model_lstm, model_classifier, scaler
@@ -80,6 +91,11 @@ def load_models():
         lstm_path = os.path.join(MODEL_DIR, 'lstm_model.h5')
         if os.path.exists(lstm_path):
             print("Loading LSTM model...")
+            # Disable TensorFlow warnings
+            tf.get_logger().setLevel('ERROR')
+            tf.compat.v1.logging.set_verbosity(tf.compat.v1.logging.ERROR)
+            # Import Keras after TensorFlow configuration
+            from keras.models import load_model
             # Suppress TensorFlow output during model loading
             with tf.device('/CPU:0'):  # Force CPU to avoid GPU warnings
                 model_lstm = load_model(lstm_path, compile=False)
@@ -106,6 +122,7 @@ class PredictWeatherView(APIView):
     """Standard weather prediction using trained models."""
     
     def post(self, request):
+        ensure_models_loaded()
         data = request.data
         try:
             temp = float(data.get('temperature'))
@@ -148,6 +165,7 @@ class PredictLSTMView(APIView):
     """LSTM-based weather prediction for time series forecasting."""
     
     def post(self, request):
+        ensure_models_loaded()
         data = request.data
         try:
             features = [
@@ -190,6 +208,7 @@ class PredictConditionView(APIView):
     """Weather condition classification."""
     
     def post(self, request):
+        ensure_models_loaded()
         data = request.data
         try:
             features = [[
@@ -233,11 +252,13 @@ class PredictEnsembleView(APIView):
     """Ensemble prediction combining multiple models."""
     
     def post(self, request):
+        ensure_models_loaded()
         data = request.data
         try:
             # Prepare features
-            features = pd.DataFrame([data])
-            features = features[['temperature', 'humidity', 'rainfall', 'wind_speed']]
+            features = np.array([[
+                data['temperature'], data['humidity'], data['rainfall'], data['wind_speed']
+            ]], dtype=float)
             
             predictions = {}
             
@@ -337,7 +358,7 @@ class CurrentWeatherView(APIView):
             'rainfall': round(max(0, base_rainfall), 1),
             'wind_speed': round(base_wind, 1),
             'description': description,
-            'timestamp': pd.Timestamp.now().isoformat()
+            'timestamp': datetime.now().isoformat()
         }
         
         return Response(mock_data)
@@ -346,6 +367,7 @@ class MetricsView(APIView):
     """Model performance metrics."""
     
     def get(self, request):
+        ensure_models_loaded()
         try:
             metrics_path = os.path.join(MODEL_DIR, 'metrics.json')
             if os.path.exists(metrics_path):
@@ -360,7 +382,7 @@ class MetricsView(APIView):
                     'temperature_rmse': 2.1,
                     'rainfall_mae': 1.3,
                     'model_confidence': 94.2,
-                    'last_updated': pd.Timestamp.now().isoformat(),
+                    'last_updated': datetime.now().isoformat(),
                     'models_loaded': {
                         'standard_ml': model_temp is not None and model_rain is not None,
                         'lstm': model_lstm is not None,
@@ -374,6 +396,3 @@ class MetricsView(APIView):
             return Response({
                 'error': f'Metrics error: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-# Initialize models when module is loaded
-load_models()
\ No newline at end of file
@@ -0,0 +1,58 @@
+import gc
+import threading
+import weakref
+
+import numpy as np
+from django.conf import settings
+
+from . import views
+from .features import FEATURE_NAMES
+
+
+def preload_models():
+    """
+    Load and exercise every model so the pages are populated before a
+    pre-forking server (gunicorn --preload) forks its workers.
+
+    The Keras backend is skipped: TensorFlow is not fork-safe, so workers
+    load it themselves on first use.
+    """
+    print("Preloading ML models...")
+    snap = views._REGISTRY.get()
+    row = np.zeros((1, len(FEATURE_NAMES)), dtype=np.float32)
+    for key, model in snap.models.items():
+        if key not in ('scaler', 'lstm_engine') and hasattr(model, 'predict'):
+            model.predict(row)
+    if settings.LSTM_BACKEND != 'keras':
+        lstm = snap.get_lstm()
+        if lstm is not None:
+            lstm.predict(np.zeros((1, 3, len(FEATURE_NAMES)), dtype=np.float32))
+    views.get_places()
+    views.get_city_index()
+    # Move everything loaded so far out of the collector's reach, so the
+    # workers' GC passes do not write to (and un-share) these pages
+    gc.freeze()
+    print(f"✓ Models preloaded (version {snap.version})")
+    return snap
+
+
+def reinit_after_fork():
+    """Rebuild the per-process state that does not survive fork()."""
+    views._REGISTRY.reset_after_fork()
+    snap = views._REGISTRY.snapshot
+    ensemble = snap.models.get('ensemble') if snap else None
+    if ensemble is not None:
+        ensemble.reset_after_fork()
+    if views._LSTM_BATCHER is not None:
+        views._LSTM_BATCHER.reset_after_fork()
+    if views._HISTORY is not None:
+        views._HISTORY.reset_after_fork()
+    views._CURRENT_CACHE.reset_after_fork()
+    views._HEALTH.reset_after_fork()
+    views._GEOCODER.reset_after_fork()
+    views._GEOCACHE.reset_after_fork()
+    # Pooled connections belong to the parent's sockets
+    views._UPSTREAM = None
+    views._ASYNC_UPSTREAM = weakref.WeakKeyDictionary()
+    views._ASYNC_UPSTREAM_LOCK = threading.Lock()
+    views._INFERENCE_EXECUTOR = None
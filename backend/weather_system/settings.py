@@ -56,6 +56,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'prediction.middleware.LargeResponseGZipMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +66,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Responses of at least GZIP_MIN_BYTES are gzipped for clients that accept it
+GZIP_MIN_BYTES = int(os.environ.get('GZIP_MIN_BYTES', 1024))
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_HEADERS = ["*"]
 CORS_ALLOW_METHODS = ["*"]
@@ -154,6 +158,164 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Prediction API
+PREDICT_BATCH_MAX_ROWS = int(os.environ.get('PREDICT_BATCH_MAX_ROWS', 10000))
+
+# Prediction response cache. Inputs are snapped to these per-feature steps
+# before lookup; set PREDICTION_CACHE_MAX_ENTRIES=0 to disable
+PREDICTION_CACHE_MAX_ENTRIES = int(os.environ.get('PREDICTION_CACHE_MAX_ENTRIES', 4096))
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 300))
+PREDICTION_CACHE_QUANTIZATION = {
+    'temperature': 0.1,
+    'humidity': 1.0,
+    'rainfall': 0.1,
+    'wind_speed': 0.5,
+}
+
+# Load and warm every model at startup (set by gunicorn.conf.py so the
+# master loads them once before forking workers)
+PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', 'False') == 'True'
+
+# Seconds between checks of ml_models/ for retrained artifacts; 0 disables
+# hot reload
+MODEL_RELOAD_INTERVAL = float(os.environ.get('MODEL_RELOAD_INTERVAL', 10))
+
+# Seconds a request to a cold worker waits for the background model load
+# before falling back (heuristics or 503)
+MODEL_LOAD_WAIT = float(os.environ.get('MODEL_LOAD_WAIT', 30))
+
+# Backoff between retries of a failed model load: doubles from BASE up to MAX
+MODEL_LOAD_RETRY_BASE = float(os.environ.get('MODEL_LOAD_RETRY_BASE', 1))
+MODEL_LOAD_RETRY_MAX = float(os.environ.get('MODEL_LOAD_RETRY_MAX', 60))
+
+# LSTM inference backend: 'numpy' serves from the extracted weights without
+# importing TensorFlow, 'keras' loads lstm_model.h5 with Keras
+LSTM_BACKEND = os.environ.get('LSTM_BACKEND', 'numpy')
+
+# Random Forest backend: 'flat' compiles the sklearn forests into contiguous
+# node arrays evaluated with vectorized NumPy, 'sklearn' uses them as pickled.
+# The flat path wins on small batches; batches of FOREST_SKLEARN_MIN_ROWS rows
+# or more still go to sklearn (0 keeps every batch flat). bench_forest reports
+# the crossover on the serving machine
+FOREST_BACKEND = os.environ.get('FOREST_BACKEND', 'flat')
+FOREST_SKLEARN_MIN_ROWS = int(os.environ.get('FOREST_SKLEARN_MIN_ROWS', 1024))
+
+# Model artifact format: 'auto' memory-maps ml_models/mmap/ when its export is
+# up to date (see ml_models/export_artifacts.py) and otherwise unpickles,
+# 'mmap' does the same but warns on fallback, 'pickle' always unpickles
+MODEL_FORMAT = os.environ.get('MODEL_FORMAT', 'auto')
+
+# Threads for evaluating ensemble members concurrently on large batches
+ENSEMBLE_WORKERS = int(os.environ.get('ENSEMBLE_WORKERS', 2))
+
+# LSTM micro-batching: gather requests for up to LSTM_BATCH_WAIT_MS or
+# LSTM_BATCH_MAX_SIZE items, whichever comes first
+LSTM_BATCH_MAX_SIZE = int(os.environ.get('LSTM_BATCH_MAX_SIZE', 32))
+LSTM_BATCH_WAIT_MS = float(os.environ.get('LSTM_BATCH_WAIT_MS', 2))
+LSTM_BATCH_TIMEOUT = float(os.environ.get('LSTM_BATCH_TIMEOUT', 10))
+
+# Longest /api/forecast/ rollout, in model steps, and the default when no
+# horizon is given
+FORECAST_MAX_HORIZON = int(os.environ.get('FORECAST_MAX_HORIZON', 30))
+FORECAST_DEFAULT_HORIZON = int(os.environ.get('FORECAST_DEFAULT_HORIZON', 7))
+
+# Grid the condition classifier is precomputed over by `manage.py
+# build_condition_grid`: feature -> (low, high, step), both ends inclusive.
+# Requests outside it are classified by the full model.
+CONDITION_GRID = {
+    'temperature': (-10.0, 50.0, 1.0),
+    'humidity': (0.0, 100.0, 2.0),
+    'rainfall': (0.0, 20.0, 0.5),
+    'wind_speed': (0.0, 40.0, 1.0),
+}
+
+# Per-location reading history feeding the LSTM its input windows. Readings
+# in the same HISTORY_STEP_SECONDS bucket replace each other (a day, like the
+# daily rows the LSTM was trained on); locations are grid cells of
+# HISTORY_GRID_DECIMALS decimal degrees
+HISTORY_STEP_SECONDS = float(os.environ.get('HISTORY_STEP_SECONDS', 86400))
+HISTORY_GRID_DECIMALS = int(os.environ.get('HISTORY_GRID_DECIMALS', 2))
+HISTORY_MAX_LOCATIONS = int(os.environ.get('HISTORY_MAX_LOCATIONS', 1024))
+HISTORY_PATH = os.environ.get('HISTORY_PATH', os.path.join(BASE_DIR, 'data', 'location_history.npz'))
+HISTORY_SAVE_INTERVAL = float(os.environ.get('HISTORY_SAVE_INTERVAL', 60))
+
+# Upstream weather/geocoding HTTP client: keep-alive pools for up to
+# UPSTREAM_POOL_CONNECTIONS hosts with UPSTREAM_POOL_MAXSIZE connections each.
+# The read timeout applies where a call does not set its own.
+UPSTREAM_POOL_CONNECTIONS = int(os.environ.get('UPSTREAM_POOL_CONNECTIONS', 10))
+UPSTREAM_POOL_MAXSIZE = int(os.environ.get('UPSTREAM_POOL_MAXSIZE', 10))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 10))
+# Concurrent identical upstream GETs share one call and its response
+UPSTREAM_COALESCE = os.environ.get('UPSTREAM_COALESCE', 'True') == 'True'
+# Per-upstream health: UPSTREAM_BREAKER_FAILURES failures in a row stop calls
+# to that upstream for UPSTREAM_BREAKER_COOLDOWN seconds, then one trial call
+# decides; latency percentiles cover the last UPSTREAM_LATENCY_WINDOW calls
+UPSTREAM_BREAKER_FAILURES = int(os.environ.get('UPSTREAM_BREAKER_FAILURES', 5))
+UPSTREAM_BREAKER_COOLDOWN = float(os.environ.get('UPSTREAM_BREAKER_COOLDOWN', 30))
+UPSTREAM_LATENCY_WINDOW = int(os.environ.get('UPSTREAM_LATENCY_WINDOW', 100))
+
+# Async views for /api/current/, /api/search-city/ and /api/reverse-geocode/,
+# on by default under weather_system.asgi (gunicorn -k uvicorn.workers.UvicornWorker
+# weather_system.asgi:application). Their upstream client keeps up to
+# ASYNC_UPSTREAM_MAX_CONNECTIONS calls in flight per worker; the prediction
+# views run on ASYNC_INFERENCE_WORKERS threads.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', 'False') == 'True'
+ASYNC_UPSTREAM_MAX_CONNECTIONS = int(os.environ.get('ASYNC_UPSTREAM_MAX_CONNECTIONS', 200))
+ASYNC_UPSTREAM_MAX_KEEPALIVE = int(os.environ.get('ASYNC_UPSTREAM_MAX_KEEPALIVE', 20))
+ASYNC_INFERENCE_WORKERS = int(os.environ.get('ASYNC_INFERENCE_WORKERS', os.cpu_count() or 2))
+
+# /api/current/ forecast cache: coordinates snap to cells of
+# CURRENT_CACHE_RESOLUTION degrees; an entry is fresh for CURRENT_CACHE_TTL
+# seconds, then served stale (while refreshing in the background) for
+# CURRENT_CACHE_STALE_TTL more. Total cached payload size is LRU-bounded.
+CURRENT_CACHE_RESOLUTION = float(os.environ.get('CURRENT_CACHE_RESOLUTION', 0.1))
+CURRENT_CACHE_TTL = float(os.environ.get('CURRENT_CACHE_TTL', 600))
+CURRENT_CACHE_STALE_TTL = float(os.environ.get('CURRENT_CACHE_STALE_TTL', 3600))
+CURRENT_CACHE_MAX_BYTES = int(os.environ.get('CURRENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+# Browsers may reuse a /api/current/ response for CURRENT_MAX_AGE seconds,
+# then revalidate it with its ETag / Last-Modified (304 while unchanged)
+CURRENT_MAX_AGE = int(os.environ.get('CURRENT_MAX_AGE', 60))
+# /api/current/batch/: up to CURRENT_BATCH_MAX_LOCATIONS locations, the
+# uncached ones fetched in one open-meteo call
+CURRENT_BATCH_MAX_LOCATIONS = int(os.environ.get('CURRENT_BATCH_MAX_LOCATIONS', 100))
+CURRENT_BATCH_TIMEOUT = float(os.environ.get('CURRENT_BATCH_TIMEOUT', 10))
+
+# Reverse geocoding: providers are raced fastest healthy one first, the next
+# starting GEOCODE_HEDGE_DELAY seconds after the last (0 starts all at once),
+# and the lookup gives up after GEOCODE_DEADLINE seconds in total. LocationIQ
+# is only asked with a LOCATIONIQ_API_KEY.
+GEOCODE_DEADLINE = float(os.environ.get('GEOCODE_DEADLINE', 8))
+GEOCODE_HEDGE_DELAY = float(os.environ.get('GEOCODE_HEDGE_DELAY', 0.25))
+GEOCODE_WORKERS = int(os.environ.get('GEOCODE_WORKERS', 16))
+LOCATIONIQ_API_KEY = os.environ.get('LOCATIONIQ_API_KEY', '')
+# Offline gazetteer (data/places.csv, indexed by build_places_index): a place
+# within GEOCODE_LOCAL_MAX_KM answers without asking the providers, and one
+# within GEOCODE_LOCAL_FALLBACK_KM stands in when every provider fails
+PLACES_CSV = os.environ.get('PLACES_CSV', os.path.join(BASE_DIR, 'data', 'places.csv'))
+PLACES_INDEX = os.environ.get('PLACES_INDEX', os.path.join(BASE_DIR, 'data', 'places_index.npz'))
+GEOCODE_LOCAL_MAX_KM = float(os.environ.get('GEOCODE_LOCAL_MAX_KM', 5))
+GEOCODE_LOCAL_FALLBACK_KM = float(os.environ.get('GEOCODE_LOCAL_FALLBACK_KM', 50))
+
+# Reverse-geocode cache: provider answers stored per geohash cell of
+# GEOCACHE_PRECISION characters (7 is about 150 m) in the database, with the
+# GEOCACHE_HOT_SIZE most recent cells in memory; refetched after GEOCACHE_TTL s
+GEOCACHE_PRECISION = int(os.environ.get('GEOCACHE_PRECISION', 7))
+GEOCACHE_HOT_SIZE = int(os.environ.get('GEOCACHE_HOT_SIZE', 4096))
+GEOCACHE_TTL = float(os.environ.get('GEOCACHE_TTL', 30 * 86400))
+
+# City search: answered from the gazetteer's names when it has
+# CITY_SEARCH_COUNT matches, else from open-meteo with its answers cached by
+# query (complete answers also serve longer queries)
+COUNTRIES_CSV = os.environ.get('COUNTRIES_CSV', os.path.join(BASE_DIR, 'data', 'countries.csv'))
+CITY_SEARCH_COUNT = int(os.environ.get('CITY_SEARCH_COUNT', 10))
+CITY_SEARCH_TIMEOUT = float(os.environ.get('CITY_SEARCH_TIMEOUT', 3))
+CITY_SEARCH_CACHE_SIZE = int(os.environ.get('CITY_SEARCH_CACHE_SIZE', 2048))
+CITY_SEARCH_CACHE_TTL = float(os.environ.get('CITY_SEARCH_CACHE_TTL', 86400))
+
+# Cold import budget for prediction.views, checked by `manage.py bench_imports`
+IMPORT_TIME_BUDGET_MS = float(os.environ.get('IMPORT_TIME_BUDGET_MS', 400))
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -487,6 +487,9 @@ const Sidebar = ({ setLocationName, isOpen, closeSidebar }) => {
                                     <small className="text-white-50">{city.country}</small>
                                 </button>
                             ))}
+                            <small className="d-block text-white-50 px-3 py-1" style={{ fontSize: '0.7rem' }}>
+                                Places: <a href="https://www.geonames.org/" target="_blank" rel="noopener noreferrer" className="text-white-50">GeoNames</a> (<a href="https://creativecommons.org/licenses/by/4.0/" target="_blank" rel="noopener noreferrer" className="text-white-50">CC BY 4.0</a>)
+                            </small>
                         </div>
                     )}
                 </div>
@@ -530,6 +533,13 @@ const Sidebar = ({ setLocationName, isOpen, closeSidebar }) => {
                 </div>
             </div>
 
+            {/* Data attribution: place names come from the bundled GeoNames gazetteer */}
+            <div className="px-3 pb-3">
+                <small className="text-white-50" style={{ fontSize: '0.7rem' }}>
+                    Place names © <a href="https://www.geonames.org/" target="_blank" rel="noopener noreferrer" className="text-white-50">GeoNames</a>, <a href="https://creativecommons.org/licenses/by/4.0/" target="_blank" rel="noopener noreferrer" className="text-white-50">CC BY 4.0</a>
+                </small>
+            </div>
+
         </div>
     );
 };
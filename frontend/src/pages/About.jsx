@@ -14,7 +14,12 @@ const SystemHealth = () => {
       const res = await axios.get(`${API_BASE_URL}/api/status/`);
       setStatus(res.data);
     } catch (err) {
-      setError(err.message);
+      // 503 means the backend is up but its models are still loading
+      if (err.response && err.response.status === 503 && err.response.data) {
+        setStatus(err.response.data);
+      } else {
+        setError(err.message);
+      }
     } finally {
       setLoading(false);
     }